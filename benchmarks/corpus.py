@@ -0,0 +1,125 @@
+"""
+Generates synthetic documentation trees in the data/<source>/<component>.txt layout.
+"""
+import datetime
+import os
+import random
+
+FIELD_WORDS = [
+    "Title", "Description", "Version", "Author", "Owner", "Status", "Category", "Theme",
+    "Size", "Color", "Variant", "Label", "Icon", "Tooltip", "Placeholder", "Default",
+    "Min", "Max", "Step", "Format", "Locale", "Alignment", "Spacing", "Border", "Shadow",
+]
+VALUE_WORDS = [
+    "primary", "secondary", "compact", "large", "small", "outlined", "filled", "stable",
+    "beta", "deprecated", "left", "right", "center", "auto", "none", "dark", "light",
+]
+BASE_DATE = datetime.date(2023, 1, 1)
+
+
+def field_names(count: int) -> list[str]:
+    """
+    Returns count distinct two-word field names, e.g. "Title Size".
+    """
+    names = []
+    for i in range(count):
+        first = FIELD_WORDS[i % len(FIELD_WORDS)]
+        second = FIELD_WORDS[(i // len(FIELD_WORDS) + i + 1) % len(FIELD_WORDS)]
+        suffix = f" {i // (len(FIELD_WORDS) ** 2) + 1}" if i >= len(FIELD_WORDS) ** 2 else ""
+        names.append(f"{first} {second}{suffix}")
+    return names
+
+
+def vary_name(name: str, rng: random.Random) -> str:
+    """
+    Returns a differently spelled variant of name ("Title Size" -> "title_size", "TitleSize", ...).
+    """
+    words = name.split()
+    style = rng.randrange(4)
+    if style == 0:
+        return "_".join(word.lower() for word in words)
+    if style == 1:
+        return "".join(words)
+    if style == 2:
+        return " ".join(word.lower() for word in words)
+    return "-".join(words)
+
+
+def render_field(name: str, value: str, is_required: bool, last_updated: str, freeform: bool) -> str:
+    """
+    Renders one field block, in the canonical layout or in a free-form sentence that
+    only an LLM (or the fake backend) can parse.
+    """
+    if freeform:
+        status = "required" if is_required else "optional"
+        return f'{name} is "{value}" ({status}; last updated {last_updated})'
+    return "\n".join([
+        f"Field: {name}",
+        f"Value: {value}",
+        f"Required: {'Yes' if is_required else 'No'}",
+        f"Last Updated: {last_updated}",
+    ])
+
+
+def generate_corpus(data_dir: str, components: int = 10, sources: int = 3, fields: int = 20,
+                    conflict_rate: float = 0.2, variation_rate: float = 0.1, freeform_rate: float = 0.0,
+                    seed: int = 0) -> dict:
+    """
+    Writes a synthetic corpus of components x sources documents under data_dir.
+
+    Every source documents every field of a component. With probability conflict_rate
+    a source gives a field its own value and date instead of the shared ones, with
+    variation_rate it spells the field name differently (see vary_name), and with
+    freeform_rate it writes the block as a free-form sentence. The same seed always
+    produces the same corpus.
+
+    Args:
+        data_dir: The directory to create the source subdirectories in.
+        components: Number of components.
+        sources: Number of sources per component.
+        fields: Number of fields per component.
+        conflict_rate: Share of fields whose value differs in a source.
+        variation_rate: Share of fields whose name is spelled differently in a source.
+        freeform_rate: Share of field blocks written as free-form text.
+        seed: Seed of the random generator.
+
+    Returns:
+        A summary with the generation parameters and the number of documents, conflicts,
+        name variations and free-form blocks written.
+    """
+    rng = random.Random(seed)
+    names = field_names(fields)
+    counts = {"documents": 0, "conflicts": 0, "variations": 0, "freeformBlocks": 0}
+    for source_index in range(sources):
+        os.makedirs(os.path.join(data_dir, f"source{source_index + 1}"), exist_ok=True)
+
+    for component_index in range(components):
+        component_name = f"component{component_index + 1}"
+        shared = [
+            (f"{rng.choice(VALUE_WORDS)} {rng.randrange(1000)}", rng.random() < 0.5,
+             (BASE_DATE + datetime.timedelta(days=rng.randrange(365))).isoformat())
+            for _ in names
+        ]
+        for source_index in range(sources):
+            blocks = []
+            for name, (value, is_required, last_updated) in zip(names, shared):
+                if rng.random() < conflict_rate:
+                    value = f"{rng.choice(VALUE_WORDS)} {rng.randrange(1000)}"
+                    last_updated = (BASE_DATE + datetime.timedelta(days=rng.randrange(365))).isoformat()
+                    counts["conflicts"] += 1
+                if rng.random() < variation_rate:
+                    name = vary_name(name, rng)
+                    counts["variations"] += 1
+                freeform = rng.random() < freeform_rate
+                counts["freeformBlocks"] += freeform
+                blocks.append(render_field(name, value, is_required, last_updated, freeform))
+            path = os.path.join(data_dir, f"source{source_index + 1}", f"{component_name}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n\n".join(blocks) + "\n")
+            counts["documents"] += 1
+
+    return {
+        "components": components, "sources": sources, "fields": fields,
+        "conflictRate": conflict_rate, "variationRate": variation_rate,
+        "freeformRate": freeform_rate, "seed": seed, **counts,
+    }
@@ -0,0 +1,86 @@
+"""
+A deterministic, offline stand-in for the CrewAI agents, for benchmarks.
+
+Install it with src.crew_runner.set_llm_backend(FakeLLMBackend(...)).
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from src.field_aligner import align_fields_crew
+from src.field_comparer import compare_fields_crew, score_fields_locally
+from src.field_extractor import extract_fields_crew, normalize_required
+from src.prompt_codec import decode_aligned_fields, encode_evaluations
+
+# The free-form layout written by benchmarks.corpus.render_field.
+_FREEFORM_RE = re.compile(
+    r'^(?P<name>.+?) is "(?P<value>.*)" \((?P<required>\w+); last updated (?P<date>\d{4}-\d{2}-\d{2})\)$'
+)
+
+
+class FakeLLMBackend:
+    """
+    Answers the extraction, alignment and comparison tasks without a model.
+
+    Extraction parses the free-form blocks written by the corpus generator, alignment
+    is an exact-name join and comparison uses the local scores, both in the compact
+    formats of src.prompt_codec. Each call sleeps for latency_ms plus a jitter of up
+    to jitter_ms that is derived from the inputs, so the same corpus always sees the
+    same latencies.
+
+    Args:
+        latency_ms: Base latency of every call, in milliseconds.
+        jitter_ms: Maximum extra latency, in milliseconds.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, crew_task, inputs: dict) -> str:
+        with self._lock:
+            self.calls += 1
+        self._sleep(inputs)
+        if crew_task is extract_fields_crew:
+            return json.dumps(self._extract(inputs["doc_content"]))
+        if crew_task is align_fields_crew:
+            return json.dumps(self._align(inputs["extracted_data_by_source"]))
+        if crew_task is compare_fields_crew:
+            aligned_field_data = decode_aligned_fields(inputs["aligned_field_data"])
+            evaluated_data, _ = score_fields_locally(aligned_field_data)
+            return json.dumps(encode_evaluations(evaluated_data, aligned_field_data))
+        raise ValueError(f"Unknown task: {crew_task.description[:60]!r}")
+
+    def _sleep(self, inputs: dict) -> None:
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).digest()
+            delay_ms += random.Random(digest).uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    @staticmethod
+    def _align(encoded: dict) -> dict[str, list[int]]:
+        # Group the row ids of the compact alignment input by exact field name.
+        groups = {}
+        for row_id, (_, field_name, _) in enumerate(encoded["rows"]):
+            groups.setdefault(field_name, []).append(row_id)
+        return groups
+
+    @staticmethod
+    def _extract(doc_content: str) -> list[dict]:
+        fields = []
+        for line in doc_content.splitlines():
+            match = _FREEFORM_RE.match(line.strip())
+            if match:
+                fields.append({
+                    "fieldName": match.group("name"),
+                    "fieldValue": match.group("value"),
+                    "isRequired": bool(normalize_required(match.group("required"))),
+                    "lastUpdated": match.group("date"),
+                })
+        return fields
@@ -0,0 +1,88 @@
+"""
+Compares the memory held by the workflow's intermediate data as nested dicts and as
+the slotted records of src.models.
+
+Builds the aligned and evaluated data of synthetic components (every source documents
+every field, with a few distinct dates) and measures, with tracemalloc, the memory
+retained while all of them are held in each form. Each form is built from a JSON
+round-trip, as when the data comes from a checkpoint or an LLM response.
+
+Usage (from the repository root):
+    python -m benchmarks.memory_benchmark --components 20 --sources 30 --fields 300
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from src.field_comparer import score_fields_locally
+from src.models import aligned_from_dict, evaluations_from_dict
+
+
+def component_json(sources: int, fields: int, seed: int) -> tuple[str, str]:
+    """
+    Returns the aligned and evaluated data of one synthetic component as JSON text.
+    """
+    rng = random.Random(seed)
+    aligned_field_data = {
+        f"Field {field_index}": {
+            f"source{source_index + 1}": {
+                "originalValue": f"value {field_index}-{rng.randrange(3)}",
+                "lastUpdated": f"2024-0{rng.randrange(1, 10)}-1{rng.randrange(10)}",
+                "isRequired": rng.random() < 0.5,
+            }
+            for source_index in range(sources)
+        }
+        for field_index in range(fields)
+    }
+    evaluated_data, _ = score_fields_locally(aligned_field_data)
+    return json.dumps(aligned_field_data), json.dumps(evaluated_data)
+
+
+def retained_bytes(build) -> int:
+    """
+    Returns the memory still allocated after build() returns, while its result is held.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        held = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        del held
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+def run_benchmark(components: int, sources: int, fields: int) -> dict[str, dict]:
+    """
+    Returns, for the aligned and the evaluated data, the retained bytes as dicts and as records.
+    """
+    texts = [component_json(sources, fields, seed) for seed in range(components)]
+    results = {}
+    for name, index, from_dict in (("aligned", 0, aligned_from_dict), ("evaluated", 1, evaluations_from_dict)):
+        results[name] = {
+            "dictBytes": retained_bytes(lambda: [json.loads(text[index]) for text in texts]),
+            "recordBytes": retained_bytes(lambda: [from_dict(json.loads(text[index])) for text in texts]),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the memory of nested dicts and src.models records.")
+    parser.add_argument("--components", type=int, default=10, help="Number of components (default: 10)")
+    parser.add_argument("--sources", type=int, default=30, help="Sources per component (default: 30)")
+    parser.add_argument("--fields", type=int, default=300, help="Fields per component (default: 300)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.components, args.sources, args.fields)
+    print(f"{args.components} components x {args.sources} sources x {args.fields} fields:")
+    print(f"{'Data':<10}  {'Dicts MB':>9}  {'Records MB':>10}  {'Ratio':>6}")
+    for name, sizes in results.items():
+        print(f"{name:<10}  {sizes['dictBytes'] / 2**20:>9.1f}  {sizes['recordBytes'] / 2**20:>10.1f}  "
+              f"{sizes['dictBytes'] / sizes['recordBytes']:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+End-to-end pipeline benchmark on a synthetic corpus with an offline fake LLM.
+
+Generates a corpus (see benchmarks.corpus), runs Stages 1-7 for every component with
+the FakeLLMBackend and reports throughput and latency percentiles per stage. The
+results are saved as JSON so that runs can be compared across commits.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline_benchmark --components 50 --sources 3 --fields 40 --latency-ms 200
+    python -m benchmarks.pipeline_benchmark --components 50 --latency-ms 200 --pipeline --step-workers extract=8,compare=8
+    python -m benchmarks.pipeline_benchmark --baseline benchmarks/results/<earlier run>.json
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_llm import FakeLLMBackend
+from src.crew_runner import set_llm_backend
+from src.doc_reader import DocIndex
+from src.main import parse_step_workers, run_batch, run_streaming_batch
+from src.metrics import STAGE_NAMES, configure_metrics, disable_metrics
+from src.pipeline import DEFAULT_QUEUE_SIZE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+class ListSink:
+    """
+    Keeps stage records in memory.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record: dict) -> None:
+        self.records.append(record)
+
+    def close(self) -> None:
+        pass
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Returns the nearest-rank q-th percentile (0-100) of values.
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_stages(records: list[dict]) -> dict[str, dict]:
+    """
+    Aggregates stage records into per-stage throughput, latency percentiles and LLM usage.
+    """
+    summary = {}
+    for stage, stage_name in STAGE_NAMES.items():
+        stage_records = [record for record in records if record["stage"] == stage]
+        if not stage_records:
+            continue
+        latencies_ms = [record["wallSeconds"] * 1000 for record in stage_records]
+        total_seconds = sum(record["wallSeconds"] for record in stage_records)
+        summary[stage_name] = {
+            "runs": len(stage_records),
+            "throughputPerSecond": len(stage_records) / total_seconds if total_seconds else None,
+            "p50Ms": percentile(latencies_ms, 50),
+            "p90Ms": percentile(latencies_ms, 90),
+            "p99Ms": percentile(latencies_ms, 99),
+            "maxMs": max(latencies_ms),
+            "cpuSeconds": sum(record["cpuSeconds"] for record in stage_records),
+            "llmCalls": sum(record["llmCalls"] for record in stage_records),
+            "promptTokens": sum(record["promptTokens"] for record in stage_records),
+            "completionTokens": sum(record["completionTokens"] for record in stage_records),
+        }
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(corpus_options: dict, workflow_options: dict, workers: int,
+                  latency_ms: float, jitter_ms: float, step_workers: Optional[dict[str, int]] = None,
+                  queue_size: int = DEFAULT_QUEUE_SIZE) -> dict:
+    """
+    Generates a corpus in a temporary directory and runs the whole pipeline on it.
+
+    Args:
+        corpus_options: Keyword arguments for benchmarks.corpus.generate_corpus.
+        workflow_options: Keyword arguments for main.run_workflow.
+        workers: Number of components processed concurrently.
+        latency_ms: Base latency of every fake LLM call.
+        jitter_ms: Maximum extra latency of a fake LLM call.
+        step_workers: Workers per workflow step. If given, components are streamed
+                      through the steps (main.run_streaming_batch) and workers is unused.
+        queue_size: Capacity of each step's input queue when streaming.
+
+    Returns:
+        The benchmark results (corpus summary, totals and per-stage summary).
+    """
+    backend = FakeLLMBackend(latency_ms, jitter_ms)
+    sink = ListSink()
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = generate_corpus(os.path.join(work_dir, "data"), **corpus_options)
+        os.chdir(work_dir) # run_workflow writes its reports to ./output
+        set_llm_backend(backend)
+        configure_metrics([], sinks=[sink])
+        try:
+            doc_index = DocIndex(os.path.join(work_dir, "data"))
+            started = time.perf_counter()
+            options = {**workflow_options, "doc_index": doc_index}
+            if step_workers is None:
+                results = run_batch(doc_index.components(), workers, options)
+            else:
+                results = run_streaming_batch(doc_index.components(), step_workers, options, queue_size)
+            elapsed = time.perf_counter() - started
+        finally:
+            disable_metrics()
+            set_llm_backend(None)
+            os.chdir(previous_cwd)
+
+    statuses = {status: sum(1 for result in results if result["status"] == status) for status in ("ok", "skipped", "failed")}
+    return {
+        "corpus": corpus,
+        "elapsedSeconds": elapsed,
+        "componentsPerSecond": len(results) / elapsed if elapsed else None,
+        "statuses": statuses,
+        "llmCalls": backend.calls,
+        "stages": summarize_stages(sink.records),
+    }
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    print(f"{results['corpus']['components']} components in {results['elapsedSeconds']:.2f} s "
+          f"({results['componentsPerSecond']:.1f}/s), {results['llmCalls']} fake LLM calls, "
+          f"statuses: {results['statuses']}")
+    print(f"{'Stage':<10}  {'Runs':>5}  {'Per s':>9}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'LLM calls':>9}"
+          + ("  p50 vs baseline" if baseline else ""))
+    for stage_name, stage in results["stages"].items():
+        throughput = f"{stage['throughputPerSecond']:.1f}" if stage["throughputPerSecond"] else "-"
+        line = (f"{stage_name:<10}  {stage['runs']:>5}  {throughput:>9}  {stage['p50Ms']:>8.2f}  "
+                f"{stage['p90Ms']:>8.2f}  {stage['p99Ms']:>8.2f}  {stage['llmCalls']:>9}")
+        baseline_stage = (baseline or {}).get("stages", {}).get(stage_name)
+        if baseline_stage and baseline_stage["p50Ms"]:
+            line += f"  {(stage['p50Ms'] / baseline_stage['p50Ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on a synthetic corpus with a fake LLM.")
+    parser.add_argument("--components", type=int, default=20, help="Number of components (default: 20)")
+    parser.add_argument("--sources", type=int, default=3, help="Sources per component (default: 3)")
+    parser.add_argument("--fields", type=int, default=20, help="Fields per component (default: 20)")
+    parser.add_argument("--conflict-rate", type=float, default=0.2, help="Share of conflicting fields (default: 0.2)")
+    parser.add_argument("--variation-rate", type=float, default=0.1,
+                        help="Share of differently spelled field names (default: 0.1)")
+    parser.add_argument("--freeform-rate", type=float, default=0.1,
+                        help="Share of field blocks that need the LLM to extract (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake LLM latency per call (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Maximum extra fake LLM latency (default: 0)")
+    parser.add_argument("--workers", type=int, default=4, help="Components processed concurrently (default: 4)")
+    parser.add_argument("--pipeline", action="store_true", help="Stream components through the workflow steps")
+    parser.add_argument("--step-workers", type=str, default="", help="Workers per step with --pipeline, e.g. extract=8")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Capacity of each step's input queue with --pipeline (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--fuzzy-align", action="store_true", help="Merge differently spelled field names")
+    parser.add_argument("--llm-align", action="store_true", help="Align every field with the (fake) LLM")
+    parser.add_argument("--llm-compare", action="store_true", help="Compare every field with the (fake) LLM")
+    parser.add_argument("--output", type=str, default=None,
+                        help=f"Results file (default: a timestamped file in {DEFAULT_RESULTS_DIR})")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    corpus_options = {
+        "components": args.components, "sources": args.sources, "fields": args.fields,
+        "conflict_rate": args.conflict_rate, "variation_rate": args.variation_rate,
+        "freeform_rate": args.freeform_rate, "seed": args.seed,
+    }
+    workflow_options = {
+        "fuzzy_align": args.fuzzy_align, "llm_align": args.llm_align, "llm_compare": args.llm_compare,
+    }
+    step_workers = parse_step_workers(args.step_workers) if args.pipeline else None
+    results = run_benchmark(corpus_options, workflow_options, args.workers, args.latency_ms, args.jitter_ms,
+                            step_workers, args.queue_size)
+    results = {
+        "commit": git_commit(),
+        "createdAt": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "options": {**workflow_options, "workers": args.workers, "stepWorkers": step_workers,
+                    "queueSize": args.queue_size, "latencyMs": args.latency_ms, "jitterMs": args.jitter_ms},
+        **results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"pipeline-{datetime.datetime.now():%Y%m%d-%H%M%S}-{results['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_path}")
+    if results["statuses"]["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
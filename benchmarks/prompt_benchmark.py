@@ -0,0 +1,126 @@
+"""
+Compares the prompt and response sizes of the LLM alignment and comparison tasks in
+the verbose nested-dict form and the compact form of src.prompt_codec.
+
+Generates a corpus (see benchmarks.corpus), extracts and aligns every component
+locally and estimates, with crew_runner.estimate_tokens, the tokens of the task
+inputs and of a complete response in both forms. The fixed task instructions are
+the same for every call and are not counted.
+
+Usage (from the repository root):
+    python -m benchmarks.prompt_benchmark --components 20 --sources 3 --fields 40
+"""
+import argparse
+import json
+import os
+import tempfile
+from benchmarks.corpus import generate_corpus
+from src.crew_runner import estimate_tokens
+from src.doc_reader import DocIndex, read_component_docs
+from src.field_aligner import align_fields_locally
+from src.field_comparer import score_fields_locally
+from src.field_extractor import extract_fields_from_content
+from src.prompt_codec import encode_aligned_fields, encode_evaluations, encode_extracted_fields
+
+TASKS = ("align", "compare")
+
+
+def group_rows_by_name(encoded: dict) -> dict[str, list[int]]:
+    """
+    Returns the compact alignment response of an exact-name join of encoded rows.
+    """
+    groups = {}
+    for row_id, (_, field_name, _) in enumerate(encoded["rows"]):
+        groups.setdefault(field_name, []).append(row_id)
+    return groups
+
+
+def measure_component(extracted_data_by_source: dict[str, list[dict]]) -> dict[str, dict]:
+    """
+    Estimates the tokens of both tasks for one component in both forms.
+
+    Returns:
+        {task: {"verbose": {"prompt", "response"}, "compact": {"prompt", "response"}}}
+    """
+    aligned_field_data = align_fields_locally(extracted_data_by_source)
+    evaluated_data, _ = score_fields_locally(aligned_field_data)
+    encoded_extracted = encode_extracted_fields(extracted_data_by_source)
+    return {
+        "align": {
+            "verbose": {"prompt": estimate_tokens(extracted_data_by_source), "response": estimate_tokens(aligned_field_data)},
+            "compact": {"prompt": estimate_tokens(encoded_extracted),
+                        "response": estimate_tokens(group_rows_by_name(encoded_extracted))},
+        },
+        "compare": {
+            "verbose": {"prompt": estimate_tokens(aligned_field_data), "response": estimate_tokens(evaluated_data)},
+            "compact": {"prompt": estimate_tokens(encode_aligned_fields(aligned_field_data)),
+                        "response": estimate_tokens(encode_evaluations(evaluated_data, aligned_field_data))},
+        },
+    }
+
+
+def run_benchmark(corpus_options: dict) -> dict:
+    """
+    Generates a corpus in a temporary directory and sums the token estimates of every component.
+
+    Args:
+        corpus_options: Keyword arguments for benchmarks.corpus.generate_corpus.
+
+    Returns:
+        The corpus summary and, per task and form, the total prompt and response tokens.
+    """
+    totals = {task: {form: {"prompt": 0, "response": 0} for form in ("verbose", "compact")} for task in TASKS}
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = os.path.join(work_dir, "data")
+        corpus = generate_corpus(data_dir, **corpus_options)
+        doc_index = DocIndex(data_dir)
+        for component_name in doc_index.components():
+            docs_by_source = read_component_docs(component_name, doc_index)
+            extracted_data_by_source = {
+                source_name: extract_fields_from_content(doc_content)
+                for source_name, doc_content in docs_by_source.items()
+            }
+            for task, forms in measure_component(extracted_data_by_source).items():
+                for form, tokens in forms.items():
+                    for kind, value in tokens.items():
+                        totals[task][form][kind] += value
+    return {"corpus": corpus, "tokens": totals}
+
+
+def print_results(results: dict) -> None:
+    print(f"{results['corpus']['components']} components, estimated tokens (verbose -> compact):")
+    print(f"{'Task':<8}  {'Kind':<8}  {'Verbose':>9}  {'Compact':>9}  {'Change':>8}")
+    for task in TASKS:
+        tokens = results["tokens"][task]
+        for kind in ("prompt", "response"):
+            verbose, compact = tokens["verbose"][kind], tokens["compact"][kind]
+            change = f"{(compact / verbose - 1) * 100:+.1f}%" if verbose else "-"
+            print(f"{task:<8}  {kind:<8}  {verbose:>9}  {compact:>9}  {change:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare verbose and compact LLM prompt sizes on a synthetic corpus.")
+    parser.add_argument("--components", type=int, default=20, help="Number of components (default: 20)")
+    parser.add_argument("--sources", type=int, default=3, help="Sources per component (default: 3)")
+    parser.add_argument("--fields", type=int, default=20, help="Fields per component (default: 20)")
+    parser.add_argument("--conflict-rate", type=float, default=0.2, help="Share of conflicting fields (default: 0.2)")
+    parser.add_argument("--variation-rate", type=float, default=0.1,
+                        help="Share of differently spelled field names (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--output", type=str, default=None, help="Optional file to save the results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark({
+        "components": args.components, "sources": args.sources, "fields": args.fields,
+        "conflict_rate": args.conflict_rate, "variation_rate": args.variation_rate, "seed": args.seed,
+    })
+    print_results(results)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
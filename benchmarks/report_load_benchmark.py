@@ -0,0 +1,90 @@
+"""
+Compares loading a fleet of component reports from the per-component CSV files and
+from the Parquet export of src.parquet_export.
+
+Writes the CSV report and the Parquet partition of synthetic components to a
+temporary directory, then times loading all of them: the CSVs with the csv module,
+converting OverallConfidence and NeedsReview back to their types and parsing the
+AllSourcesDetailsJSON column, and the Parquet directory in one read, once with every
+column and once with two columns only. Needs pyarrow.
+
+Usage (from the repository root):
+    python -m benchmarks.report_load_benchmark --components 500 --sources 10 --fields 40
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import tempfile
+import time
+from benchmarks.memory_benchmark import component_json
+from src.parquet_export import export_parquet_report, pyarrow_available, read_parquet_report
+from src.report_generator import generate_csv_report
+
+
+def load_csv_reports(output_dir: str) -> list[dict]:
+    """
+    Loads every *_report.csv of output_dir as typed rows with the details decoded.
+    """
+    rows = []
+    for path in sorted(glob.glob(os.path.join(output_dir, "*_report.csv"))):
+        component_name = os.path.basename(path)[:-len("_report.csv")]
+        with open(path, newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                row["Component"] = component_name
+                row["OverallConfidence"] = float(row["OverallConfidence"])
+                row["NeedsReview"] = row["NeedsReview"] == "True"
+                row["AllSourcesDetailsJSON"] = json.loads(row["AllSourcesDetailsJSON"])
+                rows.append(row)
+    return rows
+
+
+def timed(load) -> tuple[float, int]:
+    started = time.perf_counter()
+    rows = len(load())
+    return time.perf_counter() - started, rows
+
+
+def run_benchmark(components: int, sources: int, fields: int) -> dict[str, dict]:
+    """
+    Returns the seconds and rows of each way of loading the reports, and the bytes on disk.
+    """
+    evaluated_data = json.loads(component_json(sources, fields, seed=0)[1])
+    with tempfile.TemporaryDirectory() as output_dir:
+        parquet_dir = os.path.join(output_dir, "parquet")
+        for index in range(components):
+            generate_csv_report(evaluated_data, os.path.join(output_dir, f"component{index}_report.csv"))
+            export_parquet_report(f"component{index}", evaluated_data, parquet_dir)
+        csv_bytes = sum(os.path.getsize(path) for path in glob.glob(os.path.join(output_dir, "*_report.csv")))
+        parquet_bytes = sum(os.path.getsize(path) for path in glob.glob(os.path.join(parquet_dir, "*", "*.parquet")))
+
+        results = {}
+        for name, load, size in (
+            ("csv", lambda: load_csv_reports(output_dir), csv_bytes),
+            ("parquet", lambda: read_parquet_report(parquet_dir), parquet_bytes),
+            ("parquet, 2 columns", lambda: read_parquet_report(parquet_dir, ["field_name", "needs_review"]), parquet_bytes),
+        ):
+            seconds, rows = timed(load)
+            results[name] = {"seconds": seconds, "rows": rows, "bytes": size}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare loading CSV and Parquet component reports.")
+    parser.add_argument("--components", type=int, default=200, help="Number of components (default: 200)")
+    parser.add_argument("--sources", type=int, default=10, help="Sources per component (default: 10)")
+    parser.add_argument("--fields", type=int, default=40, help="Fields per component (default: 40)")
+    args = parser.parse_args()
+    if not pyarrow_available():
+        parser.error("this benchmark needs the pyarrow package (pip install pyarrow)")
+
+    results = run_benchmark(args.components, args.sources, args.fields)
+    print(f"{args.components} components x {args.sources} sources x {args.fields} fields:")
+    print(f"{'Load':<20}  {'Rows':>8}  {'Seconds':>8}  {'Disk MB':>8}")
+    for name, result in results.items():
+        print(f"{name:<20}  {result['rows']:>8}  {result['seconds']:>8.2f}  {result['bytes'] / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measures CLI startup time in fresh interpreters.
+
+Each command is run in a new subprocess, so import costs are paid every time. The
+budget applies to the median `import src.main` time minus the median time of a bare
+interpreter, i.e. to what importing the workflow adds; the interpreter's own start
+varies several-fold between machines and with load. The script also checks that importing src.main does not import the modules of
+DEFERRED_MODULES, which only the code paths that use them import.
+
+Usage (from the repository root):
+    python benchmarks/startup_benchmark.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "import src.main": [sys.executable, "-c", "import src.main"],
+    "main.py --help": [sys.executable, "-m", "src.main", "--help"],
+}
+# crewai is only needed for LLM calls, pyarrow and src.parquet_export for --parquet-dir,
+# sqlite3 once the LLM cache is opened, tracemalloc for --metrics-out and --profile-memory, and
+# src.field_matrix for callers that build a FieldMatrix.
+DEFERRED_MODULES = ("crewai", "pyarrow", "src.parquet_export", "sqlite3", "tracemalloc", "src.field_matrix")
+
+
+def time_command(command: list[str], runs: int) -> list[float]:
+    """
+    Runs a command repeatedly and returns the wall-clock time of each run in milliseconds.
+
+    Args:
+        command: The command and its arguments.
+        runs: How many times to run it.
+
+    Returns:
+        A list of durations in milliseconds.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def imported_by_main(module: str) -> bool:
+    """
+    Returns True if importing src.main also imports module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", f"import src.main, sys; print({module!r} in sys.modules)"],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+    )
+    return result.stdout.strip() == "True"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure CLI startup time.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command (default: 10).")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Fail if the median `import src.main` time exceeds the median interpreter start "
+                             "by more than this (default: 100).")
+    args = parser.parse_args()
+
+    print(f"{'command':<20} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    medians = {}
+    for name, command in COMMANDS.items():
+        durations = time_command(command, args.runs)
+        medians[name] = statistics.median(durations)
+        print(f"{name:<20} {medians[name]:>10.1f} {min(durations):>10.1f} {max(durations):>10.1f}")
+
+    failed = False
+    for module in DEFERRED_MODULES:
+        if imported_by_main(module):
+            print(f"FAIL: importing src.main imports {module}")
+            failed = True
+    import_ms = medians["import src.main"] - medians["interpreter"]
+    print(f"`import src.main` adds {import_ms:.1f} ms to the interpreter start (budget {args.budget_ms:.0f} ms)")
+    if import_ms > args.budget_ms:
+        print(f"FAIL: `import src.main` adds more than {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Optional
+from src.utils import atomic_write, sha256_hex
+
+DEFAULT_CHECKPOINT_DIR = os.path.join("output", "checkpoints")
+
+# Stages whose outputs are checkpointed, with the name of the data they produce.
+CHECKPOINT_STAGES = {
+    2: "extracted_data_by_source",
+    3: "aligned_fields",
+    4: "evaluated_data",
+}
+
+
+def fingerprint(data, **params) -> str:
+    """
+    Returns a SHA-256 fingerprint of a stage's input data and the options it runs with.
+    """
+    payload = json.dumps({"data": data, "params": params}, sort_keys=True, default=str)
+    return sha256_hex(payload)
+
+
+class CheckpointStore:
+    """
+    Persists the outputs of Stages 2-4 for one component, each with the fingerprint
+    of the input it was computed from.
+
+    Checkpoints are stored as <root>/<component_name>/stage<N>_<name>.json.
+
+    Args:
+        component_name: The name of the component.
+        root: Directory holding the per-component checkpoint directories.
+    """
+
+    def __init__(self, component_name: str, root: str = DEFAULT_CHECKPOINT_DIR):
+        self.component_name = component_name
+        self.directory = os.path.join(root, component_name)
+
+    def path(self, stage: int) -> str:
+        return os.path.join(self.directory, f"stage{stage}_{CHECKPOINT_STAGES[stage]}.json")
+
+    def load(self, stage: int, input_fingerprint: str):
+        """
+        Returns the checkpointed output of a stage, or None if there is no checkpoint
+        or it was computed from a different input.
+        """
+        try:
+            with open(self.path(stage), 'r') as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if checkpoint.get("inputFingerprint") != input_fingerprint:
+            return None
+        return checkpoint.get("data")
+
+    def load_latest(self, stage: int):
+        """
+        Returns the last checkpointed output of a stage whatever its input was, or None.
+        """
+        try:
+            with open(self.path(stage), 'r') as f:
+                return json.load(f).get("data")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, stage: int, input_fingerprint: str, data) -> None:
+        """
+        Writes the output of a stage. The file is replaced atomically, so an
+        interrupted run never leaves a partial checkpoint behind.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(self.path(stage)) as f:
+            json.dump({"stage": stage, "inputFingerprint": input_fingerprint, "data": data}, f)
+
+
+def run_checkpointed_stage(store: Optional[CheckpointStore], stage: int, input_fingerprint: str,
+                           reuse: bool, compute, save=True):
+    """
+    Returns a stage's output from its checkpoint when reuse is set and the input is
+    unchanged. Otherwise computes it with compute() and saves it when save is set.
+
+    Args:
+        store: The component's checkpoint store, or None to disable checkpointing.
+        stage: The stage number (a key of CHECKPOINT_STAGES).
+        input_fingerprint: Fingerprint of the stage's input (see fingerprint()).
+        reuse: Whether a matching checkpoint may be used instead of recomputing.
+        compute: Callable computing the stage output.
+        save: Whether to save computed output, or a callable deciding it from the output.
+
+    Returns:
+        A tuple of (stage output, whether it came from a checkpoint).
+    """
+    if store is not None and reuse:
+        data = store.load(stage, input_fingerprint)
+        if data is not None:
+            return data, True
+
+    data = compute()
+    should_save = save(data) if callable(save) else save
+    if store is not None and should_save:
+        store.save(stage, input_fingerprint, data)
+    return data, False
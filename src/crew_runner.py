@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+from typing import Callable, Optional
+from src.llm_cache import get_active_cache, make_cache_key
+from src.metrics import count
+from src.rate_limiter import RateLimiter
+
+CHARS_PER_TOKEN = 4
+
+_rate_limiter: Optional[RateLimiter] = None
+_llm_backend: Optional[Callable[["LazyCrewTask", dict], str]] = None
+_verbose_agents: set[str] = set()
+
+
+def set_rate_limiter(rate_limiter: Optional[RateLimiter]) -> None:
+    """
+    Sets the limiter shared by every LLM call in the process. Pass None to remove it.
+    """
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def set_agent_verbosity(agent_names: set[str]) -> None:
+    """
+    Sets which agents (by LazyCrewTask name, e.g. "extract") run their Agent and Crew
+    with verbose=True. All others are quiet. Takes effect for agents built afterwards.
+    """
+    global _verbose_agents
+    _verbose_agents = set(agent_names)
+
+
+def set_llm_backend(backend: Optional[Callable[["LazyCrewTask", dict], str]]) -> None:
+    """
+    Replaces CrewAI with backend(crew_task, inputs) -> str for every LLM call in the
+    process, e.g. an offline stand-in for benchmarks. Pass None to use CrewAI again.
+    Caching, rate limiting and metrics still apply.
+    """
+    global _llm_backend
+    _llm_backend = backend
+
+
+class LazyCrewTask:
+    """
+    A CrewAI Agent and Task pair that is only built on first use.
+
+    crewai is imported by the first access to agent or task, so code paths that never
+    call the LLM (local parsing, cache hits, --help) do not pay its import cost.
+
+    Args:
+        name: Short name of the agent, used to configure its verbosity (see set_agent_verbosity).
+        agent_config: Keyword arguments for crewai.Agent, without 'verbose'.
+        task_config: Keyword arguments for crewai.Task, without 'agent'.
+    """
+
+    def __init__(self, name: str, agent_config: dict, task_config: dict):
+        self.name = name
+        self.agent_config = agent_config
+        self.task_config = task_config
+        self._agent = None
+        self._task = None
+        self._lock = threading.Lock()
+
+    @property
+    def description(self) -> str:
+        return self.task_config["description"]
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._task is None:
+                from crewai import Agent, Task
+
+                agent = Agent(**self.agent_config, verbose=self.verbose)
+                self._task = Task(**self.task_config, agent=agent)
+                self._agent = agent
+
+    @property
+    def verbose(self) -> bool:
+        return self.name in _verbose_agents
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            self._build()
+        return self._agent
+
+    @property
+    def task(self):
+        if self._task is None:
+            self._build()
+        return self._task
+
+
+def estimate_tokens(data) -> int:
+    """
+    Roughly estimates the prompt tokens needed to render data, at CHARS_PER_TOKEN characters per token.
+    """
+    text = data if isinstance(data, str) else json.dumps(data, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def get_model_name() -> str:
+    """
+    Returns the name of the model the agents run on, used to key cached results.
+    """
+    return os.environ.get("OPENAI_MODEL_NAME", "")
+
+
+def run_crew_task(crew_task: LazyCrewTask, inputs: dict) -> str:
+    """
+    Runs a single-agent, single-task Crew and returns its raw string result.
+
+    If a kickoff cache is configured (see src.llm_cache.configure_cache), results are
+    looked up by a hash of the inputs, the task description and the model name, and
+    the LLM is only called on a miss. Only results that parse as JSON are cached. LLM calls
+    wait on the shared rate limiter, if one is set. Calls, estimated tokens and cache
+    hits are counted in the stage metrics (see src.metrics).
+
+    Args:
+        crew_task: The lazily built Agent and Task to run.
+        inputs: The inputs dictionary passed to Crew.kickoff().
+
+    Returns:
+        The string returned by Crew.kickoff(), or by the backend set with set_llm_backend.
+    """
+    cache = get_active_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(crew_task.description, inputs, get_model_name())
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            count("cacheHits")
+            return cached_result
+        count("cacheMisses")
+
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+
+    count("llmCalls")
+    count("promptTokens", estimate_tokens(crew_task.description) + estimate_tokens(inputs))
+    if _llm_backend is not None:
+        result_json_str = _llm_backend(crew_task, inputs)
+    else:
+        from crewai import Crew
+
+        crew = Crew(
+            agents=[crew_task.agent],
+            tasks=[crew_task.task],
+            verbose=crew_task.verbose
+        )
+        result_json_str = crew.kickoff(inputs=inputs)
+
+    # Ensure the result is a string before trying to load it as JSON
+    if not isinstance(result_json_str, str):
+        # This case might happen if the LLM returns a non-string output or if mocking is incorrect
+        raise TypeError(f"The LLM call returned type {type(result_json_str)} instead of str. Content: {result_json_str}")
+    count("completionTokens", estimate_tokens(result_json_str))
+
+    if cache is not None and _is_json(result_json_str):
+        # Malformed results are not cached, so that a retry asks the LLM again.
+        cache.put(cache_key, result_json_str)
+    return result_json_str
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
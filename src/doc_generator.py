@@ -1,4 +1,5 @@
-from src.utils import OutputMarkers
+from collections.abc import Mapping
+from src.utils import OutputMarkers, atomic_write
 
 def generate_unified_document(final_reviewed_data: dict, output_doc_path: str) -> None:
     """
@@ -6,10 +7,11 @@ def generate_unified_document(final_reviewed_data: dict, output_doc_path: str) -
 
     Args:
         final_reviewed_data: Dictionary output from human_reviewer.py (or field_comparer.py).
-                             Keys are field names.
+                             Keys are field names; values are dicts or FieldEvaluation
+                             records (see src.models).
         output_doc_path: The file path where the unified document should be saved.
     """
-    with open(output_doc_path, 'w') as f:
+    with atomic_write(output_doc_path) as f:
         for field_name, field_info in final_reviewed_data.items():
             truth_source_name = field_info.get('truthSource')
 
@@ -18,7 +20,7 @@ def generate_unified_document(final_reviewed_data: dict, output_doc_path: str) -
 
             truth_details = field_info.get('diff', {}).get(truth_source_name)
 
-            if not truth_details or not isinstance(truth_details, dict) or \
+            if not truth_details or not isinstance(truth_details, Mapping) or \
                truth_details.get('value') == str(OutputMarkers.NO_FIELD):
                 continue
 
@@ -1,16 +1,139 @@
 import os
+import threading
+from typing import Optional
 
-def read_component_docs(component_name: str) -> dict[str, str]:
+
+class DocIndex:
+    """
+    Index of the documentation files under the data/ directory, built with one
+    os.scandir walk.
+
+    Maps each component to {source name: {"path", "size", "mtime"}} and can be reused
+    across components. refresh() rescans only the source directories whose mtime
+    changed, which covers files being added, removed or renamed. Pass deep=True to
+    also pick up files edited in place. The index is safe to share between threads.
+
+    Args:
+        data_dir: The directory holding one subdirectory per source.
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self._source_mtimes: dict[str, int] = {}
+        self._files_by_source: dict[str, dict[str, dict]] = {}
+        self._files_by_component: dict[str, dict[str, dict]] = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self, deep: bool = False) -> set[str]:
+        """
+        Updates the index from disk.
+
+        Args:
+            deep: Whether to rescan every source directory, not only those whose mtime changed.
+
+        Returns:
+            The names of the components whose files were added, removed or changed.
+        """
+        with self._lock:
+            return self._refresh(deep)
+
+    def _refresh(self, deep: bool) -> set[str]:
+        changed_components = set()
+        current_sources = {}
+        try:
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        current_sources[entry.name] = entry
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+
+        for source_name in list(self._files_by_source):
+            if source_name not in current_sources:
+                changed_components.update(self._files_by_source[source_name])
+                self._set_source_files(source_name, {})
+                del self._files_by_source[source_name]
+                del self._source_mtimes[source_name]
+
+        for source_name, entry in current_sources.items():
+            mtime = entry.stat().st_mtime_ns
+            if not deep and self._source_mtimes.get(source_name) == mtime:
+                continue
+            self._source_mtimes[source_name] = mtime
+            new_files = self._scan_source(entry.path)
+            old_files = self._files_by_source.get(source_name, {})
+            for component_name in old_files.keys() | new_files.keys():
+                if old_files.get(component_name) != new_files.get(component_name):
+                    changed_components.add(component_name)
+            self._set_source_files(source_name, new_files)
+            self._files_by_source[source_name] = new_files
+        return changed_components
+
+    @staticmethod
+    def _scan_source(source_path: str) -> dict[str, dict]:
+        files = {}
+        with os.scandir(source_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name[:-len(".txt")]] = {
+                        "path": entry.path,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime_ns,
+                    }
+        return files
+
+    def _set_source_files(self, source_name: str, files: dict[str, dict]) -> None:
+        for component_name in self._files_by_source.get(source_name, {}):
+            if component_name not in files:
+                sources = self._files_by_component.get(component_name, {})
+                sources.pop(source_name, None)
+                if not sources:
+                    self._files_by_component.pop(component_name, None)
+        for component_name, file_info in files.items():
+            self._files_by_component.setdefault(component_name, {})[source_name] = file_info
+
+    def components(self) -> list[str]:
+        """
+        Returns the sorted names of all components with documentation in at least one source.
+        """
+        with self._lock:
+            return sorted(self._files_by_component)
+
+    def sources_for(self, component_name: str) -> dict[str, dict]:
+        """
+        Returns {source name: {"path", "size", "mtime"}} for a component, sorted by source name.
+        """
+        with self._lock:
+            sources = self._files_by_component.get(component_name, {})
+            return {source_name: sources[source_name] for source_name in sorted(sources)}
+
+
+def read_component_docs(component_name: str, index: Optional[DocIndex] = None) -> dict[str, str]:
     """
     Scans the data/ directory for component documentation files.
 
     Args:
         component_name: The name of the component (e.g., "component1").
+        index: An optional DocIndex of the data directory. When given, only the files
+               it lists are opened instead of probing every source directory.
 
     Returns:
         A dictionary where keys are source names (e.g., "source1")
         and values are the content of the respective documentation file.
     """
+    if index is not None:
+        component_docs = {}
+        for source_name, file_info in index.sources_for(component_name).items():
+            try:
+                with open(file_info["path"], 'r') as f:
+                    component_docs[source_name] = f.read()
+            except FileNotFoundError:
+                # The file was removed after the index was refreshed.
+                pass
+        return component_docs
+
     data_dir = "data"
     component_docs = {}
 
@@ -30,3 +153,28 @@ def read_component_docs(component_name: str) -> dict[str, str]:
                 # If the component file doesn't exist in this source, skip it.
                 pass
     return component_docs
+
+
+def is_valid_component_name(component_name) -> bool:
+    """
+    Returns whether component_name can name a component file: a non-empty string
+    without path separators or "..", so that data/<source>/<name>.txt and the output
+    files named after it stay inside their directories.
+    """
+    if not isinstance(component_name, str) or not component_name or "\0" in component_name or ".." in component_name:
+        return False
+    # Both separators are rejected on every platform, so a name means the same file everywhere.
+    return "/" not in component_name and "\\" not in component_name
+
+
+def list_components(index: Optional[DocIndex] = None) -> list[str]:
+    """
+    Lists every component that has documentation in at least one source under data/.
+
+    Args:
+        index: An optional existing DocIndex to list from instead of scanning data/.
+
+    Returns:
+        Sorted component names (file names without the .txt extension).
+    """
+    return (index or DocIndex()).components()
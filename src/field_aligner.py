@@ -1,83 +1,192 @@
 import json
-from crewai import Agent, Task, Crew
+from typing import Optional
+from src.crew_runner import LazyCrewTask, run_crew_task
+from src.prompt_codec import decode_alignment, encode_extracted_fields
+from src.field_matcher import DEFAULT_AMBIGUITY_MARGIN, DEFAULT_MATCH_THRESHOLD, FieldNameIndex
+from src.logging_setup import get_logger
 from src.utils import OutputMarkers
 
-# Define the CrewAI Agent
-field_normalizer_agent = Agent(
+logger = get_logger("field_aligner")
+
+# Configuration of the CrewAI Agent
+FIELD_NORMALIZER_AGENT_CONFIG = dict(
     role="Field Normalization Specialist",
     goal="To take lists of extracted fields from multiple documentation sources for the same component, identify all unique field names across these sources, and create a unified structure. For each unique field, indicate its value, last updated date, and required status from each source, or mark it as not existing in a particular source.",
     backstory="An meticulous AI assistant that excels at comparing structured data from different origins. It can create a comprehensive map of all fields, noting where each piece of information comes from and where information is missing.",
-    allow_delegation=False,
-    verbose=True
+    allow_delegation=False
 )
 
-# Define the CrewAI Task
-align_fields_task = Task(
-    description="""You will be given a Python dictionary named 'extracted_data_by_source' through the input variable `{inputs[extracted_data_by_source]}`.
-This dictionary's keys are source names (e.g., "source1", "source2"), and its values are lists of field dictionaries. Each field dictionary has "fieldName", "fieldValue", "isRequired", and "lastUpdated".
+# Configuration of the CrewAI Task
+ALIGN_FIELDS_TASK_CONFIG = dict(
+    description="""You will be given the fields extracted from several documentation sources for the same component as compact JSON through the input variable `{inputs[extracted_data_by_source]}`:
+{"sources": [source names], "rows": [[sourceId, fieldName, fieldValue], ...]}
+sourceId is a position in "sources" and the rowId of a row is its position in "rows" (both starting at 0).
 
 Your goal is to:
-1. Collect all unique field names from all sources.
-2. For each unique field name, create an entry in a result dictionary.
-3. For each source, check if this unique field exists in that source's list of extracted fields.
-   - If it exists, the value for that source under the unique field should be a dictionary:
-     `{ "originalValue": "...", "lastUpdated": "...", "isRequired": true/false }`.
-   - If it does not exist in a source, the value for that source under the unique field should be the string "ENUM.NO_FIELD".
-
-Example input for `{inputs[extracted_data_by_source]}`:
-{
-    "source1": [
-        {"fieldName": "Title", "fieldValue": "Component One", "isRequired": True, "lastUpdated": "2023-10-01"},
-        {"fieldName": "Version", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"}
-    ],
-    "source2": [
-        {"fieldName": "Title", "fieldValue": "Component 1", "isRequired": True, "lastUpdated": "2023-10-02"},
-        {"fieldName": "Author", "fieldValue": "SourceTwo", "isRequired": False, "lastUpdated": "2023-10-02"}
-    ]
-}
-
-Example JSON string output for this input:
-"{
-    \"Title\": {
-        \"source1\": { \"originalValue\": \"Component One\", \"lastUpdated\": \"2023-10-01\", \"isRequired\": true },
-        \"source2\": { \"originalValue\": \"Component 1\", \"lastUpdated\": \"2023-10-02\", \"isRequired\": true }
-    },
-    \"Version\": {
-        \"source1\": { \"originalValue\": \"1.0\", \"lastUpdated\": \"2023-10-01\", \"isRequired\": false },
-        \"source2\": \"ENUM.NO_FIELD\"
-    },
-    \"Author\": {
-        \"source1\": \"ENUM.NO_FIELD\",
-        \"source2\": { \"originalValue\": \"SourceTwo\", \"lastUpdated\": \"2023-10-02\", \"isRequired\": false }
-    }
-}"
+1. Group the rows that describe the same field, even when the field name is spelled differently in different sources (e.g., "Last Updated", "last_updated" and "LastUpdated").
+2. Put at most one row of each source in a group, and every row in exactly one group.
+3. Name each group with the clearest of its field names.
+
+Return STRICTLY a JSON object mapping each group name to the list of its rowIds.
 
-Return this result STRICTLY as a JSON string.
+Example input:
+{"sources": ["source1", "source2"], "rows": [[0, "Title", "Component One"], [0, "Version", "1.0"], [1, "title", "Component 1"], [1, "Author", "SourceTwo"]]}
+
+Example JSON string output:
+{"Title": [0, 2], "Version": [1], "Author": [3]}
 """,
-    expected_output="A valid JSON string representing a dictionary. Keys are unique field names. Values are dictionaries where keys are source names, and values are either a dictionary `{'originalValue': ..., 'lastUpdated': ..., 'isRequired': ...}` or the string 'ENUM.NO_FIELD'.",
-    agent=field_normalizer_agent
+    expected_output="A valid JSON string representing a dictionary. Keys are field names and values are lists of rowIds of the rows that describe that field."
 )
 
-def align_and_normalize_fields(extracted_data_by_source: dict[str, list[dict]]) -> dict:
+# The Agent and Task are only built, and crewai only imported, when the LLM is first needed.
+align_fields_crew = LazyCrewTask("align", FIELD_NORMALIZER_AGENT_CONFIG, ALIGN_FIELDS_TASK_CONFIG)
+
+
+def __getattr__(name):
+    # Keeps `field_normalizer_agent` and `align_fields_task` importable as module attributes.
+    if name == "field_normalizer_agent":
+        return align_fields_crew.agent
+    if name == "align_fields_task":
+        return align_fields_crew.task
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def align_fields_locally(extracted_data_by_source: dict[str, list[dict]]) -> dict:
+    """
+    Aligns fields from multiple sources with an exact field-name join, without an LLM.
+
+    The field-name index is built in a single pass over all sources. Fields keep the
+    order in which they are first seen and every row lists the sources in input order,
+    with OutputMarkers.NO_FIELD for sources that lack the field. If a source lists the
+    same field twice, its first occurrence is used.
+
+    Args:
+        extracted_data_by_source: A dictionary where keys are source names
+                                  and values are lists of extracted field dictionaries.
+
+    Returns:
+        A dictionary with the same schema as align_and_normalize_fields.
+    """
+    field_index: dict[str, dict[str, dict]] = {}
+    for source_name, fields in extracted_data_by_source.items():
+        for field in fields:
+            field_name = field.get("fieldName")
+            if field_name is None:
+                continue
+            entries = field_index.setdefault(field_name, {})
+            if source_name not in entries:
+                entries[source_name] = {
+                    "originalValue": field.get("fieldValue"),
+                    "lastUpdated": field.get("lastUpdated"),
+                    "isRequired": field.get("isRequired"),
+                }
+
+    no_field = str(OutputMarkers.NO_FIELD)
+    source_names = list(extracted_data_by_source.keys())
+    return {
+        field_name: {source_name: entries.get(source_name, no_field) for source_name in source_names}
+        for field_name, entries in field_index.items()
+    }
+
+
+def align_fields_fuzzy(extracted_data_by_source: dict[str, list[dict]],
+                       match_threshold: float = DEFAULT_MATCH_THRESHOLD,
+                       ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN,
+                       synonyms: Optional[dict[str, str]] = None) -> dict:
+    """
+    Aligns fields whose names are spelled differently across sources.
+
+    Field names are clustered locally with a FieldNameIndex (normalization, synonym
+    table and character n-gram similarity). Clear clusters are joined locally under
+    the first name seen for the cluster. Only fields in clusters that stay ambiguous
+    are sent to the CrewAI agent, and its rows are added after the local ones. An
+    agent group named like a local field is merged into it (see _merge_aligned_field).
+
+    Args:
+        extracted_data_by_source: A dictionary where keys are source names
+                                  and values are lists of extracted field dictionaries.
+        match_threshold: Minimum n-gram similarity for two names to be treated as the same field.
+        ambiguity_margin: Width of the similarity band below match_threshold sent to the agent.
+        synonyms: Normalized variant -> normalized canonical name table (see field_matcher.load_synonyms).
+
+    Returns:
+        A dictionary with the same schema as align_and_normalize_fields.
+    """
+    index = FieldNameIndex(match_threshold, ambiguity_margin, synonyms)
+    for fields in extracted_data_by_source.values():
+        for field in fields:
+            if field.get("fieldName") is not None:
+                index.add(field["fieldName"])
+
+    local_data = {source_name: [] for source_name in extracted_data_by_source}
+    ambiguous_data = {source_name: [] for source_name in extracted_data_by_source}
+    for source_name, fields in extracted_data_by_source.items():
+        for field in fields:
+            if field.get("fieldName") is None:
+                continue
+            cluster_id = index.cluster_of(field["fieldName"])
+            if cluster_id in index.ambiguous_clusters:
+                ambiguous_data[source_name].append(field)
+            else:
+                local_data[source_name].append({**field, "fieldName": index.cluster_names[cluster_id]})
+
+    aligned_data = align_fields_locally(local_data)
+    if any(ambiguous_data.values()):
+        result_json_str = run_crew_task(align_fields_crew, {'extracted_data_by_source': encode_extracted_fields(ambiguous_data)})
+        for field_name, entries in decode_alignment(json.loads(result_json_str), ambiguous_data).items():
+            if field_name in aligned_data:
+                _merge_aligned_field(field_name, aligned_data[field_name], entries)
+            else:
+                aligned_data[field_name] = entries
+    return aligned_data
+
+
+def _merge_aligned_field(field_name: str, entries: dict, agent_entries: dict) -> None:
     """
-    Aligns and normalizes field data from multiple sources using a CrewAI agent.
+    Merges the sources of an agent group into the local field of the same name. The
+    local entry of a source wins; agent entries it shadows are logged as dropped.
+    """
+    no_field = str(OutputMarkers.NO_FIELD)
+    dropped = []
+    for source_name, entry in agent_entries.items():
+        if entry == no_field:
+            continue
+        if entries.get(source_name, no_field) == no_field:
+            entries[source_name] = entry
+        else:
+            dropped.append(source_name)
+    if dropped:
+        logger.warning("The agent grouped fields of %s under '%s', which these sources already have; "
+                       "their local '%s' rows were kept.", ", ".join(dropped), field_name, field_name)
+
+
+def align_and_normalize_fields(extracted_data_by_source: dict[str, list[dict]], use_llm: bool = False,
+                               fuzzy: bool = False, match_threshold: float = DEFAULT_MATCH_THRESHOLD,
+                               synonyms: Optional[dict[str, str]] = None) -> dict:
+    """
+    Aligns and normalizes field data from multiple sources.
+
+    By default fields are joined locally on their exact names (see align_fields_locally).
+    Set fuzzy to also merge differently spelled names locally (see align_fields_fuzzy),
+    or use_llm to have the CrewAI agent align everything.
 
     Args:
         extracted_data_by_source: A dictionary where keys are source names
                                   and values are lists of extracted field dictionaries.
+        use_llm: Whether to align with the CrewAI agent instead of locally.
+        fuzzy: Whether to cluster similar field names before joining.
+        match_threshold: Similarity threshold used when fuzzy is set.
+        synonyms: Synonym table used when fuzzy is set.
 
     Returns:
         A dictionary representing the aligned and normalized field data.
     """
-    crew = Crew(
-        agents=[field_normalizer_agent],
-        tasks=[align_fields_task],
-        verbose=True 
-    )
-    result_json_str = crew.kickoff(inputs={'extracted_data_by_source': extracted_data_by_source})
+    if fuzzy and not use_llm:
+        return align_fields_fuzzy(extracted_data_by_source, match_threshold, synonyms=synonyms)
+    if not use_llm:
+        return align_fields_locally(extracted_data_by_source)
 
-    if not isinstance(result_json_str, str):
-        raise TypeError(f"Crew.kickoff() returned type {type(result_json_str)} instead of str. Content: {result_json_str}")
+    result_json_str = run_crew_task(align_fields_crew, {'extracted_data_by_source': encode_extracted_fields(extracted_data_by_source)})
 
-    aligned_data = json.loads(result_json_str)
+    aligned_data = decode_alignment(json.loads(result_json_str), extracted_data_by_source)
     return aligned_data
@@ -1,94 +1,556 @@
 import json
-from crewai import Agent, Task, Crew
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+from src.crew_runner import LazyCrewTask, estimate_tokens, run_crew_task
+from src.logging_setup import get_logger
+from src.metrics import count, propagate
+from src.prompt_codec import decode_evaluations, encode_aligned_fields
 from src.utils import OutputMarkers
 
-# Define the CrewAI Agent
-field_evaluator_agent = Agent(
+if TYPE_CHECKING:
+    from src.field_matrix import FieldMatrix
+
+# Configuration of the CrewAI Agent
+FIELD_EVALUATOR_AGENT_CONFIG = dict(
     role="Field Comparison and Truth Analyst",
     goal="To analyze field data from multiple sources, identify discrepancies, assess the confidence of each piece of information, and determine the most likely 'true' value for each field, providing a rationale for the decision.",
     backstory="A highly analytical AI with a knack for sifting through conflicting information. It uses heuristics like 'last updated date', presence of keywords indicating verification, and general coherence to judge the reliability of data and select the best available version of each field.",
-    allow_delegation=False,
-    verbose=True
+    allow_delegation=False
 )
 
-# Define the CrewAI Task
-compare_fields_task = Task(
-    description="""You will be given a Python dictionary named 'aligned_field_data' through the input variable `{inputs[aligned_field_data]}`.
-This dictionary's keys are field names. The values are dictionaries where keys are source names (e.g., "source1") and values are either a dictionary `{'originalValue': ..., 'lastUpdated': ..., 'isRequired': ...}` or the string "ENUM.NO_FIELD".
-
-Your goal is to process each field one by one and produce a comparison analysis. For each field:
-1.  Analyze and compare the `originalValue`, `lastUpdated`, and `isRequired` status from all sources where the field is present.
-2.  For each source entry for a field (including "ENUM.NO_FIELD" entries):
-    *   Determine a `confidence` score (0.0 to 1.0) for the information from that source for that field. Consider `lastUpdated` (more recent might be better), `isRequired` (sometimes required fields are more scrutinized), and the `originalValue` itself (e.g., if it looks incomplete or placeholder). For "ENUM.NO_FIELD", the confidence might be lower, representing confidence that the field is indeed missing.
-    *   The output `value` for this source should be its `originalValue` if present, or "ENUM.NO_FIELD" if not.
-    *   The `modified` flag should be `false` at this stage (it's more for a later human review step, but we include it for schema consistency).
-3.  Select a `truthSource`: the source name that provides the most reliable information for this field. If all sources are "ENUM.NO_FIELD", the `truthSource` can be null or a special marker like "NO_TRUTH_SOURCE_FOUND".
-4.  Provide an `explanation`: a brief rationale for choosing the `truthSource`. This should mention factors like update recency, completeness, or other heuristics.
-5.  Provide an `confidenceOverall` score (0.0 to 1.0) for the chosen `truthSource`'s value for this field.
-
-The output structure for each field in the input `aligned_field_data` should be:
-{
-    "fieldName": { // This is the key in the output dictionary
-        "diff": {
-            "sourceName1": { "modified": false, "value": "...", "originalValue": "...", "lastUpdated": "...", "isRequired": true/false, "confidence": 0.0-1.0 },
-            "sourceName2": { "modified": false, "value": "ENUM.NO_FIELD", "confidence": 0.0-1.0 }
-            // ... and so on for all sources
-        },
-        "truthSource": "sourceName1", // or null / "NO_TRUTH_SOURCE_FOUND"
-        "explanation": "Rationale here...",
-        "confidenceOverall": 0.0-1.0
-    }
-}
-
-Example input for `{inputs[aligned_field_data]}` (for a single field "Title"):
-{
-    "Title": {
-        "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": true },
-        "source2": { "originalValue": "Component 1", "lastUpdated": "2023-10-02", "isRequired": true },
-        "source3": "ENUM.NO_FIELD"
-    }
-}
-
-Example JSON string output for this single field "Title":
-"{
-    \"Title\": {
-        \"diff\": {
-            \"source1\": { \"modified\": false, \"value\": \"Component One\", \"originalValue\": \"Component One\", \"lastUpdated\": \"2023-10-01\", \"isRequired\": true, \"confidence\": 0.8 },
-            \"source2\": { \"modified\": false, \"value\": \"Component 1\", \"originalValue\": \"Component 1\", \"lastUpdated\": \"2023-10-02\", \"isRequired\": true, \"confidence\": 0.9 },
-            \"source3\": { \"modified\": false, \"value\": \"ENUM.NO_FIELD\", \"confidence\": 0.5 }
-        },
-        \"truthSource\": \"source2\",
-        \"explanation\": \"Source2 has a slightly more recent lastUpdated date for a similar value.\",
-        \"confidenceOverall\": 0.9
-    }
-}"
-
-Return the result for all processed fields STRICTLY as a JSON string, which is a dictionary where keys are field names.
+# Configuration of the CrewAI Task
+COMPARE_FIELDS_TASK_CONFIG = dict(
+    description="""You will be given field data from several documentation sources for the same component as compact JSON through the input variable `{inputs[aligned_field_data]}`:
+{"sources": [source names], "fields": [field names], "rows": [[fieldId, sourceId, value, lastUpdated, isRequired], ...]}
+fieldId and sourceId are positions in "fields" and "sources" (starting at 0), and isRequired is 1 or 0. A source without a row for a field does not provide that field.
+
+For each field:
+1.  Compare the value, lastUpdated date and isRequired flag of every source that provides it.
+2.  Give every source, including those that do not provide the field, a confidence score (0.0 to 1.0) for its information. Consider lastUpdated (more recent might be better), isRequired (sometimes required fields are more scrutinized) and the value itself (e.g., if it looks incomplete or like a placeholder). For a source without the field, the confidence represents confidence that the field is indeed missing.
+3.  Select the truth source: the sourceId that provides the most reliable information for this field, or null if no source provides it.
+4.  Provide a brief explanation for the choice, mentioning factors like update recency, completeness or agreement between sources.
+5.  Provide an overall confidence score (0.0 to 1.0) for the chosen source's value.
+
+Return STRICTLY a JSON object whose keys are the fieldIds (as strings) and whose values are
+{"t": truth sourceId or null, "c": overall confidence, "e": "explanation", "s": [confidence of source 0, confidence of source 1, ...]}
+with one confidence in "s" per entry of "sources".
+
+Example input:
+{"sources": ["source1", "source2", "source3"], "fields": ["Title"], "rows": [[0, 0, "Component One", "2023-10-01", 1], [0, 1, "Component 1", "2023-10-02", 1]]}
+
+Example JSON string output:
+{"0": {"t": 1, "c": 0.9, "e": "source2 has a slightly more recent lastUpdated date for a similar value.", "s": [0.8, 0.9, 0.5]}}
 """,
-    expected_output="A valid JSON string. This string represents a dictionary where keys are field names. Each value is another dictionary containing 'diff' (detailing each source's data, confidence, and modified status), 'truthSource', 'explanation', and 'confidenceOverall'.",
-    agent=field_evaluator_agent
+    expected_output="A valid JSON string representing a dictionary keyed by fieldId. Each value is a dictionary with 't' (the truth sourceId or null), 'c' (overall confidence), 'e' (explanation) and 's' (one confidence per source, in the order of 'sources')."
 )
 
-def compare_and_evaluate_fields(aligned_field_data: dict) -> dict:
+# The Agent and Task are only built, and crewai only imported, when the LLM is first needed.
+compare_fields_crew = LazyCrewTask("compare", FIELD_EVALUATOR_AGENT_CONFIG, COMPARE_FIELDS_TASK_CONFIG)
+
+
+def __getattr__(name):
+    # Keeps `field_evaluator_agent` and `compare_fields_task` importable as module attributes.
+    if name == "field_evaluator_agent":
+        return compare_fields_crew.agent
+    if name == "compare_fields_task":
+        return compare_fields_crew.task
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+logger = get_logger("field_comparer")
+
+NO_TRUTH_SOURCE = "NO_TRUTH_SOURCE_FOUND"
+DEFAULT_SHARD_TOKEN_BUDGET = 6000
+DEFAULT_SHARD_WORKERS = 4
+DEFAULT_SHARD_RETRIES = 2
+DEFAULT_ESCALATION_MARGIN = 0.05
+MISSING_FIELD_CONFIDENCE = 0.5
+PLACEHOLDER_VALUES = {"", "tbd", "todo", "n/a", "na", "none", "null", "unknown", "-", "?", "..."}
+
+# Weights of the local scoring heuristics. A present value starts at BASE_SCORE and can
+# earn up to 1.0 from recency, completeness and agreement with other sources.
+BASE_SCORE = 0.5
+RECENCY_WEIGHT = 0.3
+COMPLETENESS_WEIGHT = 0.1
+AGREEMENT_WEIGHT = 0.1
+# Overall confidence of a field whose chosen value no other source shares. Recency and
+# completeness alone reach 0.9, the default review threshold of report_generator, so
+# without the cap an uncorroborated pick among conflicting values would not be flagged.
+UNCORROBORATED_CONFIDENCE_CAP = 0.85
+
+
+def _date_ordinal(last_updated) -> Optional[int]:
+    try:
+        return date.fromisoformat(str(last_updated)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _is_complete(value) -> bool:
+    return value is not None and str(value).strip().casefold() not in PLACEHOLDER_VALUES
+
+
+# The scoring rules below are shared by score_fields_locally (dicts) and score_matrix (columns).
+
+def _recency(ordinal: Optional[int], low: Optional[int], high: Optional[int]) -> float:
+    if not ordinal:
+        return 0.0
+    if high == low:
+        return 1.0
+    return (ordinal - low) / (high - low)
+
+
+def _source_score(recency: float, complete: bool, agreement: float) -> float:
+    return round(BASE_SCORE + RECENCY_WEIGHT * recency + COMPLETENESS_WEIGHT * complete + AGREEMENT_WEIGHT * agreement, 3)
+
+
+def _resolve_field(best_source: str, best_score: float, rival_scores: list[float], agreeing: int, present: int,
+                   newest_last_updated: Optional[str], sole_newest: bool, required_conflict: bool, complete: bool,
+                   escalation_margin: float) -> tuple[bool, float, str]:
     """
-    Compares and evaluates field data from multiple sources using a CrewAI agent.
+    Decides whether a scored field is contested, and returns that with its overall
+    confidence and explanation.
+
+    Args:
+        best_source: The source of the best scored cell.
+        best_score: Its score.
+        rival_scores: The scores of the cells whose value differs from the best cell's.
+        agreeing: The number of present cells sharing the best cell's value, itself included.
+        present: The number of present cells.
+        newest_last_updated: The best cell's lastUpdated if it is the most recent of
+                             differing dates, else None.
+        sole_newest: Whether the best cell is dated later than every other present cell.
+        required_conflict: Whether another present cell marks the field required and
+                           the best cell does not.
+        complete: Whether the best cell's value is complete.
+        escalation_margin: See score_fields_locally.
+    """
+    uncorroborated = present > 1 and agreeing == 1
+    # An uncorroborated pick is only escalated when recency or the required flags do not back it either.
+    contested = ((uncorroborated and (not sole_newest or required_conflict))
+                 or any(best_score - score <= escalation_margin for score in rival_scores))
+
+    reasons = []
+    if newest_last_updated is not None:
+        reasons.append(f"most recent lastUpdated ({newest_last_updated})")
+    if present == 1:
+        reasons.append("only source providing this field")
+    else:
+        reasons.append(f"value shared by {agreeing} of {present} sources")
+    if not complete:
+        reasons.append("value looks incomplete")
+
+    confidence_overall = min(best_score, UNCORROBORATED_CONFIDENCE_CAP) if uncorroborated else best_score
+    return contested, confidence_overall, f"{best_source} selected by local scoring: {', '.join(reasons)}."
+
+
+def score_fields_locally(aligned_field_data: dict, escalation_margin: float = DEFAULT_ESCALATION_MARGIN) -> tuple[dict, list[str]]:
+    """
+    Scores every source of every field with local heuristics, without an LLM.
+
+    All present cells are first flattened into parallel columns (field, source, value,
+    date ordinal, completeness). Per-field date ranges and value counts are computed
+    in one pass over those columns and the scores in a second one. Each present
+    value scores BASE_SCORE plus weighted recency (relative to the other sources of
+    the field), completeness (not empty or a placeholder) and agreement (share of
+    other sources with the same value). Missing cells score MISSING_FIELD_CONFIDENCE.
+
+    When several sources provide a field and none of the others shares the chosen
+    value, its overall confidence is capped at UNCORROBORATED_CONFIDENCE_CAP, so the
+    pick is flagged for review. Such a field is also contested unless the chosen value
+    is dated later than all others and no other source marks the field required while
+    the chosen one does not.
 
     Args:
         aligned_field_data: A dictionary representing the aligned field data,
                             where keys are field names.
+        escalation_margin: A field is contested when a source with a different value
+                           scores within this margin of the best source.
+
+    Returns:
+        A tuple of (evaluated data, contested field names). The evaluated data uses the
+        same schema as compare_and_evaluate_fields and covers every field; contested
+        fields should be re-evaluated by the LLM.
+    """
+    no_field = str(OutputMarkers.NO_FIELD)
+    field_names = list(aligned_field_data.keys())
+
+    # Columns of present cells.
+    cell_field, cell_source, cell_entry, cell_value, cell_ordinal, cell_complete = [], [], [], [], [], []
+    for field_idx, field_name in enumerate(field_names):
+        for source_name, entry in aligned_field_data[field_name].items():
+            if not isinstance(entry, dict):
+                continue
+            cell_field.append(field_idx)
+            cell_source.append(source_name)
+            cell_entry.append(entry)
+            cell_value.append(entry.get("originalValue"))
+            cell_ordinal.append(_date_ordinal(entry.get("lastUpdated")))
+            cell_complete.append(_is_complete(entry.get("originalValue")))
+
+    # Per-field aggregates.
+    min_ordinal = [None] * len(field_names)
+    max_ordinal = [None] * len(field_names)
+    present_count = [0] * len(field_names)
+    value_counts = [{} for _ in field_names]
+    for field_idx, value, ordinal in zip(cell_field, cell_value, cell_ordinal):
+        present_count[field_idx] += 1
+        value_key = str(value)
+        value_counts[field_idx][value_key] = value_counts[field_idx].get(value_key, 0) + 1
+        if ordinal is not None:
+            if min_ordinal[field_idx] is None or ordinal < min_ordinal[field_idx]:
+                min_ordinal[field_idx] = ordinal
+            if max_ordinal[field_idx] is None or ordinal > max_ordinal[field_idx]:
+                max_ordinal[field_idx] = ordinal
+
+    # Per-cell scores.
+    cell_score = []
+    for field_idx, value, ordinal, complete in zip(cell_field, cell_value, cell_ordinal, cell_complete):
+        others = present_count[field_idx] - 1
+        agreement = (value_counts[field_idx][str(value)] - 1) / others if others else 0.0
+        cell_score.append(_source_score(_recency(ordinal, min_ordinal[field_idx], max_ordinal[field_idx]),
+                                        complete, agreement))
+
+    # Assemble the output schema and pick the truth source per field.
+    cells_by_field = [[] for _ in field_names]
+    for cell_idx, field_idx in enumerate(cell_field):
+        cells_by_field[field_idx].append(cell_idx)
+
+    evaluated_data = {}
+    contested_fields = []
+    for field_idx, field_name in enumerate(field_names):
+        cell_by_source = {cell_source[cell_idx]: cell_idx for cell_idx in cells_by_field[field_idx]}
+        diff = {}
+        for source_name in aligned_field_data[field_name]:
+            cell_idx = cell_by_source.get(source_name)
+            if cell_idx is None:
+                diff[source_name] = {"modified": False, "value": no_field, "confidence": MISSING_FIELD_CONFIDENCE}
+                continue
+            entry = cell_entry[cell_idx]
+            diff[source_name] = {
+                "modified": False,
+                "value": entry.get("originalValue"),
+                "originalValue": entry.get("originalValue"),
+                "lastUpdated": entry.get("lastUpdated"),
+                "isRequired": entry.get("isRequired"),
+                "confidence": cell_score[cell_idx],
+            }
+
+        if not cells_by_field[field_idx]:
+            evaluated_data[field_name] = {
+                "diff": diff,
+                "truthSource": NO_TRUTH_SOURCE,
+                "explanation": "No source provides this field.",
+                "confidenceOverall": 0.0,
+            }
+            continue
+
+        # max() keeps the first of equally scored cells, i.e. source order breaks ties.
+        best_idx = max(cells_by_field[field_idx], key=lambda cell_idx: cell_score[cell_idx])
+        best_value = str(cell_value[best_idx])
+        low, high = min_ordinal[field_idx], max_ordinal[field_idx]
+        contested, confidence_overall, explanation = _resolve_field(
+            cell_source[best_idx], cell_score[best_idx],
+            [cell_score[cell_idx] for cell_idx in cells_by_field[field_idx] if str(cell_value[cell_idx]) != best_value],
+            value_counts[field_idx][best_value], present_count[field_idx],
+            cell_entry[best_idx].get("lastUpdated") if low != high and cell_ordinal[best_idx] == high else None,
+            cell_ordinal[best_idx] is not None
+            and all(cell_idx == best_idx or (cell_ordinal[cell_idx] or 0) < cell_ordinal[best_idx]
+                    for cell_idx in cells_by_field[field_idx]),
+            cell_entry[best_idx].get("isRequired") is not True
+            and any(cell_entry[cell_idx].get("isRequired") is True for cell_idx in cells_by_field[field_idx]),
+            cell_complete[best_idx], escalation_margin,
+        )
+        if contested:
+            contested_fields.append(field_name)
+        evaluated_data[field_name] = {
+            "diff": diff,
+            "truthSource": cell_source[best_idx],
+            "explanation": explanation,
+            "confidenceOverall": confidence_overall,
+        }
+
+    return evaluated_data, contested_fields
+
+
+def _normalize_value(value) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+def score_matrix(matrix: "FieldMatrix", escalation_margin: float = DEFAULT_ESCALATION_MARGIN) -> list[int]:
+    """
+    Scores every cell of a FieldMatrix with the local heuristics of score_fields_locally,
+    filling its confidences, truth_ids, confidence_overall and explanations columns.
+    matrix.to_evaluated_dict(NO_TRUTH_SOURCE) then equals the evaluated data of
+    score_fields_locally on the same aligned data, as long as its fields list their
+    sources in the same order (ties go to the first source in matrix.source_names).
+
+    Recency is read from the ordinals column. Completeness and the agreement key
+    (str(value)) are computed once per distinct value rather than once per cell.
+
+    Returns:
+        The ids of the contested fields.
+    """
+    field_count, width = len(matrix.field_names), matrix.width
+    value_ids, ordinals, required, confidences = matrix.value_ids, matrix.ordinals, matrix.required, matrix.confidences
+    value_complete = [_is_complete(value) for value in matrix.values]
+    agreement_keys = {}
+    agreement_ids = [agreement_keys.setdefault(str(value), len(agreement_keys)) for value in matrix.values]
+    truth_ids = array("l", [-1]) * field_count
+    confidence_overall = array("d", [0.0]) * field_count
+    explanations = ["No source provides this field."] * field_count
+
+    contested = []
+    for field_id in range(field_count):
+        for cell in matrix.listed_cells(field_id):
+            confidences[cell] = MISSING_FIELD_CONFIDENCE
+        cells = matrix.present_cells(field_id)
+        if not cells:
+            continue
+
+        cell_agreement = [agreement_ids[value_ids[cell]] for cell in cells]
+        dated = [ordinals[cell] for cell in cells if ordinals[cell]]
+        low, high = (min(dated), max(dated)) if dated else (0, 0)
+        agreement_counts = {}
+        for agreement_id in cell_agreement:
+            agreement_counts[agreement_id] = agreement_counts.get(agreement_id, 0) + 1
+        others = len(cells) - 1
+
+        best = None
+        for position, cell in enumerate(cells):
+            agreement = (agreement_counts[cell_agreement[position]] - 1) / others if others else 0.0
+            score = confidences[cell] = _source_score(_recency(ordinals[cell], low, high),
+                                                      value_complete[value_ids[cell]], agreement)
+            # Strictly greater keeps the first of equally scored cells, i.e. source order breaks ties.
+            if best is None or score > confidences[cells[best]]:
+                best = position
+
+        best_cell, best_agreement_id = cells[best], cell_agreement[best]
+        is_contested, confidence_overall[field_id], explanations[field_id] = _resolve_field(
+            matrix.source_names[best_cell % width], confidences[best_cell],
+            [confidences[cell] for cell, agreement_id in zip(cells, cell_agreement) if agreement_id != best_agreement_id],
+            agreement_counts[best_agreement_id], len(cells),
+            matrix.last_updated(best_cell) if low != high and ordinals[best_cell] == high else None,
+            ordinals[best_cell] > 0 and all(cell == best_cell or ordinals[cell] < ordinals[best_cell] for cell in cells),
+            required[best_cell] != 1 and any(required[cell] == 1 for cell in cells),
+            value_complete[value_ids[best_cell]], escalation_margin,
+        )
+        truth_ids[field_id] = best_cell % width
+        if is_contested:
+            contested.append(field_id)
+
+    matrix.truth_ids, matrix.confidence_overall, matrix.explanations = truth_ids, confidence_overall, explanations
+    return contested
+
+
+def _equality_ids(values: list, key=None) -> list[int]:
+    # Values that compare equal share an id, as in a set (1 and True do too).
+    ids = {}
+    return [ids.setdefault(value if key is None else key(value), len(ids)) for value in values]
+
+
+def unanimous_field_ids(matrix: "FieldMatrix", normalize_values: bool = False) -> list[int]:
+    """
+    Returns the ids of the fields of matrix that every listed source provides with the
+    same value, isRequired and lastUpdated (see split_unanimous_fields).
+    """
+    value_ids = _equality_ids(matrix.values, _normalize_value if normalize_values else None)
+    date_ids = _equality_ids(matrix.dates)
+
+    unanimous = []
+    for field_id in range(len(matrix.field_names)):
+        cells = matrix.listed_cells(field_id)
+        if not cells or len(matrix.present_cells(field_id)) != len(cells):
+            continue
+        first = cells[0]
+        value_id, date_id, is_required = (value_ids[matrix.value_ids[first]], date_ids[matrix.date_ids[first]],
+                                          matrix.is_required(first))
+        if all(value_ids[matrix.value_ids[cell]] == value_id and date_ids[matrix.date_ids[cell]] == date_id
+               and matrix.is_required(cell) == is_required for cell in cells):
+            unanimous.append(field_id)
+    return unanimous
+
+
+def split_unanimous_fields(aligned_field_data: dict, normalize_values: bool = False) -> tuple[dict, dict, dict]:
+    """
+    Settles fields on which every source agrees, before the comparison stage.
+
+    A field is unanimous when it is present in every source with the same
+    originalValue, isRequired and lastUpdated. Unanimous fields are resolved locally
+    with full confidence and the first source as truth source.
+
+    Args:
+        aligned_field_data: A dictionary representing the aligned field data,
+                            where keys are field names.
+        normalize_values: Whether to compare values after collapsing whitespace and casefolding.
+
+    Returns:
+        A tuple of (evaluated unanimous fields, aligned data of the contested fields,
+        counters {"unanimous": ..., "contested": ...}).
+    """
+    resolved_data = {}
+    contested_data = {}
+    for field_name, entries in aligned_field_data.items():
+        signatures = set()
+        for entry in entries.values():
+            if not isinstance(entry, dict):
+                signatures = None
+                break
+            value = entry.get("originalValue")
+            signatures.add((
+                _normalize_value(value) if normalize_values else value,
+                entry.get("isRequired"),
+                entry.get("lastUpdated"),
+            ))
+            if len(signatures) > 1:
+                break
+
+        if not signatures or len(signatures) != 1:
+            contested_data[field_name] = entries
+            continue
+
+        diff = {
+            source_name: {
+                "modified": False,
+                "value": entry.get("originalValue"),
+                "originalValue": entry.get("originalValue"),
+                "lastUpdated": entry.get("lastUpdated"),
+                "isRequired": entry.get("isRequired"),
+                "confidence": 1.0,
+            }
+            for source_name, entry in entries.items()
+        }
+        truth_source = next(iter(entries))
+        resolved_data[field_name] = {
+            "diff": diff,
+            "truthSource": truth_source,
+            "explanation": f"All {len(entries)} sources agree on value, required status and last updated date.",
+            "confidenceOverall": 1.0,
+        }
+
+    counts = {"unanimous": len(resolved_data), "contested": len(contested_data)}
+    return resolved_data, contested_data, counts
+
+
+def shard_aligned_fields(aligned_field_data: dict, token_budget: int = DEFAULT_SHARD_TOKEN_BUDGET) -> list[dict]:
+    """
+    Splits aligned field data into shards whose estimated token count stays within token_budget.
+
+    Fields keep their order. A single field larger than the budget gets a shard of its own.
+
+    Args:
+        aligned_field_data: A dictionary representing the aligned field data,
+                            where keys are field names.
+        token_budget: Maximum estimated tokens per shard.
+
+    Returns:
+        A list of aligned field data dictionaries.
+    """
+    shards = []
+    current_shard = {}
+    current_tokens = 0
+    for field_name, entries in aligned_field_data.items():
+        field_tokens = estimate_tokens(encode_aligned_fields({field_name: entries})["rows"])
+        if current_shard and current_tokens + field_tokens > token_budget:
+            shards.append(current_shard)
+            current_shard = {}
+            current_tokens = 0
+        current_shard[field_name] = entries
+        current_tokens += field_tokens
+    if current_shard:
+        shards.append(current_shard)
+    return shards
+
+
+def compare_and_evaluate_fields(aligned_field_data: dict, use_llm: bool = False,
+                                escalation_margin: float = DEFAULT_ESCALATION_MARGIN,
+                                shard_token_budget: int = DEFAULT_SHARD_TOKEN_BUDGET,
+                                shard_workers: int = DEFAULT_SHARD_WORKERS,
+                                shard_retries: int = DEFAULT_SHARD_RETRIES,
+                                component_name: Optional[str] = None) -> dict:
+    """
+    Compares and evaluates field data from multiple sources.
+
+    By default every field is scored locally (see score_fields_locally) and only
+    contested fields, whose best sources are within escalation_margin of each other,
+    are sent to the CrewAI agent. Set use_llm to have the agent evaluate every field.
+
+    Fields sent to the agent are split into shards of at most shard_token_budget
+    estimated tokens that run concurrently. A shard that fails is retried on its own
+    up to shard_retries times. If it still fails, its contested fields keep their
+    local evaluation; with use_llm the error is raised.
+
+    Args:
+        aligned_field_data: A dictionary representing the aligned field data,
+                            where keys are field names.
+        use_llm: Whether to evaluate every field with the CrewAI agent.
+        escalation_margin: Score margin below which a field is sent to the agent.
+        shard_token_budget: Maximum estimated prompt tokens of field data per agent call.
+        shard_workers: Number of shards evaluated concurrently.
+        shard_retries: Number of retries of a failed shard.
+        component_name: The component the fields belong to, logged with shard failures.
 
     Returns:
         A dictionary containing the comparison and evaluation results.
     """
-    crew = Crew(
-        agents=[field_evaluator_agent],
-        tasks=[compare_fields_task],
-        verbose=True
+    if use_llm:
+        llm_evaluated_data, failed_shard_errors = _evaluate_with_llm(
+            aligned_field_data, shard_token_budget, shard_workers, shard_retries
+        )
+        if failed_shard_errors:
+            raise failed_shard_errors[0]
+        return llm_evaluated_data
+
+    evaluated_data, contested_fields = score_fields_locally(aligned_field_data, escalation_margin)
+    if not contested_fields:
+        return evaluated_data
+
+    llm_evaluated_data, failed_shard_errors = _evaluate_with_llm(
+        {field_name: aligned_field_data[field_name] for field_name in contested_fields},
+        shard_token_budget, shard_workers, shard_retries
     )
-    result_json_str = crew.kickoff(inputs={'aligned_field_data': aligned_field_data})
+    for error in failed_shard_errors:
+        logger.warning("Comparison shard failed, keeping local evaluation for its fields: %s", error,
+                       extra={"component": component_name} if component_name else None)
+    # Fields the agent did not return keep their local evaluation.
+    return {field_name: llm_evaluated_data.get(field_name, evaluation) for field_name, evaluation in evaluated_data.items()}
+
+
+def _evaluate_shard(shard: dict, retries: int) -> dict:
+    for attempt in range(retries + 1):
+        try:
+            result_json_str = run_crew_task(compare_fields_crew, {'aligned_field_data': encode_aligned_fields(shard)})
+            response = json.loads(result_json_str)
+            if not isinstance(response, dict):
+                raise ValueError(f"Expected a JSON object, got {type(response).__name__}.")
+            return decode_evaluations(response, shard, NO_TRUTH_SOURCE)
+        except Exception:
+            if attempt == retries:
+                raise
+            count("retries")
 
-    if not isinstance(result_json_str, str):
-        raise TypeError(f"Crew.kickoff() returned type {type(result_json_str)} instead of str. Content: {result_json_str}")
 
-    evaluated_data = json.loads(result_json_str)
-    return evaluated_data
+def _evaluate_with_llm(aligned_field_data: dict, token_budget: int, workers: int, retries: int) -> tuple[dict, list[Exception]]:
+    """
+    Evaluates sharded field data with the CrewAI agent. Returns the merged results
+    of the successful shards and the errors of the shards that failed.
+    """
+    shards = shard_aligned_fields(aligned_field_data, token_budget)
+    if len(shards) == 1:
+        try:
+            return _evaluate_shard(shards[0], retries), []
+        except Exception as e:
+            return {}, [e]
+
+    evaluated_data = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(propagate(_evaluate_shard), shard, retries) for shard in shards]
+        for future in futures:
+            try:
+                evaluated_data.update(future.result())
+            except Exception as e:
+                errors.append(e)
+    return evaluated_data, errors
@@ -1,18 +1,20 @@
+import io
 import json
 import os
-from crewai import Agent, Task, Crew
+import re
+from typing import Optional
+from src.crew_runner import LazyCrewTask, run_crew_task
 
-# Define the CrewAI Agent
-doc_parser_agent = Agent(
+# Configuration of the CrewAI Agent
+DOC_PARSER_AGENT_CONFIG = dict(
     role="Documentation Field Extractor",
     goal="Extract structured field information (name, value, required status, last updated date) from documentation text. The input text will be provided in the 'doc_content' variable within the task's input dictionary.",
     backstory="An expert AI assistant specialized in parsing technical documentation and extracting key-value information along with metadata like 'required' status and 'last updated' dates. It understands various common documentation formats and expects input text via 'doc_content'.",
-    allow_delegation=False,
-    verbose=True
+    allow_delegation=False
 )
 
-# Define the CrewAI Task
-extract_fields_task = Task(
+# Configuration of the CrewAI Task
+EXTRACT_FIELDS_TASK_CONFIG = dict(
     description="""Analyze the documentation text provided in the input variable 'doc_content' which can be accessed via `{inputs[doc_content]}`.
 Identify all distinct fields. For each field, extract the following information:
 1. Field Name: The name of the field (e.g., "Title", "Description", "Version").
@@ -43,13 +45,138 @@ Example of the JSON string to return:
     }
 ]"
 """,
-    expected_output="A valid JSON string representing a list of dictionaries. Each dictionary must contain 'fieldName' (string), 'fieldValue' (string), 'isRequired' (boolean), and 'lastUpdated' (string 'YYYY-MM-DD'). For example: '[{\"fieldName\": \"Example Field\", \"fieldValue\": \"Example Value\", \"isRequired\": true, \"lastUpdated\": \"2024-01-01\"}]'.",
-    agent=doc_parser_agent
+    expected_output="A valid JSON string representing a list of dictionaries. Each dictionary must contain 'fieldName' (string), 'fieldValue' (string), 'isRequired' (boolean), and 'lastUpdated' (string 'YYYY-MM-DD'). For example: '[{\"fieldName\": \"Example Field\", \"fieldValue\": \"Example Value\", \"isRequired\": true, \"lastUpdated\": \"2024-01-01\"}]'."
 )
 
+# The Agent and Task are only built, and crewai only imported, when the LLM is first needed.
+extract_fields_crew = LazyCrewTask("extract", DOC_PARSER_AGENT_CONFIG, EXTRACT_FIELDS_TASK_CONFIG)
+
+
+def __getattr__(name):
+    # Keeps `doc_parser_agent` and `extract_fields_task` importable as module attributes.
+    if name == "doc_parser_agent":
+        return extract_fields_crew.agent
+    if name == "extract_fields_task":
+        return extract_fields_crew.task
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Keys of the canonical "Field:/Value:/Required:/Last Updated:" layout, mapped to
+# the output keys used by the rest of the pipeline.
+CANONICAL_KEYS = {
+    "field": "fieldName",
+    "value": "fieldValue",
+    "required": "isRequired",
+    "last updated": "lastUpdated",
+}
+REQUIRED_TRUE_WORDS = {"yes", "true", "required"}
+REQUIRED_FALSE_WORDS = {"no", "false", "optional"}
+_KEY_LINE_RE = re.compile(r"^\s*([A-Za-z][A-Za-z ]*?)\s*:\s?(.*)$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def normalize_required(raw_value: str) -> Optional[bool]:
+    """
+    Standardizes a 'Required' value to a boolean.
+
+    Args:
+        raw_value: The raw text, e.g. "Yes", "optional", "TRUE".
+
+    Returns:
+        True or False, or None if the value is not a recognized keyword.
+    """
+    word = raw_value.strip().casefold()
+    if word in REQUIRED_TRUE_WORDS:
+        return True
+    if word in REQUIRED_FALSE_WORDS:
+        return False
+    return None
+
+
+def _parse_block(lines: list[str]) -> Optional[dict]:
+    """
+    Parses one canonical field block, or returns None if it does not match the layout exactly.
+    """
+    values = {}
+    for line in lines:
+        match = _KEY_LINE_RE.match(line)
+        if not match:
+            return None
+        key = match.group(1).casefold()
+        if key not in CANONICAL_KEYS or key in values:
+            return None
+        values[key] = match.group(2).strip()
+
+    if len(values) != len(CANONICAL_KEYS) or not values["field"]:
+        return None
+    is_required = normalize_required(values["required"])
+    if is_required is None or not _DATE_RE.match(values["last updated"]):
+        return None
+
+    return {
+        "fieldName": values["field"],
+        "fieldValue": values["value"],
+        "isRequired": is_required,
+        "lastUpdated": values["last updated"],
+    }
+
+
+def _iter_blocks(doc_content: str):
+    """
+    Yields lists of non-blank lines, one list per field block. Blocks are separated
+    by blank lines or start at a new 'Field:' line.
+    """
+    block = []
+    for raw_line in io.StringIO(doc_content):
+        line = raw_line.rstrip("\r\n")
+        if not line.strip():
+            if block:
+                yield block
+                block = []
+            continue
+        if block and line.lstrip().casefold().startswith("field:"):
+            yield block
+            block = []
+        block.append(line)
+    if block:
+        yield block
+
+
+def parse_canonical_fields(doc_content: str) -> tuple[list[dict], list[str]]:
+    """
+    Parses documentation written in the canonical field layout without calling an LLM:
+
+        Field: [Field Name]
+        Value: [Field Value]
+        Required: [Yes/No/True/False/Required/Optional]
+        Last Updated: [YYYY-MM-DD]
+
+    Args:
+        doc_content: The string content of the documentation.
+
+    Returns:
+        A tuple of (parsed fields, unparsed blocks). Parsed fields use the same
+        dictionary schema as extract_fields_from_content. Unparsed blocks are the
+        raw text of every block that did not match the layout.
+    """
+    fields = []
+    unparsed_blocks = []
+    for block in _iter_blocks(doc_content):
+        field = _parse_block(block)
+        if field is None:
+            unparsed_blocks.append("\n".join(block))
+        else:
+            fields.append(field)
+    return fields, unparsed_blocks
+
+
 def extract_fields_from_content(doc_content: str) -> list[dict]:
     """
-    Extracts structured field information from documentation content using a CrewAI agent.
+    Extracts structured field information from documentation content.
+
+    Blocks in the canonical field layout are parsed locally. Only the blocks that
+    cannot be parsed are sent to the CrewAI agent, and its fields are appended
+    after the locally parsed ones.
 
     Args:
         doc_content: The string content of the documentation.
@@ -58,23 +185,16 @@ def extract_fields_from_content(doc_content: str) -> list[dict]:
         A list of dictionaries, where each dictionary represents a field
         and contains 'fieldName', 'fieldValue', 'isRequired', and 'lastUpdated'.
     """
+    extracted_data, unparsed_blocks = parse_canonical_fields(doc_content)
+    if not unparsed_blocks:
+        return extracted_data
+
     # It's good practice to ensure API keys are set if not using mocks,
     # though for this specific function with mocking, they aren't strictly used by the function's direct logic.
     # Example:
     # if "OPENAI_API_KEY" not in os.environ:
     #     raise ValueError("OPENAI_API_KEY environment variable not set.")
 
-    crew = Crew(
-        agents=[doc_parser_agent],
-        tasks=[extract_fields_task],
-        verbose=True # You can set verbose level for the crew execution
-    )
-    result_json_str = crew.kickoff(inputs={'doc_content': doc_content})
-    
-    # Ensure the result is a string before trying to load it as JSON
-    if not isinstance(result_json_str, str):
-        # This case might happen if the LLM returns a non-string output or if mocking is incorrect
-        raise TypeError(f"Crew.kickoff() returned type {type(result_json_str)} instead of str. Content: {result_json_str}")
-
-    extracted_data = json.loads(result_json_str)
+    result_json_str = run_crew_task(extract_fields_crew, {'doc_content': "\n\n".join(unparsed_blocks)})
+    extracted_data.extend(json.loads(result_json_str))
     return extracted_data
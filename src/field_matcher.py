@@ -0,0 +1,124 @@
+import json
+import os
+import re
+from typing import Optional
+
+DEFAULT_MATCH_THRESHOLD = 0.85
+DEFAULT_AMBIGUITY_MARGIN = 0.2
+NGRAM_SIZE = 3
+
+_CAMEL_BOUNDARY_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_field_name(field_name: str) -> str:
+    """
+    Normalizes a field name to casefolded, space-separated tokens.
+
+    "Last Updated", "last_updated", "LastUpdated" and "last-updated" all become "last updated".
+    """
+    split_name = _CAMEL_BOUNDARY_RE.sub(" ", field_name)
+    return " ".join(token.casefold() for token in _TOKEN_RE.findall(split_name))
+
+
+def char_ngrams(normalized_name: str, n: int = NGRAM_SIZE) -> set[str]:
+    """
+    Returns the set of character n-grams of a normalized name, padded with spaces at both ends.
+    """
+    padded = f" {normalized_name} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def load_synonyms(path: str) -> dict[str, str]:
+    """
+    Loads a synonym table mapping field name variants to their canonical name.
+    Both sides are normalized. A missing file gives an empty table.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        raw_synonyms = json.load(f)
+    return {normalize_field_name(variant): normalize_field_name(canonical) for variant, canonical in raw_synonyms.items()}
+
+
+class FieldNameIndex:
+    """
+    Clusters field names that refer to the same field.
+
+    Names are normalized (see normalize_field_name) and mapped through the synonym
+    table first. Remaining names are matched against existing clusters with the Dice
+    similarity of their character n-grams, looked up through an inverted n-gram index
+    so only clusters sharing at least one n-gram are scored. A name joins the best
+    cluster scoring at or above threshold. If the best score falls within
+    ambiguity_margin below threshold, the name gets its own cluster and both clusters
+    are marked ambiguous, to be resolved by the LLM.
+
+    Args:
+        threshold: Minimum similarity for two names to be clustered together.
+        ambiguity_margin: Width of the similarity band below threshold that is treated as ambiguous.
+        synonyms: Normalized variant -> normalized canonical name table.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_MATCH_THRESHOLD,
+                 ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN,
+                 synonyms: Optional[dict[str, str]] = None):
+        self.threshold = threshold
+        self.ambiguity_margin = ambiguity_margin
+        self.synonyms = dict(synonyms or {})
+        self.cluster_names: list[str] = [] # Display name (first raw name seen) per cluster id
+        self.ambiguous_clusters: set[int] = set()
+        self._cluster_ngrams: list[set[str]] = []
+        self._cluster_by_key: dict[str, int] = {}
+        self._cluster_by_name: dict[str, int] = {}
+        self._ngram_index: dict[str, list[int]] = {}
+
+    def add(self, field_name: str) -> int:
+        """
+        Adds a raw field name to the index and returns the id of its cluster.
+        """
+        cluster_id = self._cluster_by_name.get(field_name)
+        if cluster_id is not None:
+            return cluster_id
+
+        normalized = normalize_field_name(field_name)
+        key = self.synonyms.get(normalized, normalized)
+        cluster_id = self._cluster_by_key.get(key)
+        if cluster_id is None:
+            ngrams = char_ngrams(key)
+            best_id, best_score = self._best_match(ngrams)
+            if best_id is not None and best_score >= self.threshold:
+                cluster_id = best_id
+            else:
+                cluster_id = self._new_cluster(field_name, ngrams)
+                if best_id is not None and best_score >= self.threshold - self.ambiguity_margin:
+                    self.ambiguous_clusters.update((best_id, cluster_id))
+            self._cluster_by_key[key] = cluster_id
+
+        self._cluster_by_name[field_name] = cluster_id
+        return cluster_id
+
+    def cluster_of(self, field_name: str) -> int:
+        return self._cluster_by_name[field_name]
+
+    def _best_match(self, ngrams: set[str]) -> tuple[Optional[int], float]:
+        shared_counts: dict[int, int] = {}
+        for ngram in ngrams:
+            for cluster_id in self._ngram_index.get(ngram, ()):
+                shared_counts[cluster_id] = shared_counts.get(cluster_id, 0) + 1
+
+        best_id, best_score = None, 0.0
+        for cluster_id, shared in shared_counts.items():
+            score = 2 * shared / (len(ngrams) + len(self._cluster_ngrams[cluster_id]))
+            if score > best_score:
+                best_id, best_score = cluster_id, score
+        return best_id, best_score
+
+    def _new_cluster(self, field_name: str, ngrams: set[str]) -> int:
+        cluster_id = len(self.cluster_names)
+        self.cluster_names.append(field_name)
+        self._cluster_ngrams.append(ngrams)
+        for ngram in ngrams:
+            self._ngram_index.setdefault(ngram, []).append(cluster_id)
+        return cluster_id
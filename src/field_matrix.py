@@ -0,0 +1,217 @@
+from array import array
+from collections.abc import Mapping
+from datetime import date
+from typing import Optional
+from src.utils import OutputMarkers
+
+
+def _key(value):
+    # Keeps True and 1 (or 1 and 1.0) apart and tolerates unhashable values.
+    try:
+        hash(value)
+        return type(value), value
+    except TypeError:
+        return type(value), repr(value)
+
+
+def _date_ordinal(last_updated) -> int:
+    try:
+        return date.fromisoformat(str(last_updated)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+class _Table:
+    """
+    Assigns consecutive ids to distinct values.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def id_of(self, value) -> int:
+        key = value if type(value) is str else _key(value)
+        value_id = self._ids.get(key)
+        if value_id is None:
+            value_id = self._ids[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+class FieldMatrix:
+    """
+    Columnar field x source form of aligned field data, with optional evaluation columns.
+
+    Source and field names are kept once in source_names and field_names. The cell of
+    field f and source s is at index f * len(source_names) + s of the parallel columns:
+
+        listed       bitmask: the field's dict has an entry for the source
+        present      bitmask: that entry is not ENUM.NO_FIELD
+        value_ids    array('l'): index into values, -1 when absent
+        date_ids     array('l'): index into dates (the raw lastUpdated), -1 when absent
+        ordinals     array('l'): lastUpdated as a date ordinal, 0 when absent or unparseable
+        required     array('b'): isRequired as 1 or 0, -1 when absent or not a bool
+        confidences  array('d'): per-source confidence, set by scoring
+
+    Scoring (see field_comparer.score_matrix) also sets the per-field columns truth_ids
+    (array('l'), -1 for no truth source), confidence_overall (array('d')) and explanations.
+
+    from_aligned() and to_aligned_dict() convert from and to the dict schema of
+    field_aligner.align_and_normalize_fields. Each field's sources come back in the
+    order of source_names, which is the order of first appearance.
+    """
+
+    def __init__(self, field_names: list[str], source_names: list[str]):
+        self.field_names = list(field_names)
+        self.source_names = list(source_names)
+        cells = len(self.field_names) * len(self.source_names)
+        self.listed = bytearray((cells + 7) // 8)
+        self.present = bytearray((cells + 7) // 8)
+        self.value_ids = array("l", [-1]) * cells
+        self.date_ids = array("l", [-1]) * cells
+        self.ordinals = array("l", [0]) * cells
+        self.required = array("b", [-1]) * cells
+        self.confidences = array("d", [0.0]) * cells
+        self.values: list = []
+        self.dates: list = []
+        # isRequired values that are not bools, by cell.
+        self.other_required: dict[int, object] = {}
+        self.truth_ids: Optional[array] = None
+        self.confidence_overall: Optional[array] = None
+        self.explanations: Optional[list[str]] = None
+
+    @classmethod
+    def from_aligned(cls, aligned_field_data: dict) -> "FieldMatrix":
+        source_ids = {}
+        for entries in aligned_field_data.values():
+            for source_name in entries:
+                source_ids.setdefault(source_name, len(source_ids))
+        matrix = cls(list(aligned_field_data), list(source_ids))
+        width = len(source_ids)
+        listed, present = matrix.listed, matrix.present
+        value_ids, date_ids, ordinals, required = matrix.value_ids, matrix.date_ids, matrix.ordinals, matrix.required
+        values, dates = _Table(), _Table()
+        value_id_of, date_id_of, other_required = values.id_of, dates.id_of, matrix.other_required
+        date_ordinals = [] # Each distinct lastUpdated is parsed once.
+        for field_id, entries in enumerate(aligned_field_data.values()):
+            row = field_id * width
+            for source_name, entry in entries.items():
+                cell = row + source_ids[source_name]
+                bit = 1 << (cell & 7)
+                listed[cell >> 3] |= bit
+                if type(entry) is str or not isinstance(entry, Mapping):
+                    continue
+                present[cell >> 3] |= bit
+                value_ids[cell] = value_id_of(entry.get("originalValue"))
+                date_id = date_ids[cell] = date_id_of(entry.get("lastUpdated"))
+                if date_id == len(date_ordinals):
+                    date_ordinals.append(_date_ordinal(dates.values[date_id]))
+                ordinals[cell] = date_ordinals[date_id]
+                is_required = entry.get("isRequired")
+                if is_required is True or is_required is False:
+                    required[cell] = is_required
+                else:
+                    other_required[cell] = is_required
+        matrix.values, matrix.dates = values.values, dates.values
+        return matrix
+
+    @property
+    def width(self) -> int:
+        return len(self.source_names)
+
+    def is_listed(self, cell: int) -> bool:
+        return bool(self.listed[cell >> 3] & (1 << (cell & 7)))
+
+    def is_present(self, cell: int) -> bool:
+        return bool(self.present[cell >> 3] & (1 << (cell & 7)))
+
+    def listed_cells(self, field_id: int) -> list[int]:
+        start, listed = field_id * self.width, self.listed
+        return [cell for cell in range(start, start + self.width) if listed[cell >> 3] & (1 << (cell & 7))]
+
+    def present_cells(self, field_id: int) -> list[int]:
+        start, present = field_id * self.width, self.present
+        return [cell for cell in range(start, start + self.width) if present[cell >> 3] & (1 << (cell & 7))]
+
+    def value(self, cell: int):
+        return self.values[self.value_ids[cell]]
+
+    def last_updated(self, cell: int):
+        return self.dates[self.date_ids[cell]]
+
+    def is_required(self, cell: int):
+        code = self.required[cell]
+        return bool(code) if code >= 0 else self.other_required.get(cell)
+
+    def entry(self, cell: int):
+        """
+        Returns the aligned dict entry of a cell, or ENUM.NO_FIELD.
+        """
+        if not self.is_present(cell):
+            return str(OutputMarkers.NO_FIELD)
+        return {"originalValue": self.value(cell), "lastUpdated": self.last_updated(cell),
+                "isRequired": self.is_required(cell)}
+
+    def to_aligned_dict(self) -> dict:
+        return {
+            field_name: {self.source_names[cell % self.width]: self.entry(cell) for cell in self.listed_cells(field_id)}
+            for field_id, field_name in enumerate(self.field_names)
+        }
+
+    def source_evaluation(self, cell: int, confidence: float) -> dict:
+        """
+        Returns the diff entry of a cell in the evaluated data schema.
+        """
+        if not self.is_present(cell):
+            return {"modified": False, "value": str(OutputMarkers.NO_FIELD), "confidence": confidence}
+        value = self.value(cell)
+        return {
+            "modified": False,
+            "value": value,
+            "originalValue": value,
+            "lastUpdated": self.last_updated(cell),
+            "isRequired": self.is_required(cell),
+            "confidence": confidence,
+        }
+
+    def to_evaluated_dict(self, no_truth_source: Optional[str] = None, field_ids: Optional[list[int]] = None) -> dict:
+        """
+        Returns the evaluated data schema of field_comparer.compare_and_evaluate_fields
+        for the given fields (all by default). The matrix must have been scored.
+
+        Args:
+            no_truth_source: The truthSource of fields without a truth source.
+            field_ids: The fields to include, in output order.
+        """
+        if self.truth_ids is None:
+            raise ValueError("The matrix has not been scored.")
+        no_field = str(OutputMarkers.NO_FIELD)
+        source_names, width, present = self.source_names, self.width, self.present
+        values, value_ids, dates, date_ids = self.values, self.value_ids, self.dates, self.date_ids
+        required, confidences = self.required, self.confidences
+        evaluated_data = {}
+        for field_id in range(len(self.field_names)) if field_ids is None else field_ids:
+            diff = {}
+            for cell in self.listed_cells(field_id):
+                if not present[cell >> 3] & (1 << (cell & 7)):
+                    diff[source_names[cell % width]] = {"modified": False, "value": no_field, "confidence": confidences[cell]}
+                    continue
+                value = values[value_ids[cell]]
+                code = required[cell]
+                diff[source_names[cell % width]] = {
+                    "modified": False,
+                    "value": value,
+                    "originalValue": value,
+                    "lastUpdated": dates[date_ids[cell]],
+                    "isRequired": code == 1 if code >= 0 else self.other_required.get(cell),
+                    "confidence": confidences[cell],
+                }
+            truth_id = self.truth_ids[field_id]
+            evaluated_data[self.field_names[field_id]] = {
+                "diff": diff,
+                "truthSource": source_names[truth_id] if truth_id >= 0 else no_truth_source,
+                "explanation": self.explanations[field_id],
+                "confidenceOverall": self.confidence_overall[field_id],
+            }
+        return evaluated_data
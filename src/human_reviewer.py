@@ -1,4 +1,6 @@
 import json
+from collections.abc import Mapping
+from src.models import FieldEvaluation, SourceEvaluation
 from src.utils import OutputMarkers
 
 def apply_human_decisions(evaluated_data: dict, human_decisions: dict) -> dict:
@@ -6,7 +8,8 @@ def apply_human_decisions(evaluated_data: dict, human_decisions: dict) -> dict:
     Applies human reviewer decisions to the evaluated field data.
 
     Args:
-        evaluated_data: The dictionary output from field_comparer.py.
+        evaluated_data: The dictionary output from field_comparer.py. Its values may also be
+                        FieldEvaluation records (see src.models), which are updated in place.
         human_decisions: A dictionary of human overrides.
 
     Returns:
@@ -29,7 +32,7 @@ def apply_human_decisions(evaluated_data: dict, human_decisions: dict) -> dict:
                 manual_is_required = decision.get('manualIsRequired')
                 manual_last_updated = decision.get('manualLastUpdated')
 
-                field_entry['diff']['MANUAL_INPUT'] = {
+                manual_entry = {
                     "modified": True,
                     "value": manual_value,
                     "originalValue": manual_value, # For new manual input, originalValue is the manualValue
@@ -37,6 +40,9 @@ def apply_human_decisions(evaluated_data: dict, human_decisions: dict) -> dict:
                     "isRequired": manual_is_required,
                     "confidence": 1.0
                 }
+                if isinstance(field_entry, FieldEvaluation):
+                    manual_entry = SourceEvaluation.from_dict(manual_entry)
+                field_entry['diff']['MANUAL_INPUT'] = manual_entry
             else: # Human chose an existing source
                 if chosen_source in field_entry['diff']:
                     field_entry['truthSource'] = chosen_source
@@ -44,7 +50,7 @@ def apply_human_decisions(evaluated_data: dict, human_decisions: dict) -> dict:
                     field_entry['confidenceOverall'] = 1.0
                     
                     # Mark the chosen source as modified and update confidence
-                    if isinstance(field_entry['diff'][chosen_source], dict):
+                    if isinstance(field_entry['diff'][chosen_source], Mapping):
                         field_entry['diff'][chosen_source]['modified'] = True
                         field_entry['diff'][chosen_source]['confidence'] = 1.0
                     # If it was ENUM.NO_FIELD, it cannot be marked as modified in the same way.
@@ -0,0 +1,112 @@
+from src.checkpoint import fingerprint
+
+
+def changed_sources(previous_hashes: dict[str, str], current_hashes: dict[str, str]) -> set[str]:
+    """
+    Returns the sources that were added, removed or whose content hash changed.
+    """
+    return {
+        source_name
+        for source_name in previous_hashes.keys() | current_hashes.keys()
+        if previous_hashes.get(source_name) != current_hashes.get(source_name)
+    }
+
+
+def touched_fields(previous_extracted: dict[str, list[dict]], extracted: dict[str, list[dict]],
+                   sources: set[str]) -> set[str]:
+    """
+    Returns the names of the fields that the given sources listed before or list now.
+    """
+    field_names = set()
+    for source_name in sources:
+        for field in previous_extracted.get(source_name, []) + extracted.get(source_name, []):
+            if field.get("fieldName") is not None:
+                field_names.add(field["fieldName"])
+    return field_names
+
+
+def realign_fields(previous_aligned: dict, extracted_data_by_source: dict[str, list[dict]],
+                   field_names: set[str], align) -> dict:
+    """
+    Recomputes the aligned rows of only the given fields and reuses the other rows.
+
+    Only valid for an exact-name alignment over an unchanged set of sources, where
+    each row depends on nothing but that field's entries.
+
+    Args:
+        previous_aligned: The aligned data of the previous run.
+        extracted_data_by_source: The current extracted data of every source.
+        field_names: The fields to realign.
+        align: The alignment function (e.g. field_aligner.align_fields_locally).
+
+    Returns:
+        The aligned data, in the previous row order with new fields appended.
+        Rows of fields no source lists anymore are dropped.
+    """
+    subset = {
+        source_name: [field for field in fields if field.get("fieldName") in field_names]
+        for source_name, fields in extracted_data_by_source.items()
+    }
+    realigned = align(subset)
+    aligned_data = {}
+    for field_name, entries in previous_aligned.items():
+        if field_name not in field_names:
+            aligned_data[field_name] = entries
+        elif field_name in realigned:
+            aligned_data[field_name] = realigned[field_name]
+    for field_name, entries in realigned.items():
+        aligned_data.setdefault(field_name, entries)
+    return aligned_data
+
+
+def changed_rows(previous_aligned: dict, aligned: dict, previous_evaluated: dict) -> list[str]:
+    """
+    Returns the fields whose aligned row is new or differs from the previous run, or
+    that have no previous evaluation, in aligned order.
+    """
+    return [
+        field_name
+        for field_name, entries in aligned.items()
+        if previous_aligned.get(field_name) != entries or field_name not in previous_evaluated
+    ]
+
+
+
+def load_previous_run(manifest_entry, checkpoints, options_fingerprint: str, align_fingerprint, compare_fingerprint):
+    """
+    Loads the results of the last successful run of a component for incremental reprocessing.
+
+    Args:
+        manifest_entry: The component's Manifest entry, or None.
+        checkpoints: The component's CheckpointStore.
+        options_fingerprint: Fingerprint of the current workflow options.
+        align_fingerprint: Callable returning the Stage 3 input fingerprint of extracted data.
+        compare_fingerprint: Callable returning the Stage 4 input fingerprint of aligned data.
+
+    Returns:
+        A dictionary with 'sources' (content hashes), 'extracted', 'aligned' and
+        'evaluated', or None if there is no consistent previous run made with the
+        same options.
+    """
+    if not manifest_entry or manifest_entry.get("options") != options_fingerprint:
+        return None
+    previous_hashes = manifest_entry["sources"]
+    extracted = checkpoints.load(2, stage2_fingerprint(previous_hashes))
+    if extracted is None:
+        return None
+    # A later run may have overwritten Stage 3 (e.g. from a partial extraction that was
+    # not checkpointed), so it only counts if it was aligned from these extracted fields.
+    aligned = checkpoints.load(3, align_fingerprint(extracted))
+    if aligned is None:
+        return None
+    evaluated = checkpoints.load(4, compare_fingerprint(aligned))
+    if evaluated is None:
+        return None
+    return {"sources": previous_hashes, "extracted": extracted, "aligned": aligned, "evaluated": evaluated}
+
+
+def stage2_fingerprint(source_hashes: dict[str, str]) -> str:
+    """
+    Returns the Stage 2 input fingerprint, computed from the sources' content hashes.
+    """
+    return fingerprint(source_hashes)
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+from src.utils import sha256_hex
+
+DEFAULT_CACHE_PATH = os.path.join("output", ".cache", "llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def make_cache_key(task_description: str, inputs: dict, model_name: str) -> str:
+    """
+    Builds a content-addressed cache key for a Crew kickoff.
+
+    Args:
+        task_description: The description text of the task being run.
+        inputs: The inputs dictionary passed to Crew.kickoff().
+        model_name: The name of the LLM model answering the task.
+
+    Returns:
+        A hex SHA-256 digest of the three values.
+    """
+    payload = json.dumps(
+        {"task": task_description, "model": model_name, "inputs": inputs},
+        sort_keys=True,
+        default=str,
+    )
+    return sha256_hex(payload)
+
+
+class LLMCache:
+    """
+    Persistent SQLite-backed cache of Crew kickoff results with a size cap and LRU eviction.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        # Imported here so that importing the workflow (and --help) does not pay for sqlite3.
+        import sqlite3
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached result for key, or None on a miss. A hit refreshes the entry's LRU position.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Stores a result and evicts least recently used entries while the cache exceeds max_bytes.
+        """
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        oldest_first = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall()
+        for key, size in oldest_first:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/eviction counters along with the current entry count and size in bytes.
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_active_cache: Optional[LLMCache] = None
+
+
+def configure_cache(path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES) -> LLMCache:
+    """
+    Enables the process-wide kickoff cache used by the LLM stages.
+
+    Returns:
+        The active LLMCache instance.
+    """
+    global _active_cache
+    disable_cache()
+    _active_cache = LLMCache(path, max_bytes)
+    return _active_cache
+
+
+def disable_cache() -> None:
+    """
+    Disables (and closes) the process-wide kickoff cache, if one is active.
+    """
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = None
+
+
+def get_active_cache() -> Optional[LLMCache]:
+    return _active_cache
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import sys
+import time
+from typing import Optional
+from src.models import json_default
+from src.utils import atomic_write
+
+ROOT_LOGGER_NAME = "docunify"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+LOG_FORMATS = ("text", "json")
+DEFAULT_DUMP_DIR = os.path.join("output", "dumps")
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns the logger of a workflow module, e.g. get_logger("main") -> "docunify.main".
+    """
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats records as "LEVEL [component] message key=value ...", with the fields passed
+    through `extra` (except component) appended.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        extra = _extra_fields(record)
+        component = extra.pop("component", None)
+        line = f"{record.levelname} " + (f"[{component}] " if component else "") + record.getMessage()
+        if extra:
+            line += " " + " ".join(f"{key}={value}" for key, value in extra.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line with 'time', 'level', 'logger',
+    'message' and the fields passed through `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", log_format: str = "text", stream=None) -> None:
+    """
+    Sends the workflow's log records at level and above to stream (stderr by default).
+
+    Args:
+        level: One of LOG_LEVELS.
+        log_format: "text" for human-readable lines or "json" for one JSON object per line.
+        stream: The stream to write to.
+    """
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+
+_dump_dir: Optional[str] = None
+
+
+def configure_dumps(dump_dir: Optional[str]) -> None:
+    """
+    Sets the directory that dump_intermediate() writes to. Pass None to stop writing dumps.
+    """
+    global _dump_dir
+    _dump_dir = dump_dir
+
+
+def dump_intermediate(logger: logging.Logger, component: str, name: str, data) -> None:
+    """
+    Makes an intermediate data structure available for inspection, only if someone asked for it.
+
+    With a dump directory configured, data is written to <dump_dir>/<component>/<name>.json.
+    With the logger at DEBUG level, it is also logged. Otherwise data is not serialized at all.
+
+    Args:
+        logger: The logger of the calling module.
+        component: The component being processed.
+        name: Name of the structure, e.g. "stage2-extracted".
+        data: A JSON-serializable structure, which may contain src.models records.
+    """
+    if _dump_dir is not None:
+        path = os.path.join(_dump_dir, component, f"{name}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path) as f:
+            json.dump(data, f, indent=2, default=json_default)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s", name, json.dumps(data, indent=2, default=json_default), extra={"component": component})
@@ -1,117 +1,805 @@
 import argparse
-import json
+import logging
+import operator
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-from src.doc_reader import read_component_docs
-from src.field_extractor import extract_fields_from_content
-from src.field_aligner import align_and_normalize_fields
-from src.field_comparer import compare_and_evaluate_fields
-from src.report_generator import generate_csv_report
+from src.doc_reader import DocIndex, read_component_docs
+from src.field_extractor import extract_fields_crew, extract_fields_from_content
+from src.field_matcher import DEFAULT_MATCH_THRESHOLD, load_synonyms
+from src.field_comparer import (
+    DEFAULT_ESCALATION_MARGIN,
+    DEFAULT_SHARD_RETRIES,
+    DEFAULT_SHARD_TOKEN_BUDGET,
+    DEFAULT_SHARD_WORKERS,
+    compare_and_evaluate_fields,
+    compare_fields_crew,
+    split_unanimous_fields,
+)
+from src.report_generator import DETAILS_MODES, ConsolidatedReport, evaluation_records, generate_csv_report
 from src.human_reviewer import apply_human_decisions
 from src.doc_generator import generate_unified_document
+from src.checkpoint import CHECKPOINT_STAGES, DEFAULT_CHECKPOINT_DIR, CheckpointStore, fingerprint, run_checkpointed_stage
+from src.field_aligner import align_and_normalize_fields, align_fields_crew, align_fields_locally
+from src.incremental import changed_rows, changed_sources, load_previous_run, realign_fields, stage2_fingerprint, touched_fields
+from src.manifest import DEFAULT_MANIFEST_PATH, Manifest, content_hash
+from src.llm_cache import DEFAULT_CACHE_PATH, configure_cache, disable_cache
+from src.crew_runner import set_agent_verbosity, set_rate_limiter
+from src.logging_setup import (
+    DEFAULT_DUMP_DIR,
+    LOG_FORMATS,
+    LOG_LEVELS,
+    configure_dumps,
+    configure_logging,
+    dump_intermediate,
+    get_logger,
+)
+from src.models import (
+    aligned_from_dict,
+    aligned_to_dict,
+    evaluations_from_dict,
+    extracted_from_dict,
+    extracted_to_dict,
+)
+from src.metrics import STAGE_NAMES, configure_metrics, disable_metrics, propagate, track_stages
+from src.pipeline import DEFAULT_QUEUE_SIZE, Pipeline, PipelineStage
+from src.profiler import DEFAULT_PROFILE_DIR, configure_profiling, disable_profiling
+from src.rate_limiter import RateLimiter
+from src.service import DEFAULT_HOST, DEFAULT_MAX_PENDING, DEFAULT_PORT, serve
+from src.watcher import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_POLL_INTERVAL, watch_components
 # from src.utils import OutputMarkers # Not directly used in main, but good for context
 
-def main():
+logger = get_logger("main")
+AGENT_NAMES = (extract_fields_crew.name, align_fields_crew.name, compare_fields_crew.name)
+# The steps of ComponentWorkflow, in order. --pipeline runs each on its own worker pool.
+WORKFLOW_STEPS = ("read", "extract", "align", "compare", "write")
+DEFAULT_STEP_WORKERS = {"read": 1, "extract": 4, "align": 2, "compare": 4, "write": 2}
+
+def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Process component documentation.")
-    parser.add_argument("--component_name", type=str, required=True,
-                        help="Name of the component to process (e.g., component1)")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--component_name", type=str,
+                              help="Name of the component to process (e.g., component1)")
+    target_group.add_argument("--components", type=str,
+                              help="Comma-separated names of components to process in one run (e.g., a,b,c)")
+    target_group.add_argument("--all", action="store_true",
+                              help="Process every component found under data/")
+    target_group.add_argument("--watch", action="store_true",
+                              help="Process every component, then keep running and reprocess components as their "
+                                   "files under data/ change")
+    target_group.add_argument("--serve", action="store_true",
+                              help="Run as a long-lived service accepting component jobs over a local HTTP endpoint")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of components processed concurrently with --components or --all (default: 1)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="With --components, --all or --watch, stream components through the workflow steps "
+                             f"({', '.join(WORKFLOW_STEPS)}), each with its own workers, instead of running "
+                             "--workers whole workflows concurrently")
+    parser.add_argument("--step-workers", type=str, default="",
+                        help="Workers per step with --pipeline, e.g. extract=8,compare=8 (default: "
+                             f"{','.join(f'{step}={workers}' for step, workers in DEFAULT_STEP_WORKERS.items())})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Components waiting in front of each step with --pipeline before the step "
+                             f"feeding it blocks (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the on-disk cache of LLM results and always call the LLM")
+    parser.add_argument("--cache-path", type=str, default=DEFAULT_CACHE_PATH,
+                        help=f"Path of the LLM result cache (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--cache-max-mb", type=int, default=256,
+                        help="Size cap of the LLM result cache in megabytes; least recently used entries are evicted")
+    parser.add_argument("--extract-workers", type=int, default=4,
+                        help="Maximum number of sources extracted concurrently in Stage 2 (default: 4)")
+    parser.add_argument("--llm-rate", type=float, default=None,
+                        help="Maximum LLM calls started per second, shared by all workers (default: unlimited)")
+    parser.add_argument("--llm-align", action="store_true",
+                        help="Align fields with the CrewAI agent instead of the local exact-name join")
+    parser.add_argument("--fuzzy-align", action="store_true",
+                        help="Merge differently spelled field names locally before aligning")
+    parser.add_argument("--match-threshold", type=float, default=DEFAULT_MATCH_THRESHOLD,
+                        help=f"Field name similarity needed to merge names with --fuzzy-align (default: {DEFAULT_MATCH_THRESHOLD})")
+    parser.add_argument("--synonyms", type=str, default=None,
+                        help="JSON file mapping field name variants to canonical names, used with --fuzzy-align")
+    parser.add_argument("--llm-compare", action="store_true",
+                        help="Evaluate every field with the CrewAI agent instead of local scoring")
+    parser.add_argument("--escalation-margin", type=float, default=DEFAULT_ESCALATION_MARGIN,
+                        help="Send a field to the agent when its top sources score within this margin "
+                             f"(default: {DEFAULT_ESCALATION_MARGIN})")
+    parser.add_argument("--normalize-unanimous", action="store_true",
+                        help="Ignore whitespace and case differences when settling unanimous fields before Stage 4")
+    parser.add_argument("--shard-tokens", type=int, default=DEFAULT_SHARD_TOKEN_BUDGET,
+                        help=f"Maximum estimated tokens of field data per comparison call (default: {DEFAULT_SHARD_TOKEN_BUDGET})")
+    parser.add_argument("--shard-workers", type=int, default=DEFAULT_SHARD_WORKERS,
+                        help=f"Number of comparison shards run concurrently (default: {DEFAULT_SHARD_WORKERS})")
+    parser.add_argument("--shard-retries", type=int, default=DEFAULT_SHARD_RETRIES,
+                        help=f"Retries of a failed comparison shard (default: {DEFAULT_SHARD_RETRIES})")
+    parser.add_argument("--checkpoint-dir", type=str, default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"Directory of per-component stage checkpoints (default: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse checkpointed Stage 2-4 outputs whose inputs have not changed")
+    parser.add_argument("--from-stage", type=int, choices=range(2, 8), default=None, metavar="N",
+                        help="Recompute from stage N (2-7) onward, reusing unchanged checkpoints of earlier stages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip components whose sources are unchanged since the last successful run and "
+                             "only reprocess what changed sources touch")
+    parser.add_argument("--manifest-path", type=str, default=DEFAULT_MANIFEST_PATH,
+                        help=f"Manifest of source content hashes from the last successful runs (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--report-details", choices=DETAILS_MODES, default="full",
+                        help="How the per-source details column of the CSV reports is written: as JSON, as "
+                             "zlib-compressed base64 JSON, or omitted (default: full)")
+    parser.add_argument("--consolidated-report", type=str, default=None, metavar="PATH",
+                        help="Also write the report rows of every component processed in this run to one CSV at PATH, "
+                             "with a Component column. Not available with --watch or --serve")
+    parser.add_argument("--parquet-dir", type=str, default=None, metavar="DIR",
+                        help="Also export every component's report as typed Parquet to DIR/component=<name>/, "
+                             "e.g. output/parquet (needs pyarrow)")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between change checks in --watch mode (default: {DEFAULT_POLL_INTERVAL})")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help="Seconds without further writes before changed components are reprocessed in --watch mode "
+                             f"(default: {DEFAULT_DEBOUNCE_SECONDS})")
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST,
+                        help=f"Interface the --serve endpoint listens on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port the --serve endpoint listens on (default: {DEFAULT_PORT})")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help=f"Maximum queued or running jobs in --serve mode (default: {DEFAULT_MAX_PENDING})")
+    parser.add_argument("--metrics-out", type=str, action="append", default=[], metavar="PATH",
+                        help="Write per-stage metrics to PATH: Prometheus text for a .prom file, JSON lines otherwise. "
+                             "Can be given more than once")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every stage with cProfile and write the results to --profile-dir")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile, also record the top allocation sites of every stage with tracemalloc")
+    parser.add_argument("--profile-dir", type=str, default=DEFAULT_PROFILE_DIR,
+                        help=f"Directory of per-component stage profiles (default: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS, default="INFO",
+                        help="Minimum level of the progress log written to stderr (default: INFO)")
+    parser.add_argument("--quiet", action="store_true", help="Only log warnings and errors (same as --log-level WARNING)")
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="text",
+                        help="Write log records as text lines or as one JSON object per line (default: text)")
+    parser.add_argument("--dump-intermediate", action="store_true",
+                        help="Write the Stage 2-4 and final data of every component as JSON files to --dump-dir")
+    parser.add_argument("--dump-dir", type=str, default=DEFAULT_DUMP_DIR,
+                        help=f"Directory of intermediate data dumps (default: {DEFAULT_DUMP_DIR})")
+    parser.add_argument("--agent-verbose", type=str, default="",
+                        help=f"Comma-separated agents to run with CrewAI verbose output ({', '.join(AGENT_NAMES)}) "
+                             "or 'all'. Agents are quiet by default")
+    return parser
+
+
+def workflow_options(args: argparse.Namespace) -> dict:
+    """
+    Returns the run_workflow keyword arguments selected by the command line.
+    """
+    return {
+        "extract_workers": args.extract_workers,
+        "llm_align": args.llm_align,
+        "fuzzy_align": args.fuzzy_align,
+        "match_threshold": args.match_threshold,
+        "synonyms": load_synonyms(args.synonyms) if args.synonyms else None,
+        "llm_compare": args.llm_compare,
+        "escalation_margin": args.escalation_margin,
+        "normalize_unanimous": args.normalize_unanimous,
+        "shard_token_budget": args.shard_tokens,
+        "shard_workers": args.shard_workers,
+        "shard_retries": args.shard_retries,
+        "checkpoint_dir": args.checkpoint_dir,
+        "reuse_before_stage": args.from_stage or (max(CHECKPOINT_STAGES) + 1 if args.resume else 0),
+        "manifest": Manifest(args.manifest_path),
+        "incremental": args.incremental,
+        "report_details": args.report_details,
+        "parquet_dir": args.parquet_dir,
+    }
+
+
+def main():
+    parser = build_arg_parser()
     args = parser.parse_args()
-    component_name = args.component_name
-
-    print(f"Starting documentation processing workflow for: {component_name}\n")
-
-    # Stage 1: Read Documentation
-    print("--- Stage 1: Reading Documentation ---")
-    docs_by_source = read_component_docs(component_name)
-    if not docs_by_source:
-        print(f"No documentation found for component '{component_name}'. Exiting.")
-        return
-    print(f"Found documentation from {len(docs_by_source)} sources: {list(docs_by_source.keys())}\n")
-
-    # Stage 2: Extract Fields
-    print("--- Stage 2: Extracting Fields ---")
-    extracted_data_by_source: dict[str, list[dict]] = {}
-    for source_name, doc_content in docs_by_source.items():
-        print(f"Extracting fields from {source_name} for {component_name}...")
+    configure_logging("WARNING" if args.quiet else args.log_level, args.log_format)
+    configure_dumps(args.dump_dir if args.dump_intermediate else None)
+    verbose_agents = {name.strip() for name in args.agent_verbose.split(",") if name.strip()}
+    if "all" in verbose_agents:
+        verbose_agents = set(AGENT_NAMES)
+    if verbose_agents - set(AGENT_NAMES):
+        parser.error(f"--agent-verbose: unknown agents {sorted(verbose_agents - set(AGENT_NAMES))}")
+    set_agent_verbosity(verbose_agents)
+    try:
+        step_workers = parse_step_workers(args.step_workers)
+    except ValueError as e:
+        parser.error(f"--step-workers: {e}")
+    if args.parquet_dir:
+        # Imported here so that only --parquet-dir pays for the Parquet export module.
+        from src.parquet_export import pyarrow_available
+        if not pyarrow_available():
+            parser.error("--parquet-dir needs the pyarrow package (pip install pyarrow)")
+    if args.consolidated_report and (args.watch or args.serve):
+        parser.error("--consolidated-report cannot be used with --watch or --serve")
+
+    # One scan of data/ serves discovery and reading for every component.
+    doc_index = DocIndex()
+    component_names = []
+    if args.component_name:
+        component_names = [args.component_name]
+    elif args.all or args.watch:
+        component_names = doc_index.components()
+    elif args.components:
+        component_names = [name.strip() for name in args.components.split(",") if name.strip()]
+
+    if args.llm_rate:
+        set_rate_limiter(RateLimiter(args.llm_rate, burst=max(1, args.extract_workers)))
+
+    cache = None
+    if not args.no_cache:
+        cache = configure_cache(args.cache_path, args.cache_max_mb * 1024 * 1024)
+    metrics = configure_metrics(args.metrics_out) if args.metrics_out else None
+    if args.profile:
+        configure_profiling(args.profile_dir, memory=args.profile_memory)
+    consolidated_report = None
+    try:
+        options = workflow_options(args)
+        options["doc_index"] = doc_index
+        if args.consolidated_report:
+            os.makedirs(os.path.dirname(args.consolidated_report) or ".", exist_ok=True)
+            consolidated_report = options["consolidated_report"] = ConsolidatedReport(
+                args.consolidated_report, details=args.report_details
+            )
+        def run_components(names: list[str]) -> list[dict]:
+            if args.pipeline:
+                return run_streaming_batch(names, step_workers, options, args.queue_size)
+            return run_batch(names, args.workers, options)
+
+        if args.component_name:
+            run_workflow(args.component_name, **options)
+        elif args.serve:
+            def run_job(component_name: str) -> bool:
+                # Pick up files added or removed since the last job.
+                doc_index.refresh()
+                return run_workflow(component_name, **options)
+
+            serve(run_job, args.host, args.port, args.workers, args.max_pending)
+        elif args.watch:
+            def process_components(names: list[str]) -> None:
+                print_batch_summary(run_components(names))
+
+            process_components(component_names)
+            logger.info("Watching data/ for changes. Press Ctrl+C to stop.")
+            try:
+                watch_components(doc_index, process_components, args.poll_interval, args.debounce)
+            except KeyboardInterrupt:
+                logger.info("Stopped watching.")
+        else:
+            results = run_components(component_names)
+            print_batch_summary(results)
+            if any(result["status"] == "failed" for result in results):
+                raise SystemExit(1)
+    finally:
+        if consolidated_report is not None:
+            consolidated_report.close()
+            logger.info("Consolidated report of %d fields written to %s", consolidated_report.rows, args.consolidated_report)
+        if cache is not None:
+            stats = cache.stats()
+            print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['evictions']} evictions, {stats['entries']} entries ({stats['bytes']} bytes)")
+            disable_cache()
+        if metrics is not None:
+            print_metrics_summary(metrics.totals_by_stage())
+            disable_metrics()
+        if args.profile:
+            logger.info("Stage profiles written to %s", args.profile_dir)
+            disable_profiling()
+
+
+def run_batch(component_names: list[str], workers: int, options: dict) -> list[dict]:
+    """
+    Runs the workflow for many components on a thread pool.
+
+    Threads rather than processes are used because the slow stages wait on the LLM,
+    and they let every component share the imported modules, the LLM cache and the
+    rate limiter.
+
+    Args:
+        component_names: Names of the components to process.
+        workers: Number of components processed concurrently.
+        options: Keyword arguments passed to run_workflow.
+
+    Returns:
+        One result per component, in input order, with keys 'component',
+        'status' ("ok", "skipped" or "failed"), 'seconds' and 'detail'.
+    """
+    def run_one(component_name: str) -> dict:
+        started = time.perf_counter()
+        try:
+            status, detail = component_status(run_component(component_name, **options))
+        except Exception as e:
+            status, detail = "failed", f"{type(e).__name__}: {e}"
+        return {
+            "component": component_name,
+            "status": status,
+            "seconds": time.perf_counter() - started,
+            "detail": detail,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(run_one, component_names))
+
+
+def parse_step_workers(text: str) -> dict[str, int]:
+    """
+    Parses "step=workers,..." into workers per step, starting from DEFAULT_STEP_WORKERS.
+
+    Raises:
+        ValueError: If a step is unknown or a worker count is not a positive integer.
+    """
+    step_workers = dict(DEFAULT_STEP_WORKERS)
+    for item in filter(None, (item.strip() for item in text.split(","))):
+        step, _, workers = item.partition("=")
+        step = step.strip()
+        if step not in step_workers:
+            raise ValueError(f"unknown step {step!r}, expected one of {', '.join(WORKFLOW_STEPS)}")
+        if not workers.strip().isdigit() or int(workers) < 1:
+            raise ValueError(f"invalid worker count {workers!r} for step {step!r}")
+        step_workers[step] = int(workers)
+    return step_workers
+
+
+def run_streaming_batch(component_names: list[str], step_workers: dict[str, int], options: dict,
+                        queue_size: int = DEFAULT_QUEUE_SIZE) -> list[dict]:
+    """
+    Runs the workflow for many components as a streaming pipeline (see src.pipeline).
+
+    Every step of ComponentWorkflow gets its own worker threads and a bounded queue of
+    components waiting for it, so one component's extraction overlaps with another's
+    comparison and report writing, and the LLM-bound and local steps do not take turns
+    sitting idle. When a step falls behind, the queue in front of it fills up and the
+    steps before it block, which bounds the number of components in memory.
+
+    Args:
+        component_names: Names of the components to process.
+        step_workers: Number of worker threads per step name; missing steps use DEFAULT_STEP_WORKERS.
+        options: Keyword arguments for ComponentWorkflow.
+        queue_size: Capacity of each step's input queue.
+
+    Returns:
+        The same results as run_batch, in input order.
+    """
+    pipeline = Pipeline(
+        [PipelineStage(step, operator.methodcaller(step), step_workers.get(step, DEFAULT_STEP_WORKERS[step]))
+         for step in WORKFLOW_STEPS],
+        queue_size,
+    )
+    results = []
+    for result in pipeline.run(ComponentWorkflow(component_name, **options) for component_name in component_names):
+        workflow, error = result["item"], result["error"]
+        if error is not None:
+            status, detail = "failed", f"{type(error).__name__}: {error}"
+        else:
+            status, detail = component_status(workflow)
+        results.append({
+            "component": workflow.component_name,
+            "status": status,
+            "seconds": result["seconds"],
+            "detail": detail,
+        })
+    for step, stats in pipeline.stats().items():
+        logger.info("Step %s: %d components, %.2f s busy, %.2f s waiting for input, %.2f s blocked by the next step.",
+                    step, stats["items"], stats["busySeconds"], stats["idleSeconds"], stats["blockedSeconds"])
+    return results
+
+
+def print_batch_summary(results: list[dict]) -> None:
+    """
+    Prints a table with one row per component and the success/failure totals.
+    """
+    name_width = max([len("Component")] + [len(result["component"]) for result in results])
+    print("--- Batch Summary ---")
+    print(f"{'Component':<{name_width}}  {'Status':<8}  {'Seconds':>8}  Detail")
+    for result in results:
+        print(f"{result['component']:<{name_width}}  {result['status']:<8}  {result['seconds']:>8.2f}  {result['detail']}")
+    counts = {status: sum(1 for result in results if result["status"] == status) for status in ("ok", "skipped", "failed")}
+    print(f"{len(results)} components: {counts['ok']} ok, {counts['skipped']} skipped, {counts['failed']} failed")
+
+
+def print_metrics_summary(totals_by_stage: dict[int, dict]) -> None:
+    """
+    Prints a table of the recorded stage metrics, summed over all components.
+    """
+    print("--- Stage Metrics ---")
+    print(f"{'Stage':<12}  {'Runs':>5}  {'Wall s':>8}  {'CPU s':>8}  {'LLM calls':>9}  {'Tokens':>8}  {'Retries':>7}  {'Cache hits':>10}")
+    for stage, totals in totals_by_stage.items():
+        tokens = totals["promptTokens"] + totals["completionTokens"]
+        print(f"{f'{stage} {STAGE_NAMES[stage]}':<12}  {totals['runs']:>5}  {totals['wallSeconds']:>8.2f}  "
+              f"{totals['cpuSeconds']:>8.2f}  {totals['llmCalls']:>9}  {tokens:>8}  {totals['retries']:>7}  "
+              f"{totals['cacheHits']:>10}")
+
+
+def extract_all_sources(docs_by_source: dict[str, str], max_workers: int = 4,
+                        component_name: str = "") -> dict[str, list[dict]]:
+    """
+    Extracts fields from every source concurrently, with at most max_workers in flight.
+
+    Args:
+        docs_by_source: Dictionary of source name to documentation content.
+        max_workers: Concurrency limit for extraction.
+        component_name: The component the documents belong to, for the log.
+
+    Returns:
+        Dictionary of source name to extracted fields, in the order of docs_by_source.
+        A source whose extraction fails gets an empty list.
+    """
+    log = logging.LoggerAdapter(logger, {"component": component_name})
+
+    def extract_source(source_name: str, doc_content: str) -> list[dict]:
+        log.debug("Extracting fields from %s...", source_name)
         try:
             # Note: OPENAI_API_KEY (or other LLM provider keys) must be set in the environment
             # if the CrewAI tasks are not mocked and are intended to run live.
-            extracted_data_by_source[source_name] = extract_fields_from_content(doc_content)
-            print(f"Successfully extracted {len(extracted_data_by_source[source_name])} fields from {source_name}.")
+            fields = extract_fields_from_content(doc_content)
+            log.info("Extracted %d fields from %s.", len(fields), source_name)
+            return fields
         except Exception as e:
-            print(f"Error extracting fields from {source_name}: {e}")
-            extracted_data_by_source[source_name] = [] # Store empty list on error
-    print("\nExtracted data by source:")
-    print(json.dumps(extracted_data_by_source, indent=2))
-    print("-" * 30 + "\n")
-
-    # Stage 3: Align Fields
-    print("--- Stage 3: Aligning Fields ---")
-    # Ensure there's some data to align
-    if not any(extracted_data_by_source.values()):
-        print("No fields were extracted from any source. Cannot proceed with alignment. Exiting.")
-        return
-        
-    aligned_fields = align_and_normalize_fields(extracted_data_by_source)
-    print("\nAligned fields:")
-    print(json.dumps(aligned_fields, indent=2))
-    print("-" * 30 + "\n")
-
-    # Stage 4: Compare and Evaluate Fields
-    print("--- Stage 4: Comparing and Evaluating Fields ---")
-    if not aligned_fields:
-        print("No aligned fields to compare. Exiting.")
-        return
-    evaluated_data = compare_and_evaluate_fields(aligned_fields)
-    print("\nEvaluated data:")
-    print(json.dumps(evaluated_data, indent=2))
-    print("-" * 30 + "\n")
-
-    # Stage 5: Generate CSV Report
-    print("--- Stage 5: Generating CSV Report ---")
-    os.makedirs("output", exist_ok=True)
-    report_path = os.path.join("output", f"{component_name}_report.csv")
-    print(f"Generating CSV report to {report_path}...")
-    generate_csv_report(evaluated_data, report_path)
-    print(f"CSV report generated: {report_path}\n")
-
-    # Stage 6: Apply Human Decisions (Simulated)
-    print("--- Stage 6: Simulating Human Review ---")
-    mock_human_decisions = {}
-    if "Version" in evaluated_data and "source1" in evaluated_data["Version"]["diff"]:
-        mock_human_decisions["Version"] = {
-            "chosenSource": "source1",
+            log.error("Error extracting fields from %s: %s", source_name, e)
+            return [] # Store empty list on error
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            source_name: executor.submit(propagate(extract_source), source_name, doc_content)
+            for source_name, doc_content in docs_by_source.items()
         }
-        print("Simulating human decision for 'Version' field to use 'source1'.")
-    elif "Title" in evaluated_data : # Fallback if Version isn't there, just to show manual input
-         mock_human_decisions["Title"] = {
-            "chosenSource": "MANUAL_INPUT",
-            "manualValue": "Manually Set Title",
-            "manualIsRequired": True,
-            "manualLastUpdated": "2024-03-15"
+        return {source_name: future.result() for source_name, future in futures.items()}
+
+
+class ComponentWorkflow:
+    """
+    One component's run through Stages 1-7 of the documentation unification workflow,
+    split into the steps of WORKFLOW_STEPS: read (Stage 1), extract (Stage 2), align
+    (Stage 3), compare (Stage 4) and write (Stages 5-7). Each step is a method that
+    returns True when the next step should run; after the last step that ran,
+    completed is True if the workflow completed and False if it stopped early because
+    there was nothing to process. unchanged is set when an incremental run skipped the
+    component because its outputs are up to date. The steps keep their data on the instance, so
+    consecutive steps may run on different threads (see run_streaming_batch). Between
+    steps, the stage outputs are kept as the compact records of src.models, and data no
+    later step needs (the documents, then the extracted and aligned fields) is released.
+
+    If checkpoint_dir is set, the outputs of Stages 2-4 are saved there together with
+    a fingerprint of their inputs and options. Stages numbered below reuse_before_stage
+    load their checkpoint instead of recomputing when that fingerprint still matches.
+    Documentation is read through doc_index when one is given.
+
+    If manifest is set, the content hash of every source is recorded there after a
+    successful run. With incremental (which needs checkpoint_dir and manifest), a
+    component whose sources are unchanged since that run is skipped. Otherwise only the
+    changed sources are re-extracted, and only the fields they touch are realigned and
+    re-evaluated; the rest is reused from the checkpoints.
+
+    report_details selects how the per-source details column of the CSV report is
+    written (see src.report_generator.DETAILS_MODES). If consolidated_report is set,
+    the component's report rows are also appended to it. If parquet_dir is set, the
+    report is also exported there as the component's Parquet partition (see
+    src.parquet_export; needs pyarrow).
+
+    Progress is logged (see src.logging_setup); the intermediate data of Stages 2-4
+    and the final data are only serialized when dumps or DEBUG logging are enabled.
+
+    When metrics are configured (see src.metrics.configure_metrics), one record per
+    stage is sent to the metrics sinks. When profiling is configured (see
+    src.profiler.configure_profiling), every stage is profiled.
+    """
+
+    def __init__(self, component_name: str, extract_workers: int = 4, llm_align: bool = False,
+                 fuzzy_align: bool = False, match_threshold: float = DEFAULT_MATCH_THRESHOLD,
+                 synonyms: dict[str, str] = None, llm_compare: bool = False,
+                 escalation_margin: float = DEFAULT_ESCALATION_MARGIN, normalize_unanimous: bool = False,
+                 shard_token_budget: int = DEFAULT_SHARD_TOKEN_BUDGET, shard_workers: int = DEFAULT_SHARD_WORKERS,
+                 shard_retries: int = DEFAULT_SHARD_RETRIES, checkpoint_dir: Optional[str] = None,
+                 reuse_before_stage: int = 0, doc_index: Optional[DocIndex] = None,
+                 manifest: Optional[Manifest] = None, incremental: bool = False, report_details: str = "full",
+                 consolidated_report: Optional[ConsolidatedReport] = None, parquet_dir: Optional[str] = None):
+        self.component_name = component_name
+        self.extract_workers = extract_workers
+        self.llm_align = llm_align
+        self.fuzzy_align = fuzzy_align
+        self.normalize_unanimous = normalize_unanimous
+        self.shard_token_budget = shard_token_budget
+        self.shard_workers = shard_workers
+        self.shard_retries = shard_retries
+        self.reuse_before_stage = reuse_before_stage
+        self.doc_index = doc_index
+        self.manifest = manifest
+        self.incremental = incremental
+        self.report_details = report_details
+        self.consolidated_report = consolidated_report
+        self.parquet_dir = parquet_dir
+        self.checkpoints = CheckpointStore(component_name, checkpoint_dir) if checkpoint_dir else None
+        self.align_options = {
+            "llm_align": llm_align, "fuzzy_align": fuzzy_align,
+            "match_threshold": match_threshold, "synonyms": synonyms,
         }
-         print("Simulating human decision for 'Title' field with MANUAL_INPUT.")
-    else:
-        print("No specific fields like 'Version' or 'Title' found for mock human review in this run.")
-
-
-    if mock_human_decisions:
-        final_data = apply_human_decisions(evaluated_data, mock_human_decisions)
-        print("\nHuman decisions applied. Final data after review:")
-        print(json.dumps(final_data, indent=2))
-    else:
-        final_data = evaluated_data
-        print("No mock human decisions applied for this run.")
-    print("-" * 30 + "\n")
-
-    # Stage 7: Generate Unified Document
-    print("--- Stage 7: Generating Unified Document ---")
-    unified_doc_path = os.path.join("output", f"{component_name}_unified.txt")
-    print(f"Generating unified document to {unified_doc_path}...")
-    generate_unified_document(final_data, unified_doc_path)
-    print(f"Unified document generated: {unified_doc_path}\n")
-
-    print("--- Workflow completed! ---")
+        self.compare_options = {
+            "llm_compare": llm_compare, "escalation_margin": escalation_margin,
+            "normalize_unanimous": normalize_unanimous,
+        }
+        self.completed: Optional[bool] = None
+        self.unchanged = False
+        self.log = logging.LoggerAdapter(logger, {"component": component_name})
+        # Every step ends its last stage, so no stage record outlives the thread running the step.
+        self._stages = track_stages(component_name)
+
+    def _stop(self, completed: bool) -> bool:
+        self.completed = completed
+        return False
+
+    def _extraction_complete(self, extracted: dict) -> bool:
+        # A source that failed to extract is not checkpointed, so the next run retries it.
+        return all(extracted[source] or not self.docs_by_source[source].strip() for source in extracted)
+
+    def read(self) -> bool:
+        with self._stages as stages:
+            log = self.log
+            log.info("Starting documentation processing workflow.")
+
+            # Stage 1: Read Documentation
+            stages.begin(1)
+            log.info("Stage 1: Reading documentation")
+            self.docs_by_source = read_component_docs(self.component_name, self.doc_index)
+            if not self.docs_by_source:
+                log.warning("No documentation found. Exiting.")
+                return self._stop(False)
+            log.info("Found documentation from %d sources: %s", len(self.docs_by_source), list(self.docs_by_source.keys()))
+
+            self.source_hashes = {source_name: content_hash(content) for source_name, content in self.docs_by_source.items()}
+            self.options_fingerprint = fingerprint(None, **self.align_options, **self.compare_options)
+
+            self.previous_run = None
+            self.changed = set()
+            if self.incremental and self.checkpoints is not None and self.manifest is not None:
+                self.previous_run = load_previous_run(
+                    self.manifest.get(self.component_name), self.checkpoints, self.options_fingerprint,
+                    # As in align(), the Stage 3 input is fingerprinted in its record form.
+                    lambda extracted: fingerprint(extracted_to_dict(extracted_from_dict(extracted)), **self.align_options),
+                    lambda aligned: fingerprint(aligned, **self.compare_options),
+                )
+            if self.previous_run is not None:
+                self.changed = changed_sources(self.previous_run["sources"], self.source_hashes)
+                if not self.changed:
+                    log.info("No source changed since the last successful run. Skipping.")
+                    self.unchanged = True
+                    return self._stop(True)
+                log.info("Sources changed since the last successful run: %s", sorted(self.changed))
+            return True
+
+    def extract(self) -> bool:
+        with self._stages as stages:
+            log = self.log
+            docs_by_source, previous_run, changed = self.docs_by_source, self.previous_run, self.changed
+
+            # Stage 2: Extract Fields
+            stages.begin(2)
+            log.info("Stage 2: Extracting fields")
+            def extract() -> dict:
+                if previous_run is None:
+                    return extract_all_sources(docs_by_source, max_workers=self.extract_workers,
+                                               component_name=self.component_name)
+                reextracted = extract_all_sources(
+                    {source_name: content for source_name, content in docs_by_source.items() if source_name in changed},
+                    max_workers=self.extract_workers,
+                    component_name=self.component_name,
+                )
+                return {
+                    source_name: reextracted[source_name] if source_name in changed else previous_run["extracted"][source_name]
+                    for source_name in docs_by_source
+                }
+
+            extracted_data_by_source, from_checkpoint = run_checkpointed_stage(
+                self.checkpoints, 2, stage2_fingerprint(self.source_hashes), self.reuse_before_stage > 2, extract,
+                save=self._extraction_complete,
+            )
+            if from_checkpoint:
+                log.info("Reused Stage 2 checkpoint.")
+            dump_intermediate(logger, self.component_name, "stage2-extracted", extracted_data_by_source)
+            self.extraction_complete = self._extraction_complete(extracted_data_by_source)
+            self.extracted_data_by_source = extracted_from_dict(extracted_data_by_source)
+            self.docs_by_source = None
+            return True
+
+    def align(self) -> bool:
+        with self._stages as stages:
+            log = self.log
+            extracted_data_by_source, previous_run = extracted_to_dict(self.extracted_data_by_source), self.previous_run
+
+            # Stage 3: Align Fields
+            stages.begin(3)
+            log.info("Stage 3: Aligning fields")
+            # Ensure there's some data to align
+            if not any(extracted_data_by_source.values()):
+                log.warning("No fields were extracted from any source. Cannot proceed with alignment. Exiting.")
+                return self._stop(False)
+
+            def align() -> dict:
+                # Rows of an exact-name join only depend on their own field, so with the same
+                # set of sources only the fields touched by the changed sources are realigned.
+                if (previous_run is not None and not self.llm_align and not self.fuzzy_align
+                        and previous_run["sources"].keys() == self.source_hashes.keys()):
+                    fields = touched_fields(previous_run["extracted"], extracted_data_by_source, self.changed)
+                    log.info("Realigning %d fields touched by the changed sources.", len(fields))
+                    return realign_fields(previous_run["aligned"], extracted_data_by_source, fields, align_fields_locally)
+                return align_and_normalize_fields(
+                    extracted_data_by_source,
+                    use_llm=self.llm_align,
+                    fuzzy=self.fuzzy_align,
+                    match_threshold=self.align_options["match_threshold"],
+                    synonyms=self.align_options["synonyms"],
+                )
+
+            aligned_fields, from_checkpoint = run_checkpointed_stage(
+                self.checkpoints, 3, fingerprint(extracted_data_by_source, **self.align_options),
+                self.reuse_before_stage > 3, align
+            )
+            if from_checkpoint:
+                log.info("Reused Stage 3 checkpoint.")
+            dump_intermediate(logger, self.component_name, "stage3-aligned", aligned_fields)
+            self.aligned_fields = aligned_from_dict(aligned_fields)
+            self.extracted_data_by_source = None
+            return True
+
+    def compare(self) -> bool:
+        with self._stages as stages:
+            log = self.log
+            aligned_fields, previous_run = aligned_to_dict(self.aligned_fields), self.previous_run
+
+            # Stage 4: Compare and Evaluate Fields
+            stages.begin(4)
+            log.info("Stage 4: Comparing and evaluating fields")
+            if not aligned_fields:
+                log.warning("No aligned fields to compare. Exiting.")
+                return self._stop(False)
+
+            def evaluate_fields(fields_to_evaluate: dict) -> dict:
+                unanimous_data, contested_fields, unanimity_counts = split_unanimous_fields(
+                    fields_to_evaluate, normalize_values=self.normalize_unanimous
+                )
+                log.info("Resolved %d unanimous fields locally; %d contested fields go to comparison.",
+                         unanimity_counts["unanimous"], unanimity_counts["contested"])
+                compared_data = {}
+                if contested_fields:
+                    compared_data = compare_and_evaluate_fields(
+                        contested_fields,
+                        use_llm=self.compare_options["llm_compare"],
+                        escalation_margin=self.compare_options["escalation_margin"],
+                        shard_token_budget=self.shard_token_budget,
+                        shard_workers=self.shard_workers,
+                        shard_retries=self.shard_retries,
+                        component_name=self.component_name,
+                    )
+                # Keep the aligned field order.
+                return {
+                    field_name: unanimous_data[field_name] if field_name in unanimous_data else compared_data[field_name]
+                    for field_name in fields_to_evaluate
+                    if field_name in unanimous_data or field_name in compared_data
+                }
+
+            def evaluate() -> dict:
+                if previous_run is None:
+                    return evaluate_fields(aligned_fields)
+                fields_to_evaluate = changed_rows(previous_run["aligned"], aligned_fields, previous_run["evaluated"])
+                log.info("Re-evaluating %d of %d fields.", len(fields_to_evaluate), len(aligned_fields))
+                reevaluated = evaluate_fields({field_name: aligned_fields[field_name] for field_name in fields_to_evaluate})
+                reused = set(aligned_fields) - set(fields_to_evaluate)
+                return {
+                    field_name: reevaluated[field_name] if field_name in reevaluated else previous_run["evaluated"][field_name]
+                    for field_name in aligned_fields
+                    if field_name in reevaluated or field_name in reused
+                }
+
+            evaluated_data, from_checkpoint = run_checkpointed_stage(
+                self.checkpoints, 4, fingerprint(aligned_fields, **self.compare_options), self.reuse_before_stage > 4,
+                evaluate
+            )
+            if from_checkpoint:
+                log.info("Reused Stage 4 checkpoint.")
+            dump_intermediate(logger, self.component_name, "stage4-evaluated", evaluated_data)
+            self.evaluated_data = evaluations_from_dict(evaluated_data)
+            self.aligned_fields = None
+            return True
+
+    def write(self) -> bool:
+        with self._stages as stages:
+            log = self.log
+            component_name, evaluated_data = self.component_name, self.evaluated_data
+
+            # Stage 5: Generate CSV Report
+            stages.begin(5)
+            log.info("Stage 5: Generating CSV report")
+            os.makedirs("output", exist_ok=True)
+            report_path = os.path.join("output", f"{component_name}_report.csv")
+            generate_csv_report(evaluated_data, report_path, details=self.report_details)
+            log.info("CSV report generated: %s", report_path)
+            if self.consolidated_report is not None:
+                self.consolidated_report.write(evaluation_records(component_name, evaluated_data))
+            if self.parquet_dir:
+                from src.parquet_export import export_parquet_report
+
+                parquet_path = export_parquet_report(component_name, evaluated_data, self.parquet_dir)
+                log.info("Parquet report exported: %s", parquet_path)
+
+            # Stage 6: Apply Human Decisions (Simulated)
+            stages.begin(6)
+            log.info("Stage 6: Simulating human review")
+            mock_human_decisions = {}
+            if "Version" in evaluated_data and "source1" in evaluated_data["Version"]["diff"]:
+                mock_human_decisions["Version"] = {
+                    "chosenSource": "source1",
+                }
+                log.info("Simulating human decision for 'Version' field to use 'source1'.")
+            elif "Title" in evaluated_data : # Fallback if Version isn't there, just to show manual input
+                 mock_human_decisions["Title"] = {
+                    "chosenSource": "MANUAL_INPUT",
+                    "manualValue": "Manually Set Title",
+                    "manualIsRequired": True,
+                    "manualLastUpdated": "2024-03-15"
+                }
+                 log.info("Simulating human decision for 'Title' field with MANUAL_INPUT.")
+            else:
+                log.info("No specific fields like 'Version' or 'Title' found for mock human review in this run.")
+
+
+            if mock_human_decisions:
+                final_data = apply_human_decisions(evaluated_data, mock_human_decisions)
+                log.info("Human decisions applied.")
+                dump_intermediate(logger, component_name, "stage6-final", final_data)
+            else:
+                final_data = evaluated_data
+                log.info("No mock human decisions applied for this run.")
+
+            # Stage 7: Generate Unified Document
+            stages.begin(7)
+            log.info("Stage 7: Generating unified document")
+            unified_doc_path = os.path.join("output", f"{component_name}_unified.txt")
+            generate_unified_document(final_data, unified_doc_path)
+            log.info("Unified document generated: %s", unified_doc_path)
+
+            if self.manifest is not None and self.extraction_complete:
+                self.manifest.update(component_name, self.source_hashes, self.options_fingerprint)
+
+            log.info("Workflow completed.")
+            return self._stop(True)
+
+
+def run_workflow(component_name: str, **options) -> bool:
+    """
+    Runs Stages 1-7 of the documentation unification workflow for one component, all
+    steps in the calling thread. See ComponentWorkflow for the options.
+
+    Returns:
+        True if the workflow completed, False if it stopped early because there was
+        nothing to process.
+    """
+    return run_component(component_name, **options).completed
+
+
+def run_component(component_name: str, **options) -> ComponentWorkflow:
+    """
+    Runs all steps of a ComponentWorkflow in the calling thread, like run_workflow,
+    and returns the workflow so its outcome can be reported (see component_status).
+    """
+    workflow = ComponentWorkflow(component_name, **options)
+    for step in WORKFLOW_STEPS:
+        if not getattr(workflow, step)():
+            break
+    return workflow
+
+
+def component_status(workflow: ComponentWorkflow) -> tuple[str, str]:
+    """
+    Returns the batch summary status ("ok" or "skipped") and detail of a workflow that ran without raising.
+    """
+    if workflow.unchanged:
+        return "skipped", "unchanged since last run"
+    if workflow.completed:
+        return "ok", ""
+    return "skipped", "no documentation or fields found"
 
 if __name__ == "__main__":
     # Reminder: For CrewAI tasks to run (field_extractor, field_aligner, field_comparer),
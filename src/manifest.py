@@ -0,0 +1,56 @@
+import json
+import os
+import threading
+from typing import Optional
+from src.utils import atomic_write, sha256_hex
+
+DEFAULT_MANIFEST_PATH = os.path.join("output", "manifest.json")
+
+
+def content_hash(content: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a documentation file's content.
+    """
+    return sha256_hex(content)
+
+
+class Manifest:
+    """
+    Records, per component, the content hash of every source file and a fingerprint
+    of the workflow options as of the last successful run.
+
+    The manifest is a single JSON file shaped as
+    {component: {"sources": {source: hash}, "options": fingerprint}}. Updates are
+    thread-safe and each one rewrites the file atomically.
+
+    Args:
+        path: Location of the manifest file.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = {}
+
+    def get(self, component_name: str) -> Optional[dict]:
+        """
+        Returns {"sources": {source: hash}, "options": fingerprint} for a component, or None.
+        """
+        with self._lock:
+            return self._entries.get(component_name)
+
+    def update(self, component_name: str, source_hashes: dict[str, str], options_fingerprint: str) -> None:
+        """
+        Records a successful run of a component and saves the manifest.
+        """
+        with self._lock:
+            self._entries[component_name] = {"sources": source_hashes, "options": options_fingerprint}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with atomic_write(self.path) as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
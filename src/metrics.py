@@ -0,0 +1,307 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Optional
+from src.profiler import Profiler, get_active_profiler
+from src.utils import atomic_write
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak memory is then only reported while tracemalloc traces.
+    resource = None
+
+STAGE_NAMES = {
+    1: "read",
+    2: "extract",
+    3: "align",
+    4: "compare",
+    5: "report",
+    6: "review",
+    7: "generate",
+}
+# Counters recorded for every stage, incremented with count() while the stage runs.
+COUNTERS = ("llmCalls", "promptTokens", "completionTokens", "retries", "cacheHits", "cacheMisses")
+PROMETHEUS_PREFIX = "docunify"
+
+# The record of the stage running in the current thread, or in the thread that
+# submitted the current task (see propagate()).
+_current_record: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_stage_record", default=None)
+_counter_lock = threading.Lock()
+
+
+def count(counter: str, amount: float = 1) -> None:
+    """
+    Adds amount to a counter of the stage running in the current context. Does nothing
+    outside a tracked stage.
+    """
+    record = _current_record.get()
+    if record is not None:
+        with _counter_lock:
+            record[counter] = record.get(counter, 0) + amount
+
+
+def propagate(fn: Callable) -> Callable:
+    """
+    Wraps fn so that, when run on a worker thread, its counters and CPU time are added
+    to the stage that was running where propagate() was called.
+    """
+    record = _current_record.get()
+
+    def run_in_stage(*args, **kwargs):
+        token = _current_record.set(record)
+        cpu_started = time.thread_time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_record.reset(token)
+            if record is not None:
+                with _counter_lock:
+                    record["cpuSeconds"] += time.thread_time() - cpu_started
+
+    return run_in_stage
+
+
+def _peak_memory_bytes() -> Optional[int]:
+    # Imported here, as in src.profiler, so that starting the CLI does not pay for tracemalloc.
+    import tracemalloc
+
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class JsonLinesSink:
+    """
+    Appends every stage record to a file as one JSON object per line.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusTextSink:
+    """
+    Keeps running totals per component and stage and rewrites them to a file in the
+    Prometheus text exposition format after every stage, e.g. for the node exporter's
+    textfile collector.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._totals: dict[tuple[str, str], dict] = {}
+
+    def emit(self, record: dict) -> None:
+        with self._lock:
+            totals = self._totals.setdefault((record["component"], record["stageName"]), {"runs": 0})
+            totals["runs"] += 1
+            for key in ("wallSeconds", "cpuSeconds") + COUNTERS:
+                totals[key] = totals.get(key, 0) + record[key]
+            if record["peakMemoryBytes"] is not None:
+                totals["peakMemoryBytes"] = max(totals.get("peakMemoryBytes", 0), record["peakMemoryBytes"])
+            self._write()
+
+    def _write(self) -> None:
+        metrics = [
+            ("stage_runs_total", "counter", "Completed stage runs.", "runs"),
+            ("stage_wall_seconds_total", "counter", "Wall-clock time spent in the stage.", "wallSeconds"),
+            ("stage_cpu_seconds_total", "counter", "CPU time spent in the stage.", "cpuSeconds"),
+            ("stage_llm_calls_total", "counter", "LLM calls made by the stage.", "llmCalls"),
+            ("stage_prompt_tokens_total", "counter", "Estimated prompt tokens sent by the stage.", "promptTokens"),
+            ("stage_completion_tokens_total", "counter", "Estimated completion tokens received by the stage.", "completionTokens"),
+            ("stage_retries_total", "counter", "LLM call retries made by the stage.", "retries"),
+            ("stage_cache_hits_total", "counter", "LLM cache hits in the stage.", "cacheHits"),
+            ("stage_cache_misses_total", "counter", "LLM cache misses in the stage.", "cacheMisses"),
+            ("stage_peak_memory_bytes", "gauge", "Highest peak memory seen at the end of the stage.", "peakMemoryBytes"),
+        ]
+        lines = []
+        for name, metric_type, help_text, key in metrics:
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {metric_type}")
+            for (component, stage_name), totals in sorted(self._totals.items()):
+                if key in totals:
+                    labels = f'component="{_escape_label(component)}",stage="{stage_name}"'
+                    lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{labels}}} {totals[key]}")
+        with atomic_write(self.path) as f:
+            f.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def create_sink(path: str):
+    """
+    Creates a sink for path: Prometheus text for a '.prom' file, JSON lines otherwise.
+    """
+    if path.endswith(".prom"):
+        return PrometheusTextSink(path)
+    return JsonLinesSink(path)
+
+
+class MetricsRecorder:
+    """
+    Collects one record per stage and component and sends it to every sink.
+
+    A record has 'component', 'stage', 'stageName', 'startedAt', 'wallSeconds',
+    'cpuSeconds', 'peakMemoryBytes' and the COUNTERS. CPU time covers the thread
+    running the stage and the worker threads started through propagate(). Peak memory
+    is the traced peak during the stage while tracemalloc is tracing, and otherwise the
+    process's peak resident set size so far.
+
+    Args:
+        sinks: Objects with emit(record) and close() methods.
+    """
+
+    def __init__(self, sinks: Optional[list] = None):
+        self.sinks = list(sinks or [])
+        self._lock = threading.Lock()
+        self._totals_by_stage: dict[int, dict] = {}
+
+    def record(self, record: dict) -> None:
+        with self._lock:
+            totals = self._totals_by_stage.setdefault(record["stage"], {"runs": 0})
+            totals["runs"] += 1
+            for key in ("wallSeconds", "cpuSeconds") + COUNTERS:
+                totals[key] = totals.get(key, 0) + record[key]
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def totals_by_stage(self) -> dict[int, dict]:
+        """
+        Returns the totals of every recorded stage across components, by stage number.
+        """
+        with self._lock:
+            return {stage: dict(totals) for stage, totals in sorted(self._totals_by_stage.items())}
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class StageTracker:
+    """
+    Tracks the stages of one component's workflow run. begin() ends the previous stage
+    and starts the next one; leaving the with block ends the last one.
+
+    Args:
+        recorder: Where finished stage records go.
+        component: The component being processed.
+        profiler: Profiles every stage, if given (see src.profiler).
+        With neither a recorder nor a profiler, tracking is a no-op.
+    """
+
+    def __init__(self, recorder: Optional[MetricsRecorder], component: str, profiler: Optional[Profiler] = None):
+        self.recorder = recorder
+        self.component = component
+        self.profiler = profiler
+        self._record = None
+        self._token = None
+        self._profile = None
+
+    def begin(self, stage: int) -> None:
+        self._finish()
+        if self.profiler is not None:
+            self._profile = self.profiler.start(self.component, stage, STAGE_NAMES[stage])
+        if self.recorder is None:
+            return
+        import tracemalloc # See _peak_memory_bytes.
+
+        self._record = {
+            "component": self.component,
+            "stage": stage,
+            "stageName": STAGE_NAMES[stage],
+            "startedAt": time.time(),
+            "wallSeconds": 0.0,
+            "cpuSeconds": 0.0,
+            "peakMemoryBytes": None,
+            **{counter: 0 for counter in COUNTERS},
+        }
+        self._token = _current_record.set(self._record)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+
+    def _finish(self) -> None:
+        if self._profile is not None:
+            self._profile.stop()
+            self._profile = None
+        if self._record is None:
+            return
+        record = self._record
+        with _counter_lock:
+            record["wallSeconds"] = time.perf_counter() - self._wall_started
+            record["cpuSeconds"] += time.thread_time() - self._cpu_started
+        record["peakMemoryBytes"] = _peak_memory_bytes()
+        _current_record.reset(self._token)
+        self._record = None
+        self.recorder.record(record)
+
+    def __enter__(self) -> "StageTracker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._finish()
+
+
+_active_recorder: Optional[MetricsRecorder] = None
+
+
+def configure_metrics(paths: list[str], sinks: Optional[list] = None) -> MetricsRecorder:
+    """
+    Enables process-wide stage metrics, written to one sink per path (see create_sink)
+    and to any additional sinks given.
+
+    Returns:
+        The active MetricsRecorder instance.
+    """
+    global _active_recorder
+    disable_metrics()
+    _active_recorder = MetricsRecorder([create_sink(path) for path in paths] + list(sinks or []))
+    return _active_recorder
+
+
+def disable_metrics() -> None:
+    """
+    Disables (and closes the sinks of) the process-wide recorder, if one is active.
+    """
+    global _active_recorder
+    if _active_recorder is not None:
+        _active_recorder.close()
+    _active_recorder = None
+
+
+def get_active_metrics() -> Optional[MetricsRecorder]:
+    return _active_recorder
+
+
+def track_stages(component: str) -> StageTracker:
+    """
+    Returns a StageTracker for component that records to the active recorder and
+    profiles with the active profiler, if any.
+    """
+    return StageTracker(_active_recorder, component, get_active_profiler())
@@ -0,0 +1,206 @@
+import sys
+from collections.abc import Mapping
+from typing import Union
+from src.utils import OutputMarkers
+
+# Compact, slotted records for the per-source and per-field data of the workflow.
+# They read like the dicts they replace (record["lastUpdated"], record.get(...),
+# "value" in record, record["modified"] = True), so code written against the dict
+# schemas accepts both; from_dict()/to_dict() convert at the JSON boundaries
+# (checkpoints, LLM prompts, dumps). Source names, field names and dates repeat
+# across records and are interned, so each distinct string is stored once.
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class _Record(Mapping):
+    """
+    Base of the slotted records. _KEYS maps the dict keys of the existing schema to the
+    attribute names; a key whose attribute was never set is absent, as in the dict.
+    """
+    __slots__ = ()
+    _KEYS: dict[str, str] = {}
+    _INTERNED_KEYS: frozenset = frozenset()
+
+    def __init__(self, **attributes):
+        keys_by_attribute = {attribute: key for key, attribute in self._KEYS.items()}
+        for attribute, value in attributes.items():
+            if attribute not in keys_by_attribute:
+                raise TypeError(f"{type(self).__name__} has no attribute {attribute!r}")
+            self[keys_by_attribute[attribute]] = value
+
+    @classmethod
+    def from_dict(cls, data: Mapping):
+        """
+        Creates a record from a dict of the existing schema. Unknown keys are dropped and
+        records are returned unchanged.
+        """
+        if isinstance(data, cls):
+            return data
+        record = cls.__new__(cls)
+        for key, attribute in cls._KEYS.items():
+            if key in data:
+                value = data[key]
+                object.__setattr__(record, attribute, _intern(value) if key in cls._INTERNED_KEYS else value)
+        return record
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def __getitem__(self, key: str):
+        attribute = self._KEYS.get(key)
+        if attribute is None:
+            raise KeyError(key)
+        try:
+            return getattr(self, attribute)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self._KEYS:
+            raise KeyError(f"{type(self).__name__} has no key {key!r}")
+        setattr(self, self._KEYS[key], _intern(value) if key in self._INTERNED_KEYS else value)
+
+    def __iter__(self):
+        for key, attribute in self._KEYS.items():
+            if hasattr(self, attribute):
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ExtractedField(_Record):
+    """
+    A field extracted from one source: fieldName, fieldValue, isRequired, lastUpdated.
+    """
+    __slots__ = ("field_name", "field_value", "is_required", "last_updated")
+    _KEYS = {"fieldName": "field_name", "fieldValue": "field_value",
+             "isRequired": "is_required", "lastUpdated": "last_updated"}
+    _INTERNED_KEYS = frozenset({"fieldName", "lastUpdated"})
+
+
+class AlignedField(_Record):
+    """
+    One source's entry of an aligned field: originalValue, lastUpdated, isRequired.
+    A source without the field is represented by the ENUM.NO_FIELD string instead.
+    """
+    __slots__ = ("original_value", "last_updated", "is_required")
+    _KEYS = {"originalValue": "original_value", "lastUpdated": "last_updated", "isRequired": "is_required"}
+    _INTERNED_KEYS = frozenset({"lastUpdated"})
+
+
+class SourceEvaluation(_Record):
+    """
+    One source's entry in the diff of an evaluated field: modified, value, originalValue,
+    lastUpdated, isRequired, confidence. Entries of sources without the field only have
+    modified, value (ENUM.NO_FIELD) and confidence.
+    """
+    __slots__ = ("modified", "value", "original_value", "last_updated", "is_required", "confidence")
+    _KEYS = {"modified": "modified", "value": "value", "originalValue": "original_value",
+             "lastUpdated": "last_updated", "isRequired": "is_required", "confidence": "confidence"}
+    _INTERNED_KEYS = frozenset({"lastUpdated"})
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "SourceEvaluation":
+        record = super().from_dict(data)
+        # Unless a reviewer changed it, value is a copy of originalValue; keep one string.
+        if getattr(record, "value", None) is not None and record.value == getattr(record, "original_value", None):
+            record.value = record.original_value
+        return record
+
+
+class FieldEvaluation(_Record):
+    """
+    The evaluation of one field: diff (source name -> SourceEvaluation), truthSource,
+    explanation, confidenceOverall.
+    """
+    __slots__ = ("diff", "truth_source", "explanation", "confidence_overall")
+    _KEYS = {"diff": "diff", "truthSource": "truth_source", "explanation": "explanation",
+             "confidenceOverall": "confidence_overall"}
+    _INTERNED_KEYS = frozenset({"truthSource"})
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "FieldEvaluation":
+        if isinstance(data, cls):
+            return data
+        record = super().from_dict(data)
+        if "diff" in data:
+            record.diff = {
+                sys.intern(source_name): SourceEvaluation.from_dict(entry) if isinstance(entry, Mapping) else entry
+                for source_name, entry in data["diff"].items()
+            }
+        return record
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        if "diff" in data:
+            data["diff"] = {
+                source_name: entry.to_dict() if isinstance(entry, _Record) else entry
+                for source_name, entry in data["diff"].items()
+            }
+        return data
+
+
+def json_default(value):
+    """
+    The json.dump(s) default= hook that serializes records as their dicts.
+    """
+    if isinstance(value, _Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def extracted_from_dict(extracted_data_by_source: dict[str, list[dict]]) -> dict[str, list[ExtractedField]]:
+    return {
+        sys.intern(source_name): [ExtractedField.from_dict(field) for field in fields]
+        for source_name, fields in extracted_data_by_source.items()
+    }
+
+
+def extracted_to_dict(extracted_data_by_source: dict[str, list[Mapping]]) -> dict[str, list[dict]]:
+    return {
+        source_name: [dict(field) for field in fields]
+        for source_name, fields in extracted_data_by_source.items()
+    }
+
+
+def aligned_from_dict(aligned_field_data: dict) -> dict[str, dict[str, Union[AlignedField, str]]]:
+    no_field = str(OutputMarkers.NO_FIELD)
+    return {
+        sys.intern(field_name): {
+            sys.intern(source_name): AlignedField.from_dict(entry) if isinstance(entry, Mapping) else
+            (no_field if entry == no_field else entry)
+            for source_name, entry in entries.items()
+        }
+        for field_name, entries in aligned_field_data.items()
+    }
+
+
+def aligned_to_dict(aligned_field_data: dict) -> dict:
+    return {
+        field_name: {
+            source_name: dict(entry) if isinstance(entry, Mapping) else entry
+            for source_name, entry in entries.items()
+        }
+        for field_name, entries in aligned_field_data.items()
+    }
+
+
+def evaluations_from_dict(evaluated_data: dict) -> dict[str, FieldEvaluation]:
+    return {
+        sys.intern(field_name): FieldEvaluation.from_dict(evaluation)
+        for field_name, evaluation in evaluated_data.items()
+    }
+
+
+def evaluations_to_dict(evaluated_data: dict) -> dict[str, dict]:
+    return {
+        field_name: evaluation.to_dict() if isinstance(evaluation, _Record) else evaluation
+        for field_name, evaluation in evaluated_data.items()
+    }
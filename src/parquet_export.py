@@ -0,0 +1,174 @@
+import importlib.util
+import os
+from collections.abc import Mapping
+from datetime import date
+from typing import Optional
+from src.report_generator import needs_review
+from src.utils import atomic_write
+
+DEFAULT_PARQUET_DIR = os.path.join("output", "parquet")
+PARTITION_COLUMN = "component"
+
+
+def _schema(pa):
+    source_type = pa.struct([
+        ("source", pa.string()),
+        ("present", pa.bool_()),
+        ("modified", pa.bool_()),
+        ("value", pa.string()),
+        ("original_value", pa.string()),
+        ("is_required", pa.bool_()),
+        ("last_updated", pa.date32()),
+        ("confidence", pa.float64()),
+    ])
+    return pa.schema([
+        ("field_name", pa.string()),
+        ("truth_source", pa.string()),
+        ("truth_value", pa.string()),
+        ("truth_is_required", pa.bool_()),
+        ("truth_last_updated", pa.date32()),
+        ("overall_confidence", pa.float64()),
+        ("needs_review", pa.bool_()),
+        ("explanation", pa.string()),
+        ("sources", pa.list_(source_type)),
+    ])
+
+
+def pyarrow_available() -> bool:
+    """
+    Returns whether pyarrow is installed, without importing it.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _import_pyarrow():
+    # pyarrow is optional and slow to import, so it is only imported by the functions
+    # that need it, not by importing this module (and src.main).
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The Parquet export needs the pyarrow package (pip install pyarrow).") from e
+    return pyarrow
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _flag(value) -> Optional[bool]:
+    return value if value is True or value is False else None
+
+
+def component_table(evaluated_data: dict, review_threshold: float = 0.9):
+    """
+    Returns a component's evaluated data as a pyarrow Table with one row per field.
+
+    Columns are typed: confidences are floats, required and review flags are bools
+    (null when the value is not a bool) and lastUpdated dates are dates (null when
+    they do not start with an ISO date). The per-source details are a nested list of
+    structs in the sources column rather than a JSON string. Values are stored as text.
+
+    Args:
+        evaluated_data: Dictionary output from field_comparer.py. Its values may also be
+                        FieldEvaluation records (see src.models).
+        review_threshold: Confidence score below which a field is marked for review.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    pa = _import_pyarrow()
+    schema = _schema(pa)
+    parsed_dates = {}
+
+    def to_date(value) -> Optional[date]:
+        # Dates repeat across sources and fields, so each distinct one is parsed once.
+        if value not in parsed_dates:
+            try:
+                parsed_dates[value] = date.fromisoformat(str(value)[:10])
+            except (TypeError, ValueError):
+                parsed_dates[value] = None
+        return parsed_dates[value]
+
+    columns = {name: [] for name in schema.names}
+    for field_name, field_info in evaluated_data.items():
+        diff = field_info.get("diff", {})
+        truth_source = field_info.get("truthSource")
+        truth_details = diff.get(truth_source) if truth_source else None
+        if not isinstance(truth_details, Mapping):
+            truth_details = {"value": truth_details} if truth_details is not None else {}
+        overall_confidence = field_info.get("confidenceOverall", 0.0)
+
+        columns["field_name"].append(field_name)
+        columns["truth_source"].append(truth_source)
+        columns["truth_value"].append(_text(truth_details.get("value")))
+        columns["truth_is_required"].append(_flag(truth_details.get("isRequired")))
+        columns["truth_last_updated"].append(to_date(truth_details.get("lastUpdated")))
+        columns["overall_confidence"].append(float(overall_confidence))
+        columns["needs_review"].append(needs_review(truth_source, overall_confidence, review_threshold))
+        columns["explanation"].append(_text(field_info.get("explanation")))
+        columns["sources"].append([
+            {
+                "source": source_name,
+                "present": "originalValue" in entry,
+                "modified": _flag(entry.get("modified")),
+                "value": _text(entry.get("value")),
+                "original_value": _text(entry.get("originalValue")),
+                "is_required": _flag(entry.get("isRequired")),
+                "last_updated": to_date(entry.get("lastUpdated")),
+                "confidence": entry.get("confidence"),
+            } if isinstance(entry, Mapping) else {"source": source_name, "present": False, "value": _text(entry)}
+            for source_name, entry in diff.items()
+        ])
+    return pa.table(columns, schema=schema)
+
+
+def component_parquet_path(output_dir: str, component_name: str) -> str:
+    """
+    Returns the file of a component in a Parquet report directory. Components are
+    hive-style partitions (component=<name>/), so readers can select them by name.
+    """
+    from urllib.parse import quote
+    return os.path.join(output_dir, f"{PARTITION_COLUMN}={quote(component_name, safe='')}", "report.parquet")
+
+
+def export_parquet_report(component_name: str, evaluated_data: dict, output_dir: str = DEFAULT_PARQUET_DIR,
+                          review_threshold: float = 0.9) -> str:
+    """
+    Writes a component's evaluated data (see component_table) to its partition of a
+    Parquet report directory, replacing the previous file atomically.
+
+    Returns:
+        The path of the written file.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    pa = _import_pyarrow()
+    table = component_table(evaluated_data, review_threshold)
+    path = component_parquet_path(output_dir, component_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_write(path, 'wb') as parquet_file:
+        pa.parquet.write_table(table, parquet_file)
+    return path
+
+
+def read_parquet_report(output_dir: str = DEFAULT_PARQUET_DIR, columns: Optional[list[str]] = None,
+                        components: Optional[list[str]] = None):
+    """
+    Loads a Parquet report directory as one pyarrow Table with a component column.
+
+    Args:
+        output_dir: The directory written by export_parquet_report.
+        columns: The columns to read (all by default); other columns are not read.
+        components: The components to read (all by default); other partitions are skipped.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    pa = _import_pyarrow()
+    # Component names are always strings, even those that look like numbers.
+    partitioning = pa.dataset.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    filters = [(PARTITION_COLUMN, "in", list(components))] if components is not None else None
+    return pa.parquet.read_table(output_dir, columns=columns, filters=filters, partitioning=partitioning)
@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable
+
+DEFAULT_QUEUE_SIZE = 8
+
+_END = object() # Tells a worker that no more items will come.
+
+
+class PipelineStage:
+    """
+    One stage of a Pipeline.
+
+    Args:
+        name: Name of the stage, used in the stats.
+        fn: Called with every item. Returns True to pass the item on to the next stage,
+            or False when the item is finished. An exception also finishes the item.
+        workers: Number of threads running fn concurrently.
+    """
+
+    def __init__(self, name: str, fn: Callable[[object], bool], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+
+
+class Pipeline:
+    """
+    Streams items through a sequence of stages. Every stage has its own worker threads
+    and a bounded input queue, so different items are in different stages at the same
+    time: while one item waits on a slow stage, the next ones move through the others.
+
+    A full queue blocks the stage feeding it (backpressure), so at most about
+    queue_size + workers items wait in or are handled by each stage, however many
+    items there are. Items are taken lazily from the iterable passed to run().
+
+    Args:
+        stages: The stages, in order.
+        queue_size: Capacity of each stage's input queue.
+    """
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._stats = {
+            stage.name: {"items": 0, "busySeconds": 0.0, "idleSeconds": 0.0, "blockedSeconds": 0.0}
+            for stage in stages
+        }
+        self._lock = threading.Lock()
+
+    def run(self, items: Iterable) -> list[dict]:
+        """
+        Runs every item through the stages and waits until all are finished.
+
+        Returns:
+            One result per item, in input order, with keys 'item', 'stage' (the name of
+            the last stage that ran), 'error' (the exception that finished the item, or
+            None) and 'seconds' (from entering the first stage to finishing).
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        live_workers = [stage.workers for stage in self.stages]
+        results = {}
+
+        def finish(index: int, item, stage: PipelineStage, error, started: float) -> None:
+            with self._lock:
+                results[index] = {"item": item, "stage": stage.name, "error": error,
+                                  "seconds": time.perf_counter() - started}
+
+        def work(position: int) -> None:
+            stage = self.stages[position]
+            stats = self._stats[stage.name]
+            inbox = queues[position]
+            outbox = queues[position + 1] if position + 1 < len(queues) else None
+            try:
+                while True:
+                    waiting = time.perf_counter()
+                    entry = inbox.get()
+                    busy = time.perf_counter()
+                    if entry is _END:
+                        break
+                    index, item, started = entry
+                    if position == 0:
+                        started = busy
+                    try:
+                        passed_on = stage.fn(item) and outbox is not None
+                        error = None
+                    except Exception as e:
+                        passed_on, error = False, e
+                    done = time.perf_counter()
+                    if passed_on:
+                        outbox.put((index, item, started))
+                    else:
+                        finish(index, item, stage, error, started)
+                    with self._lock:
+                        stats["items"] += 1
+                        stats["idleSeconds"] += busy - waiting
+                        stats["busySeconds"] += done - busy
+                        stats["blockedSeconds"] += time.perf_counter() - done
+            finally:
+                # The last worker of a stage to stop tells the next stage's workers to stop.
+                with self._lock:
+                    live_workers[position] -= 1
+                    last = live_workers[position] == 0
+                if last and outbox is not None:
+                    for _ in range(self.stages[position + 1].workers):
+                        outbox.put(_END)
+
+        threads = [
+            threading.Thread(target=work, args=(position,), name=f"pipeline-{stage.name}-{worker}", daemon=True)
+            for position, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        count = 0
+        try:
+            for count, item in enumerate(items, start=1):
+                queues[0].put((count - 1, item, None))
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_END)
+            for thread in threads:
+                thread.join()
+        return [results[index] for index in range(count)]
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Returns, per stage, the number of items handled and the seconds its workers spent
+        busy, idle (waiting for input) and blocked (waiting for room in the next stage's
+        queue), summed over workers. A stage that is mostly busy while the stages before
+        it are blocked is the bottleneck and needs more workers.
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
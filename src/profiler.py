@@ -0,0 +1,153 @@
+import io
+import os
+from contextlib import contextmanager
+from typing import Optional
+from src.logging_setup import get_logger
+
+logger = get_logger("profiler")
+
+DEFAULT_PROFILE_DIR = os.path.join("output", "profiles")
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+
+
+def _take_snapshot():
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    # Leave out the profilers' own allocations.
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)
+    ])
+
+
+class StageProfile:
+    """
+    The cProfile (and optional tracemalloc) capture of one running stage. Created by
+    Profiler.start(); stop() writes the results.
+    """
+
+    def __init__(self, profiler: "Profiler", component: str, stage: int, stage_name: str):
+        import cProfile
+
+        self.profiler = profiler
+        self.path_prefix = os.path.join(profiler.profile_dir, component, f"stage{stage}-{stage_name}")
+        self._snapshot = None
+        if profiler.memory:
+            self._snapshot = _take_snapshot()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            # Python 3.12+ allows only one active cProfile per process, so stages of
+            # components processed concurrently cannot all be profiled.
+            logger.warning("Not profiling stage %d: %s", stage, e, extra={"component": component})
+            self._profile = None
+
+    def stop(self) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        os.makedirs(os.path.dirname(self.path_prefix), exist_ok=True)
+        if self._profile is not None:
+            self._write_stats()
+        if self._snapshot is not None:
+            self._write_allocations()
+
+    def _write_stats(self) -> None:
+        import pstats
+
+        self._profile.dump_stats(f"{self.path_prefix}.pstats")
+        summary = io.StringIO()
+        pstats.Stats(self._profile, stream=summary).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        with open(f"{self.path_prefix}.txt", "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+
+    def _write_allocations(self) -> None:
+        differences = _take_snapshot().compare_to(self._snapshot, "lineno")
+        with open(f"{self.path_prefix}.alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites by change in allocated memory during the stage:\n")
+            for difference in differences[:TOP_ALLOCATIONS]:
+                f.write(f"{difference}\n")
+
+
+class Profiler:
+    """
+    Profiles workflow stages with cProfile and, optionally, tracemalloc.
+
+    For every profiled stage of a component, <profile_dir>/<component>/ receives
+    stage<N>-<name>.pstats (load it with pstats or snakeviz), stage<N>-<name>.txt
+    (the top functions by cumulative time) and, with memory, stage<N>-<name>.alloc.txt
+    (the top allocation sites during the stage). cProfile only sees the thread running
+    the stage, not extraction or comparison worker threads; tracemalloc sees the whole
+    process, including other components processed concurrently.
+
+    Args:
+        profile_dir: Directory receiving one subdirectory per component.
+        memory: Whether to trace allocations with tracemalloc as well.
+    """
+
+    def __init__(self, profile_dir: str = DEFAULT_PROFILE_DIR, memory: bool = False):
+        self.profile_dir = profile_dir
+        self.memory = memory
+        self._started_tracemalloc = False
+        if memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+    def start(self, component: str, stage: int, stage_name: str) -> StageProfile:
+        """
+        Starts profiling a stage in the current thread. Call stop() on the result when it ends.
+        """
+        return StageProfile(self, component, stage, stage_name)
+
+    @contextmanager
+    def stage(self, component: str, stage: int, stage_name: str):
+        """
+        Profiles the body of the with block as one stage.
+        """
+        profile = self.start(component, stage, stage_name)
+        try:
+            yield profile
+        finally:
+            profile.stop()
+
+    def close(self) -> None:
+        if self._started_tracemalloc:
+            import tracemalloc
+
+            tracemalloc.stop()
+
+
+_active_profiler: Optional[Profiler] = None
+
+
+def configure_profiling(profile_dir: str = DEFAULT_PROFILE_DIR, memory: bool = False) -> Profiler:
+    """
+    Enables process-wide stage profiling (see Profiler). Workflow stages are profiled
+    through src.metrics.track_stages.
+
+    Returns:
+        The active Profiler instance.
+    """
+    global _active_profiler
+    disable_profiling()
+    _active_profiler = Profiler(profile_dir, memory)
+    return _active_profiler
+
+
+def disable_profiling() -> None:
+    """
+    Disables the process-wide profiler, if one is active.
+    """
+    global _active_profiler
+    if _active_profiler is not None:
+        _active_profiler.close()
+    _active_profiler = None
+
+
+def get_active_profiler() -> Optional[Profiler]:
+    return _active_profiler
@@ -0,0 +1,215 @@
+from src.utils import OutputMarkers
+
+# Compact, table-style encodings of the LLM stage inputs and responses. Source and
+# field names are sent once and referenced by their index; cells a source does not
+# have are left out. The decoders rebuild the existing schemas from the original
+# input, so the LLM never has to echo values, dates or required flags back.
+
+
+def _extracted_rows(extracted_data_by_source: dict[str, list[dict]]) -> list[tuple[str, dict]]:
+    return [
+        (source_name, field)
+        for source_name, fields in extracted_data_by_source.items()
+        for field in fields
+        if field.get("fieldName") is not None
+    ]
+
+
+def encode_extracted_fields(extracted_data_by_source: dict[str, list[dict]]) -> dict:
+    """
+    Encodes extracted fields for the alignment prompt:
+
+        {"sources": [source names], "rows": [[sourceId, fieldName, fieldValue], ...]}
+
+    Row ids are positions in "rows". Dates and required flags are not needed to match
+    names and are restored by decode_alignment.
+    """
+    source_ids = {source_name: source_id for source_id, source_name in enumerate(extracted_data_by_source)}
+    return {
+        "sources": list(source_ids),
+        "rows": [
+            [source_ids[source_name], field["fieldName"], field.get("fieldValue")]
+            for source_name, field in _extracted_rows(extracted_data_by_source)
+        ],
+    }
+
+
+def decode_alignment(response: dict, extracted_data_by_source: dict[str, list[dict]]) -> dict:
+    """
+    Decodes a {"field name": [row ids]} alignment response into the aligned field schema.
+
+    Within a group, the first row of each source wins; rows the response leaves out
+    become groups of their own under their field name. A response that already uses
+    the aligned field schema is returned unchanged.
+
+    Args:
+        response: The parsed LLM response.
+        extracted_data_by_source: The extracted fields the prompt was encoded from.
+
+    Returns:
+        A dictionary with the same schema as field_aligner.align_and_normalize_fields.
+    """
+    if any(isinstance(entries, dict) for entries in response.values()):
+        return response
+
+    rows = _extracted_rows(extracted_data_by_source)
+    grouped = [
+        (field_name, [row_id for row_id in row_ids if isinstance(row_id, int) and 0 <= row_id < len(rows)])
+        for field_name, row_ids in response.items()
+    ]
+    seen = {row_id for _, row_ids in grouped for row_id in row_ids}
+    for row_id, (_, field) in enumerate(rows):
+        if row_id not in seen:
+            grouped.append((field["fieldName"], [row_id]))
+
+    no_field = str(OutputMarkers.NO_FIELD)
+    aligned_data = {}
+    for field_name, row_ids in grouped:
+        entries = aligned_data.setdefault(field_name, {})
+        for row_id in row_ids:
+            source_name, field = rows[row_id]
+            entries.setdefault(source_name, {
+                "originalValue": field.get("fieldValue"),
+                "lastUpdated": field.get("lastUpdated"),
+                "isRequired": field.get("isRequired"),
+            })
+    return {
+        field_name: {source_name: entries.get(source_name, no_field) for source_name in extracted_data_by_source}
+        for field_name, entries in aligned_data.items()
+    }
+
+
+def _source_names(aligned_field_data: dict) -> list[str]:
+    source_names = {}
+    for entries in aligned_field_data.values():
+        for source_name in entries:
+            source_names.setdefault(source_name, None)
+    return list(source_names)
+
+
+def encode_aligned_fields(aligned_field_data: dict) -> dict:
+    """
+    Encodes aligned field data for the comparison prompt:
+
+        {"sources": [source names], "fields": [field names],
+         "rows": [[fieldId, sourceId, value, lastUpdated, isRequired (1/0)], ...]}
+
+    Cells marked ENUM.NO_FIELD are left out.
+    """
+    source_names = _source_names(aligned_field_data)
+    source_ids = {source_name: source_id for source_id, source_name in enumerate(source_names)}
+    rows = []
+    for field_id, entries in enumerate(aligned_field_data.values()):
+        for source_name, entry in entries.items():
+            if isinstance(entry, dict):
+                is_required = entry.get("isRequired")
+                rows.append([
+                    field_id, source_ids[source_name], entry.get("originalValue"), entry.get("lastUpdated"),
+                    int(is_required) if isinstance(is_required, bool) else is_required,
+                ])
+    return {"sources": source_names, "fields": list(aligned_field_data), "rows": rows}
+
+
+def decode_aligned_fields(encoded: dict) -> dict:
+    """
+    Rebuilds aligned field data from encode_aligned_fields output (the inverse of
+    encode_aligned_fields). Cells that were left out become ENUM.NO_FIELD.
+    """
+    no_field = str(OutputMarkers.NO_FIELD)
+    aligned_field_data = {
+        field_name: {source_name: no_field for source_name in encoded["sources"]}
+        for field_name in encoded["fields"]
+    }
+    for field_id, source_id, value, last_updated, is_required in encoded["rows"]:
+        aligned_field_data[encoded["fields"][field_id]][encoded["sources"][source_id]] = {
+            "originalValue": value,
+            "lastUpdated": last_updated,
+            "isRequired": bool(is_required) if isinstance(is_required, int) else is_required,
+        }
+    return aligned_field_data
+
+
+def encode_evaluations(evaluated_data: dict, aligned_field_data: dict) -> dict:
+    """
+    Encodes evaluated data as a compact comparison response (the inverse of decode_evaluations):
+
+        {"<fieldId>": {"t": truth sourceId or null, "c": overall confidence,
+                       "e": explanation, "s": [confidence of each source]}}
+    """
+    source_names = _source_names(aligned_field_data)
+    source_ids = {source_name: source_id for source_id, source_name in enumerate(source_names)}
+    response = {}
+    for field_id, field_name in enumerate(aligned_field_data):
+        if field_name not in evaluated_data:
+            continue
+        evaluation = evaluated_data[field_name]
+        response[str(field_id)] = {
+            "t": source_ids.get(evaluation.get("truthSource")),
+            "c": evaluation.get("confidenceOverall"),
+            "e": evaluation.get("explanation"),
+            "s": [evaluation["diff"].get(source_name, {}).get("confidence") for source_name in source_names],
+        }
+    return response
+
+
+def decode_evaluations(response: dict, aligned_field_data: dict, no_truth_source: str) -> dict:
+    """
+    Decodes a compact comparison response into the evaluated data schema.
+
+    Values, dates and required flags come from aligned_field_data. A response that
+    already uses the evaluated data schema is returned unchanged.
+
+    Args:
+        response: The parsed LLM response, keyed by field id.
+        aligned_field_data: The aligned field data the prompt was encoded from.
+        no_truth_source: The truthSource of a field no source provides.
+
+    Returns:
+        A dictionary with the same schema as field_comparer.compare_and_evaluate_fields,
+        for the fields in the response.
+
+    Raises:
+        ValueError: If the response refers to unknown fields or sources or lacks source confidences.
+    """
+    if any(isinstance(evaluation, dict) and "diff" in evaluation for evaluation in response.values()):
+        return response
+
+    no_field = str(OutputMarkers.NO_FIELD)
+    source_names = _source_names(aligned_field_data)
+    source_ids = {source_name: source_id for source_id, source_name in enumerate(source_names)}
+    field_names = list(aligned_field_data)
+    evaluated_data = {}
+    for field_key, evaluation in response.items():
+        try:
+            if int(field_key) < 0:
+                raise IndexError("negative field id")
+            field_name = field_names[int(field_key)]
+            confidences = evaluation["s"]
+            truth_id = evaluation.get("t")
+            truth_source = no_truth_source if truth_id is None else source_names[int(truth_id)]
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            raise ValueError(f"Malformed comparison response for field {field_key!r}: {e}") from e
+        if len(confidences) != len(source_names):
+            raise ValueError(f"Expected {len(source_names)} source confidences for field {field_key!r}, got {len(confidences)}.")
+
+        diff = {}
+        for source_name, entry in aligned_field_data[field_name].items():
+            confidence = confidences[source_ids[source_name]]
+            if not isinstance(entry, dict):
+                diff[source_name] = {"modified": False, "value": no_field, "confidence": confidence}
+                continue
+            diff[source_name] = {
+                "modified": False,
+                "value": entry.get("originalValue"),
+                "originalValue": entry.get("originalValue"),
+                "lastUpdated": entry.get("lastUpdated"),
+                "isRequired": entry.get("isRequired"),
+                "confidence": confidence,
+            }
+        evaluated_data[field_name] = {
+            "diff": diff,
+            "truthSource": truth_source,
+            "explanation": evaluation.get("e", ""),
+            "confidenceOverall": evaluation.get("c"),
+        }
+    return evaluated_data
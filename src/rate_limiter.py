@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how many LLM calls may start per second.
+
+    Args:
+        calls_per_second: Sustained rate of calls allowed.
+        burst: Number of calls that may start back to back before throttling kicks in.
+    """
+
+    def __init__(self, calls_per_second: float, burst: int = 1):
+        if calls_per_second <= 0:
+            raise ValueError("calls_per_second must be greater than 0.")
+        self.calls_per_second = calls_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a call may start.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.calls_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.calls_per_second
+            time.sleep(wait_seconds)
@@ -1,72 +1,271 @@
 import csv
 import json
-from src.utils import OutputMarkers # Not strictly needed for writing, but good for context
+import threading
+from collections.abc import Mapping
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Iterable, Iterator
+from src.models import json_default
+from src.utils import OutputMarkers, atomic_write
 
-def generate_csv_report(evaluated_data: dict, output_csv_path: str, review_threshold: float = 0.9) -> None:
+if TYPE_CHECKING:
+    from src.field_matrix import FieldMatrix
+
+HEADER = [
+    "FieldName", "TruthSource", "TruthValue", "TruthIsRequired",
+    "TruthLastUpdated", "OverallConfidence", "NeedsReview", "AllSourcesDetailsJSON"
+]
+# How the per-source details column is written: as JSON, as zlib-compressed and
+# base64-encoded JSON (see decode_details), or not at all.
+DETAILS_MODES = ("full", "compressed", "omit")
+COMPRESSED_DETAILS_COLUMN = "AllSourcesDetailsJSONZlib"
+DEFAULT_REPORT_BUFFER_SIZE = 1024 * 1024
+
+
+def report_header(details: str = "full") -> list[str]:
+    """
+    Returns the report columns for a details mode (see DETAILS_MODES).
+
+    Raises:
+        ValueError: If details is not one of DETAILS_MODES.
+    """
+    if details not in DETAILS_MODES:
+        raise ValueError(f"Unknown details mode {details!r}, expected one of {', '.join(DETAILS_MODES)}")
+    if details == "omit":
+        return HEADER[:-1]
+    if details == "compressed":
+        return HEADER[:-1] + [COMPRESSED_DETAILS_COLUMN]
+    return list(HEADER)
+
+
+def _details_cells(diff, details: str) -> list[str]:
+    if details == "omit":
+        return []
+    details_json = json.dumps(diff, default=json_default)
+    if details == "compressed":
+        import base64
+        import zlib
+
+        return [base64.b64encode(zlib.compress(details_json.encode("utf-8"))).decode("ascii")]
+    return [details_json]
+
+
+def decode_details(cell: str, compressed: bool = False) -> dict:
+    """
+    Returns the per-source details of a report row from its AllSourcesDetailsJSON cell,
+    or from its AllSourcesDetailsJSONZlib cell when compressed is True.
+    """
+    if compressed:
+        import base64
+        import zlib
+
+        cell = zlib.decompress(base64.b64decode(cell)).decode("utf-8")
+    return json.loads(cell)
+
+
+def _matrix_rows(matrix: "FieldMatrix", review_threshold: float, details: str):
+    """
+    Yields the report rows of a scored FieldMatrix. The truth cells are read from the
+    per-field columns; only the details JSON visits every cell.
+    """
+    width = matrix.width
+    for field_id, field_name in enumerate(matrix.field_names):
+        truth_id = matrix.truth_ids[field_id]
+        truth_source = matrix.source_names[truth_id] if truth_id >= 0 else "NO_TRUTH_SOURCE_FOUND"
+        overall_confidence = matrix.confidence_overall[field_id]
+        truth_value = truth_is_required = truth_last_updated = "N/A"
+        if truth_id >= 0:
+            truth_cell = field_id * width + truth_id
+            if matrix.is_present(truth_cell):
+                truth_value = matrix.value(truth_cell)
+                truth_is_required = matrix.is_required(truth_cell)
+                truth_last_updated = matrix.last_updated(truth_cell)
+            else:
+                truth_value = str(OutputMarkers.NO_FIELD)
+        diff = None if details == "omit" else {
+            matrix.source_names[cell % width]: matrix.source_evaluation(cell, matrix.confidences[cell])
+            for cell in matrix.listed_cells(field_id)
+        }
+        yield [
+            field_name,
+            truth_source,
+            truth_value,
+            str(truth_is_required),
+            truth_last_updated,
+            str(overall_confidence),
+            str(needs_review(truth_source, overall_confidence, review_threshold)),
+            *_details_cells(diff, details),
+        ]
+
+
+def needs_review(truth_source, overall_confidence: float, review_threshold: float) -> bool:
+    """
+    Returns whether a field is marked for review: its overall confidence is below
+    review_threshold or it has no truth source.
+    """
+    return (overall_confidence < review_threshold) or \
+           (truth_source == "NO_TRUTH_SOURCE_FOUND") or \
+           (truth_source is None)
+
+
+def _evaluation_row(field_name: str, field_info: Mapping, review_threshold: float, details: str) -> list:
+    truth_source = field_info.get('truthSource')
+    overall_confidence = field_info.get('confidenceOverall', 0.0)
+
+    truth_value = "N/A"
+    truth_is_required = "N/A"
+    truth_last_updated = "N/A"
+
+    if truth_source and truth_source in field_info.get('diff', {}):
+        truth_details = field_info['diff'][truth_source]
+        # Check if truth_details is not a string (like "ENUM.NO_FIELD")
+        if isinstance(truth_details, Mapping):
+            truth_value = truth_details.get('value', "N/A")
+            truth_is_required = truth_details.get('isRequired', 'N/A')
+            truth_last_updated = truth_details.get('lastUpdated', 'N/A')
+        else: # Handles case where truth_source points to an "ENUM.NO_FIELD" string
+            truth_value = str(truth_details) # Should be "ENUM.NO_FIELD"
+    elif truth_source == "NO_TRUTH_SOURCE_FOUND": # Explicit check for this marker
+         pass # Defaults N/A are already set
+
+    review = needs_review(truth_source, overall_confidence, review_threshold)
+
+    # More advanced discrepancy check (optional for now, as per instructions)
+    # if not review and isinstance(field_info.get('diff'), dict):
+    #     source_values = []
+    #     for source_data in field_info['diff'].values():
+    #         if isinstance(source_data, dict) and 'value' in source_data:
+    #             if source_data['value'] != str(OutputMarkers.NO_FIELD):
+    #                 source_values.append(source_data['value'])
+    #     if len(set(source_values)) > 1: # More than one unique value exists
+    #         review = True
+
+
+    return [
+        field_name,
+        truth_source if truth_source is not None else "N/A",
+        truth_value,
+        str(truth_is_required), # Ensure boolean is converted to string
+        truth_last_updated,
+        str(overall_confidence), # Ensure float is converted to string
+        str(review), # Ensure boolean is converted to string
+        *_details_cells(field_info.get('diff', {}), details),
+    ]
+
+
+def generate_csv_report(evaluated_data: dict, output_csv_path: str, review_threshold: float = 0.9,
+                        details: str = "full") -> None:
     """
     Generates a CSV report from evaluated field data.
 
     Args:
-        evaluated_data: Dictionary output from field_comparer.py.
+        evaluated_data: Dictionary output from field_comparer.py. Its values may also be
+                        FieldEvaluation records (see src.models). A scored FieldMatrix
+                        (see src.field_matrix) is reported column by column instead.
         output_csv_path: File path for the output CSV.
         review_threshold: Confidence score below which a field is marked for review.
+        details: How the per-source details column is written (see DETAILS_MODES).
     """
-    header = [
-        "FieldName", "TruthSource", "TruthValue", "TruthIsRequired",
-        "TruthLastUpdated", "OverallConfidence", "NeedsReview", "AllSourcesDetailsJSON"
-    ]
+    from src.field_matrix import FieldMatrix
 
-    with open(output_csv_path, 'w', newline='') as csvfile:
+    header = report_header(details)
+    with atomic_write(output_csv_path, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(header)
+        if isinstance(evaluated_data, FieldMatrix):
+            writer.writerows(_matrix_rows(evaluated_data, review_threshold, details))
+            return
+        writer.writerows(
+            _evaluation_row(field_name, field_info, review_threshold, details)
+            for field_name, field_info in evaluated_data.items()
+        )
+
+
+def evaluation_records(component_name: str, evaluated_data: dict) -> Iterator[tuple[str, str, Mapping]]:
+    """
+    Yields the (component, field name, evaluation) records of a component's evaluated
+    data, as consumed by ConsolidatedReport.write().
+    """
+    for field_name, field_info in evaluated_data.items():
+        yield component_name, field_name, field_info
+
+
+class ConsolidatedReport:
+    """
+    One CSV report across many components, written incrementally: the columns of
+    generate_csv_report preceded by a Component column.
+
+    Rows are formatted as the records come in and go straight to a buffered file, so
+    memory stays flat however many components are reported. write() is thread-safe
+    and the rows of one call stay together. The report is written to a temporary file
+    that close() moves into place; if the report is used as a context manager and the
+    block raises, the temporary file is removed and any previous report is kept.
+
+    Args:
+        output_csv_path: File path for the consolidated CSV.
+        review_threshold: Confidence score below which a field is marked for review.
+        details: How the per-source details column is written (see DETAILS_MODES).
+        buffer_size: Size in bytes of the write buffer.
+
+    Raises:
+        ValueError: If details is not one of DETAILS_MODES.
+    """
+
+    def __init__(self, output_csv_path: str, review_threshold: float = 0.9, details: str = "full",
+                 buffer_size: int = DEFAULT_REPORT_BUFFER_SIZE):
+        header = report_header(details)
+        self.output_csv_path = output_csv_path
+        self.review_threshold = review_threshold
+        self.details = details
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._files = ExitStack()
+        csvfile = self._files.enter_context(atomic_write(output_csv_path, 'w', newline='', buffering=buffer_size))
+        self._writer = csv.writer(csvfile)
+        self._writer.writerow(["Component"] + header)
+
+    def write(self, records: Iterable[tuple[str, str, Mapping]]) -> int:
+        """
+        Appends one row per (component, field name, evaluation) record; evaluations
+        follow the schema of field_comparer.compare_and_evaluate_fields. records may be
+        any iterable, including a generator, and is consumed lazily.
+
+        Returns:
+            The number of rows written.
+        """
+        written = 0
+        with self._lock:
+            for component_name, field_name, field_info in records:
+                self._writer.writerow(
+                    [component_name] + _evaluation_row(field_name, field_info, self.review_threshold, self.details)
+                )
+                written += 1
+            self.rows += written
+        return written
 
-        for field_name, field_info in evaluated_data.items():
-            truth_source = field_info.get('truthSource')
-            overall_confidence = field_info.get('confidenceOverall', 0.0)
-
-            truth_value = "N/A"
-            truth_is_required = "N/A"
-            truth_last_updated = "N/A"
-
-            if truth_source and truth_source in field_info.get('diff', {}):
-                truth_details = field_info['diff'][truth_source]
-                # Check if truth_details is not a string (like "ENUM.NO_FIELD")
-                if isinstance(truth_details, dict):
-                    truth_value = truth_details.get('value', "N/A")
-                    truth_is_required = truth_details.get('isRequired', 'N/A')
-                    truth_last_updated = truth_details.get('lastUpdated', 'N/A')
-                else: # Handles case where truth_source points to an "ENUM.NO_FIELD" string
-                    truth_value = str(truth_details) # Should be "ENUM.NO_FIELD"
-            elif truth_source == "NO_TRUTH_SOURCE_FOUND": # Explicit check for this marker
-                 pass # Defaults N/A are already set
-
-            # NeedsReview logic:
-            # True if confidenceOverall < review_threshold OR if truthSource is missing/not found
-            needs_review = (overall_confidence < review_threshold) or \
-                           (truth_source == "NO_TRUTH_SOURCE_FOUND") or \
-                           (truth_source is None)
-            
-            # More advanced discrepancy check (optional for now, as per instructions)
-            # if not needs_review and isinstance(field_info.get('diff'), dict):
-            #     source_values = []
-            #     for source_data in field_info['diff'].values():
-            #         if isinstance(source_data, dict) and 'value' in source_data:
-            #             if source_data['value'] != str(OutputMarkers.NO_FIELD):
-            #                 source_values.append(source_data['value'])
-            #     if len(set(source_values)) > 1: # More than one unique value exists
-            #         needs_review = True
-
-
-            all_sources_details_json = json.dumps(field_info.get('diff', {}))
-
-            row = [
-                field_name,
-                truth_source if truth_source is not None else "N/A",
-                truth_value,
-                str(truth_is_required), # Ensure boolean is converted to string
-                truth_last_updated,
-                str(overall_confidence), # Ensure float is converted to string
-                str(needs_review), # Ensure boolean is converted to string
-                all_sources_details_json
-            ]
-            writer.writerow(row)
+    def close(self) -> None:
+        """
+        Flushes the report and moves it into place.
+        """
+        with self._lock:
+            self._files.close()
+
+    def __enter__(self) -> "ConsolidatedReport":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        with self._lock:
+            return self._files.__exit__(*exc_info)
+
+
+def write_consolidated_report(records: Iterable[tuple[str, str, Mapping]], output_csv_path: str,
+                              review_threshold: float = 0.9, details: str = "full",
+                              buffer_size: int = DEFAULT_REPORT_BUFFER_SIZE) -> int:
+    """
+    Writes a consolidated report (see ConsolidatedReport) from an iterable of
+    (component, field name, evaluation) records, e.g. chained evaluation_records().
+
+    Returns:
+        The number of rows written.
+    """
+    with ConsolidatedReport(output_csv_path, review_threshold, details, buffer_size) as report:
+        return report.write(records)
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from src.doc_reader import is_valid_component_name
+from src.logging_setup import get_logger
+
+logger = get_logger("service")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_PENDING = 1000
+MAX_FINISHED_JOBS = 10000
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Runs component jobs on a bounded worker pool and keeps their status.
+
+    Each job is a dict with 'jobId', 'component', 'status' ("queued", "running",
+    "ok", "skipped" or "failed"), 'submittedAt', 'startedAt', 'finishedAt' and 'detail'.
+    Only the most recent MAX_FINISHED_JOBS finished jobs are kept.
+
+    Args:
+        run_job: Runs the workflow for a component and returns whether it completed
+                 (see main.run_workflow). Exceptions mark the job as failed.
+        workers: Number of jobs run concurrently.
+        max_pending: Maximum number of queued or running jobs before submit() refuses new ones.
+    """
+
+    def __init__(self, run_job: Callable[[str], bool], workers: int = 4, max_pending: int = DEFAULT_MAX_PENDING):
+        self.run_job = run_job
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, component_name: str) -> dict:
+        """
+        Queues a job for a component and returns a snapshot of it.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} jobs are already pending.")
+            job = {
+                "jobId": os.urandom(16).hex(),
+                "component": component_name,
+                "status": "queued",
+                "submittedAt": time.time(),
+                "startedAt": None,
+                "finishedAt": None,
+                "detail": "",
+            }
+            self._jobs[job["jobId"]] = job
+            self._pending += 1
+            snapshot = dict(job)
+        self._executor.submit(self._run, job["jobId"])
+        return snapshot
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["startedAt"] = time.time()
+        try:
+            completed = self.run_job(job["component"])
+            status, detail = ("ok", "") if completed else ("skipped", "no documentation or fields found")
+        except Exception as e:
+            status, detail = "failed", f"{type(e).__name__}: {e}"
+        with self._lock:
+            job.update(status=status, detail=detail, finishedAt=time.time())
+            self._pending -= 1
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job["finishedAt"] is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"pending": self._pending, "jobs": counts}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def parse_job_request(request) -> list[str]:
+    """
+    Returns the component names of a POST /jobs body, {"component": "c1"} or
+    {"components": ["c1", "c2"]}.
+
+    Raises:
+        ValueError: If the body has neither, "components" is not a non-empty list or a
+                    name is not a valid component name (see doc_reader.is_valid_component_name).
+    """
+    if not isinstance(request, dict):
+        raise ValueError("The request body must be a JSON object.")
+    if "components" in request:
+        component_names = request["components"]
+        if not isinstance(component_names, list) or not component_names:
+            raise ValueError("'components' must be a non-empty list of component names.")
+    elif "component" in request:
+        component_names = [request["component"]]
+    else:
+        raise ValueError("The request names no component.")
+    for component_name in component_names:
+        if not is_valid_component_name(component_name):
+            raise ValueError(f"Invalid component name {component_name!r}: expected a non-empty string "
+                             "without path separators or '..'.")
+    return component_names
+
+
+def make_handler(job_queue: JobQueue):
+    """
+    Builds the HTTP request handler class serving a JobQueue:
+
+        POST /jobs        {"component": "c1"} or {"components": ["c1", "c2"]} -> 202 with the queued jobs
+        GET  /jobs        all known jobs
+        GET  /jobs/<id>   one job
+        GET  /health      queue statistics
+    """
+    # Imported here so that only --serve pays for http.server.
+    from http.server import BaseHTTPRequestHandler
+
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, job_queue.stats())
+            elif self.path == "/jobs":
+                self._send_json(200, {"jobs": job_queue.list()})
+            elif self.path.startswith("/jobs/"):
+                job = job_queue.get(self.path[len("/jobs/"):])
+                if job is None:
+                    self._send_json(404, {"error": "Unknown job."})
+                else:
+                    self._send_json(200, job)
+            else:
+                self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {"error": "Not found."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                component_names = parse_job_request(json.loads(self.rfile.read(length) or b"{}"))
+            except ValueError as e:
+                self._send_json(400, {"error": f"Expected {{\"component\": ...}} or {{\"components\": [...]}}: {e}"})
+                return
+            jobs = []
+            try:
+                for component_name in component_names:
+                    jobs.append(job_queue.submit(component_name))
+            except QueueFullError as e:
+                self._send_json(503, {"error": str(e), "jobs": jobs})
+                return
+            self._send_json(202, {"jobs": jobs})
+
+        def log_message(self, format, *args):
+            pass # Job progress is already logged by the workflow.
+
+    return JobRequestHandler
+
+
+def serve(run_job: Callable[[str], bool], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          workers: int = 4, max_pending: int = DEFAULT_MAX_PENDING) -> None:
+    """
+    Serves a local HTTP job endpoint until interrupted. The stage modules stay loaded
+    between jobs, so a job pays no import or startup cost.
+
+    Args:
+        run_job: Runs the workflow for a component (see JobQueue).
+        host: Interface to listen on. Defaults to localhost only.
+        port: TCP port to listen on.
+        workers: Number of jobs run concurrently.
+        max_pending: Maximum number of queued or running jobs.
+    """
+    from http.server import ThreadingHTTPServer
+
+    job_queue = JobQueue(run_job, workers, max_pending)
+    server = ThreadingHTTPServer((host, port), make_handler(job_queue))
+    logger.info("Serving documentation jobs on http://%s:%d with %d workers.", host, server.server_address[1], workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down.")
+    finally:
+        server.server_close()
+        job_queue.shutdown(wait=False)
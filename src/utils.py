@@ -1,3 +1,5 @@
+import os
+from contextlib import contextmanager
 from enum import Enum
 
 class OutputMarkers(Enum):
@@ -5,3 +7,42 @@ class OutputMarkers(Enum):
 
     def __str__(self):
         return self.value
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', **open_kwargs):
+    """
+    Opens a temporary file next to path for writing and moves it over path on success,
+    so readers only ever see the previous or the complete new content.
+
+    Args:
+        path: The destination file path.
+        mode: The file mode ('w' or 'wb').
+        **open_kwargs: Extra arguments for open(), e.g. newline=''.
+    """
+    # Imported here so that starting the CLI does not pay for tempfile (and random, shutil).
+    import tempfile
+
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with open(fd, mode, **open_kwargs) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def sha256_hex(text: str) -> str:
+    """
+    Returns the SHA-256 hex digest of text encoded as UTF-8.
+    """
+    # hashlib loads OpenSSL, which takes several milliseconds, so it is only imported
+    # once something is hashed rather than when the CLI starts.
+    import hashlib
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
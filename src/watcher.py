@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+from src.doc_reader import DocIndex
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError: # inotify_simple is optional; fall back to mtime polling.
+    INotify = None
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+
+class PollingChangeSource:
+    """
+    Detects changed components by rescanning the data directory's file mtimes.
+    """
+
+    def __init__(self, doc_index: DocIndex):
+        self.doc_index = doc_index
+
+    def wait(self, timeout: float) -> set[str]:
+        """
+        Waits up to timeout seconds and returns the components that changed meanwhile.
+        """
+        time.sleep(timeout)
+        return self.doc_index.refresh(deep=True)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyChangeSource:
+    """
+    Detects changed components with inotify watches on the data directory and every
+    source directory. Requires the optional inotify_simple package (Linux only).
+    """
+
+    WATCH_FLAGS = None if INotify is None else (
+        inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM
+        | inotify_flags.CREATE | inotify_flags.DELETE
+    )
+
+    def __init__(self, doc_index: DocIndex):
+        self.doc_index = doc_index
+        self._inotify = INotify()
+        self._watched_dirs = set()
+        self._add_watches()
+
+    def _add_watches(self) -> None:
+        directories = [self.doc_index.data_dir]
+        with os.scandir(self.doc_index.data_dir) as entries:
+            directories.extend(entry.path for entry in entries if entry.is_dir())
+        for directory in directories:
+            if directory not in self._watched_dirs:
+                self._inotify.add_watch(directory, self.WATCH_FLAGS)
+                self._watched_dirs.add(directory)
+
+    def wait(self, timeout: float) -> set[str]:
+        """
+        Blocks until file events arrive or timeout seconds pass, and returns the
+        components that changed.
+        """
+        events = self._inotify.read(timeout=int(timeout * 1000))
+        if not events:
+            return set()
+        self._add_watches() # Pick up newly created source directories.
+        return self.doc_index.refresh(deep=True)
+
+    def close(self) -> None:
+        self._inotify.close()
+
+
+def create_change_source(doc_index: DocIndex):
+    """
+    Returns an inotify-based change source when inotify_simple is installed, else a polling one.
+    """
+    if INotify is not None:
+        try:
+            return InotifyChangeSource(doc_index)
+        except OSError:
+            pass # e.g. not on Linux, or the inotify watch limit was reached.
+    return PollingChangeSource(doc_index)
+
+
+def watch_components(doc_index: DocIndex, process_components: Callable[[list[str]], None],
+                     poll_interval: float = DEFAULT_POLL_INTERVAL,
+                     debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+                     stop_event: Optional[threading.Event] = None, change_source=None) -> None:
+    """
+    Watches the data directory and reprocesses components as their source files change.
+
+    Changes are debounced: once a change is seen, further changes are collected until
+    none arrive for debounce_seconds. Then the affected components are passed to
+    process_components in one batch.
+
+    Args:
+        doc_index: Index of the data directory. It is refreshed in place.
+        process_components: Called with the sorted names of the changed components.
+        poll_interval: Seconds between checks (the inotify read timeout when inotify is used).
+        debounce_seconds: Quiet period that ends a burst of writes.
+        stop_event: Stops the loop when set. Without one the loop runs until interrupted.
+        change_source: Overrides the change source (see create_change_source).
+    """
+    source = change_source or create_change_source(doc_index)
+    try:
+        while stop_event is None or not stop_event.is_set():
+            changed = source.wait(poll_interval)
+            if not changed:
+                continue
+            quiet_until = time.monotonic() + debounce_seconds
+            while (remaining := quiet_until - time.monotonic()) > 0:
+                more_changes = source.wait(remaining)
+                if more_changes:
+                    changed |= more_changes
+                    quiet_until = time.monotonic() + debounce_seconds
+            process_components(sorted(changed))
+    finally:
+        source.close()
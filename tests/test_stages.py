@@ -2,14 +2,47 @@ import unittest
 import os
 import json
 import csv
+import io
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from types import SimpleNamespace
 from unittest.mock import patch
-from src.doc_reader import read_component_docs
+from src.doc_reader import DocIndex, list_components, read_component_docs
 from src.field_extractor import extract_fields_from_content
-from src.field_aligner import align_and_normalize_fields
-from src.field_comparer import compare_and_evaluate_fields
-from src.report_generator import generate_csv_report
+from src.field_aligner import align_and_normalize_fields, align_fields_locally
+from src.field_matcher import FieldNameIndex, normalize_field_name
+from src.field_comparer import (
+    compare_and_evaluate_fields,
+    score_fields_locally,
+    score_matrix,
+    shard_aligned_fields,
+    split_unanimous_fields,
+    unanimous_field_ids,
+)
+from src.field_matrix import FieldMatrix
+from src.parquet_export import export_parquet_report, pyarrow_available, read_parquet_report
+from src.report_generator import ConsolidatedReport, decode_details, evaluation_records, generate_csv_report, write_consolidated_report
 from src.human_reviewer import apply_human_decisions
 from src.doc_generator import generate_unified_document
+from src.main import extract_all_sources, parse_step_workers, print_batch_summary, run_batch, run_streaming_batch, run_workflow
+from src.pipeline import Pipeline, PipelineStage
+from src.crew_runner import set_llm_backend
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_llm import FakeLLMBackend
+from src.checkpoint import CheckpointStore, fingerprint, run_checkpointed_stage
+from src.service import JobQueue, QueueFullError, make_handler, parse_job_request
+from src.watcher import PollingChangeSource, watch_components
+from src.incremental import changed_rows, changed_sources, realign_fields, touched_fields
+from src.manifest import Manifest
+from src.metrics import JsonLinesSink, MetricsRecorder, PrometheusTextSink, StageTracker, count, propagate
+from src.profiler import Profiler
+from src.logging_setup import configure_dumps, configure_logging, dump_intermediate, get_logger
+from src.llm_cache import LLMCache, configure_cache, disable_cache
+from src.prompt_codec import decode_alignment, decode_evaluations, encode_aligned_fields, encode_evaluations, encode_extracted_fields
+from src.models import AlignedField, SourceEvaluation, aligned_from_dict, aligned_to_dict, evaluations_from_dict, evaluations_to_dict
 from src.utils import OutputMarkers
 
 class TestStages(unittest.TestCase):
@@ -54,6 +87,227 @@ class TestStages(unittest.TestCase):
         component_docs = read_component_docs("non_existent_component")
         self.assertEqual(len(component_docs), 0)
 
+    def test_list_components(self):
+        os.makedirs("data/source1", exist_ok=True)
+        os.makedirs("data/source2", exist_ok=True)
+        paths = ["data/source1/batch_a.txt", "data/source2/batch_a.txt", "data/source2/batch_b.txt"]
+        for path in paths:
+            with open(path, "w") as f: f.write("Doc")
+
+        components = list_components()
+
+        for path in paths:
+            os.remove(path)
+        self.assertIn("batch_a", components)
+        self.assertIn("batch_b", components)
+        self.assertEqual(components, sorted(components))
+
+    def test_doc_index(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            for source_name in ["source2", "source1"]:
+                os.makedirs(os.path.join(data_dir, source_name))
+                with open(os.path.join(data_dir, source_name, "component1.txt"), "w") as f: f.write(f"Doc for {source_name}")
+            with open(os.path.join(data_dir, "source1", "component2.txt"), "w") as f: f.write("Doc 2")
+
+            index = DocIndex(data_dir)
+            self.assertEqual(index.components(), ["component1", "component2"])
+            self.assertEqual(list(index.sources_for("component1").keys()), ["source1", "source2"])
+            self.assertEqual(index.sources_for("component2")["source1"]["size"], len("Doc 2"))
+            self.assertEqual(
+                read_component_docs("component1", index),
+                {"source1": "Doc for source1", "source2": "Doc for source2"}
+            )
+
+            self.assertEqual(index.refresh(), set())
+            os.remove(os.path.join(data_dir, "source1", "component2.txt"))
+            with open(os.path.join(data_dir, "source2", "component3.txt"), "w") as f: f.write("Doc 3")
+            self.assertEqual(index.refresh(deep=True), {"component2", "component3"})
+            self.assertEqual(index.components(), ["component1", "component3"])
+
+    def test_watch_components_debounces_changes(self):
+        class FakeChangeSource:
+            def __init__(self, batches):
+                self.batches = list(batches)
+            def wait(self, timeout):
+                return self.batches.pop(0) if self.batches else set()
+            def close(self):
+                pass
+
+        stop_event = threading.Event()
+        processed = []
+        def process_components(names):
+            processed.append(names)
+            stop_event.set()
+
+        change_source = FakeChangeSource([set(), {"component2"}, {"component1"}, {"component2"}])
+        watch_components(None, process_components, poll_interval=0, debounce_seconds=0.05,
+                         stop_event=stop_event, change_source=change_source)
+
+        # The burst of writes is reprocessed once, with each component once.
+        self.assertEqual(processed, [["component1", "component2"]])
+
+    def test_polling_change_source(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.makedirs(os.path.join(data_dir, "source1"))
+            doc_path = os.path.join(data_dir, "source1", "component1.txt")
+            with open(doc_path, "w") as f: f.write("Doc")
+            change_source = PollingChangeSource(DocIndex(data_dir))
+
+            with open(doc_path, "w") as f: f.write("Doc, edited in place")
+            self.assertEqual(change_source.wait(0), {"component1"})
+            self.assertEqual(change_source.wait(0), set())
+
+    def test_job_queue(self):
+        release = threading.Event()
+        def run_job(component_name):
+            release.wait(5)
+            if component_name == "broken":
+                raise RuntimeError("LLM unavailable")
+            return True
+
+        job_queue = JobQueue(run_job, workers=1, max_pending=2)
+        ok_job = job_queue.submit("component1")
+        failed_job = job_queue.submit("broken")
+        self.assertEqual(ok_job["status"], "queued")
+        with self.assertRaises(QueueFullError):
+            job_queue.submit("component2")
+
+        release.set()
+        job_queue.shutdown(wait=True)
+        self.assertEqual(job_queue.get(ok_job["jobId"])["status"], "ok")
+        self.assertEqual(job_queue.get(failed_job["jobId"])["status"], "failed")
+        self.assertIn("LLM unavailable", job_queue.get(failed_job["jobId"])["detail"])
+        self.assertEqual(job_queue.stats()["pending"], 0)
+
+    def test_job_request_validation(self):
+        self.assertEqual(parse_job_request({"component": "c1"}), ["c1"])
+        self.assertEqual(parse_job_request({"components": ["c1", "c2"]}), ["c1", "c2"])
+        for request in ({"components": "abc"}, {"components": []}, {"component": ["c1"]}, {"component": ""},
+                        {"component": "../../tmp/x"}, {"components": ["c1", "a/b"]}, {"component": "..\\x"},
+                        {}, ["c1"]):
+            with self.assertRaises(ValueError):
+                parse_job_request(request)
+
+        from http.server import ThreadingHTTPServer
+        from urllib.error import HTTPError
+        from urllib.request import urlopen
+        job_queue = JobQueue(lambda component_name: True, workers=1)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(job_queue))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/jobs"
+            with self.assertRaises(HTTPError) as raised:
+                urlopen(url, data=json.dumps({"components": "abc"}).encode("utf-8"))
+            self.assertEqual(raised.exception.code, 400)
+            with urlopen(url, data=json.dumps({"component": "c1"}).encode("utf-8")) as response:
+                self.assertEqual(response.status, 202)
+        finally:
+            server.shutdown()
+            server.server_close()
+            job_queue.shutdown(wait=True)
+        self.assertEqual([job["component"] for job in job_queue.list()], ["c1"])
+
+    def test_run_batch(self):
+        def fake_run_component(component_name, **options):
+            if component_name == "broken":
+                raise RuntimeError("LLM unavailable")
+            return SimpleNamespace(completed=component_name != "empty", unchanged=False)
+
+        with patch('src.main.run_component', side_effect=fake_run_component):
+            results = run_batch(["component1", "broken", "empty"], workers=2, options={})
+
+        self.assertEqual([r["component"] for r in results], ["component1", "broken", "empty"])
+        self.assertEqual([r["status"] for r in results], ["ok", "failed", "skipped"])
+        self.assertIn("LLM unavailable", results[1]["detail"])
+
+    @patch('crewai.Crew.kickoff')
+    def test_pipeline_with_fake_llm_backend(self, mock_kickoff):
+        previous_cwd = os.getcwd()
+        backend = FakeLLMBackend()
+        with tempfile.TemporaryDirectory() as work_dir:
+            corpus = generate_corpus(os.path.join(work_dir, "data"), components=2, sources=2, fields=5,
+                                     conflict_rate=0.5, freeform_rate=0.5, seed=1)
+            os.chdir(work_dir)
+            set_llm_backend(backend)
+            try:
+                doc_index = DocIndex(os.path.join(work_dir, "data"))
+                completed = run_workflow("component1", doc_index=doc_index, llm_compare=True)
+                with open(os.path.join("output", "component1_unified.txt")) as f:
+                    unified_doc = f.read()
+            finally:
+                set_llm_backend(None)
+                os.chdir(previous_cwd)
+
+        self.assertEqual(corpus["documents"], 4)
+        self.assertGreater(corpus["freeformBlocks"], 0)
+        self.assertTrue(completed)
+        self.assertGreater(backend.calls, 0)
+        mock_kickoff.assert_not_called()
+        self.assertEqual(unified_doc.count("Field:"), 5)
+
+    def test_streaming_pipeline_backpressure(self):
+        in_flight, max_in_flight, lock = [0], [0], threading.Lock()
+        release = threading.Event()
+
+        def take(item):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            return item != 3 # Item 3 finishes early.
+
+        def slow(item):
+            release.wait(0.05)
+            if item == 5:
+                raise ValueError("boom")
+            return True
+
+        def done(item):
+            with lock:
+                in_flight[0] -= 1
+            return True
+
+        pipeline = Pipeline([PipelineStage("take", take), PipelineStage("slow", slow), PipelineStage("done", done, workers=2)],
+                            queue_size=1)
+        results = pipeline.run(iter(range(8)))
+
+        self.assertEqual([result["item"] for result in results], list(range(8)))
+        self.assertEqual(results[3]["stage"], "take")
+        self.assertIsInstance(results[5]["error"], ValueError)
+        self.assertEqual([result["stage"] for result in results if result["error"] is None and result["item"] != 3],
+                         ["done"] * 6)
+        # With single-slot queues, a slow stage soon stops the first one from taking more items.
+        self.assertLessEqual(max_in_flight[0], 5)
+        self.assertEqual(pipeline.stats()["take"]["items"], 8)
+        self.assertGreater(pipeline.stats()["take"]["blockedSeconds"], 0)
+
+    @patch('crewai.Crew.kickoff')
+    def test_run_streaming_batch(self, mock_kickoff):
+        previous_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as work_dir:
+            generate_corpus(os.path.join(work_dir, "data"), components=4, sources=2, fields=5, freeform_rate=0.3, seed=2)
+            os.chdir(work_dir)
+            set_llm_backend(FakeLLMBackend())
+            try:
+                doc_index = DocIndex(os.path.join(work_dir, "data"))
+                names = ["missing"] + doc_index.components()
+                results = run_streaming_batch(names, {"extract": 2, "compare": 2}, {"doc_index": doc_index}, queue_size=1)
+                streamed_docs = {name: open(os.path.join("output", f"{name}_unified.txt")).read()
+                                 for name in doc_index.components()}
+                run_batch(doc_index.components(), 1, {"doc_index": doc_index})
+                batch_docs = {name: open(os.path.join("output", f"{name}_unified.txt")).read()
+                              for name in doc_index.components()}
+            finally:
+                set_llm_backend(None)
+                os.chdir(previous_cwd)
+
+        self.assertEqual([result["component"] for result in results], names)
+        self.assertEqual([result["status"] for result in results], ["skipped"] + ["ok"] * 4)
+        self.assertEqual(streamed_docs, batch_docs)
+        mock_kickoff.assert_not_called()
+        self.assertEqual(parse_step_workers("extract=8, compare=6")["compare"], 6)
+        with self.assertRaises(ValueError):
+            parse_step_workers("review=2")
+
     @patch('crewai.Crew.kickoff')
     def test_extract_fields_from_content(self, mock_kickoff):
         sample_doc_content = """Field: Title
@@ -97,7 +351,8 @@ Last Updated: 2023-10-01"""
 
         extracted_data = extract_fields_from_content(sample_doc_content)
 
-        mock_kickoff.assert_called_once_with(inputs={'doc_content': sample_doc_content})
+        # The canonical layout is parsed locally, without an LLM call.
+        mock_kickoff.assert_not_called()
         
         self.assertIsInstance(extracted_data, list)
         self.assertEqual(len(extracted_data), 3)
@@ -123,6 +378,43 @@ Last Updated: 2023-10-01"""
         self.assertEqual(extracted_data[2]['isRequired'], False)
         self.assertEqual(extracted_data[2]['lastUpdated'], "2023-10-01")
 
+    @patch('crewai.Crew.kickoff')
+    def test_extract_fields_from_content_llm_fallback(self, mock_kickoff):
+        sample_doc_content = """Field: Title
+Value: Component One
+Required: optional
+Last Updated: 2023-10-01
+
+Owner is the platform team, required, updated last October."""
+
+        mock_kickoff.return_value = '[{"fieldName": "Owner", "fieldValue": "platform team", "isRequired": true, "lastUpdated": "2023-10-15"}]'
+
+        extracted_data = extract_fields_from_content(sample_doc_content)
+
+        # Only the block that does not follow the canonical layout goes to the agent.
+        mock_kickoff.assert_called_once_with(
+            inputs={'doc_content': "Owner is the platform team, required, updated last October."}
+        )
+        self.assertEqual([f['fieldName'] for f in extracted_data], ["Title", "Owner"])
+        self.assertIs(extracted_data[0]['isRequired'], False)
+        self.assertEqual(extracted_data[1]['fieldValue'], "platform team")
+
+    def test_extract_all_sources_concurrently(self):
+        def fake_extract(doc_content):
+            if doc_content == "broken":
+                raise ValueError("unparseable")
+            return [{"fieldName": doc_content, "fieldValue": "v", "isRequired": True, "lastUpdated": "2023-10-01"}]
+
+        docs_by_source = {"source1": "Title", "source2": "broken", "source3": "Version"}
+        with patch('src.main.extract_fields_from_content', side_effect=fake_extract):
+            extracted = extract_all_sources(docs_by_source, max_workers=3)
+
+        # Source order is kept and a failed source gets an empty list.
+        self.assertEqual(list(extracted.keys()), ["source1", "source2", "source3"])
+        self.assertEqual(extracted["source1"][0]["fieldName"], "Title")
+        self.assertEqual(extracted["source2"], [])
+        self.assertEqual(extracted["source3"][0]["fieldName"], "Version")
+
     @patch('crewai.Crew.kickoff')
     def test_align_and_normalize_fields(self, mock_kickoff):
         sample_extracted_data_by_source = {
@@ -160,9 +452,9 @@ Last Updated: 2023-10-01"""
         """
         mock_kickoff.return_value = expected_json_output_str.strip()
 
-        aligned_data = align_and_normalize_fields(sample_extracted_data_by_source)
+        aligned_data = align_and_normalize_fields(sample_extracted_data_by_source, use_llm=True)
 
-        mock_kickoff.assert_called_once_with(inputs={'extracted_data_by_source': sample_extracted_data_by_source})
+        mock_kickoff.assert_called_once_with(inputs={'extracted_data_by_source': encode_extracted_fields(sample_extracted_data_by_source)})
 
         self.assertIsInstance(aligned_data, dict)
         self.assertIn("Title", aligned_data)
@@ -209,6 +501,102 @@ Last Updated: 2023-10-01"""
         self.assertIn("source3", aligned_data["Author"])
         self.assertEqual(aligned_data["Author"]["source3"], str(OutputMarkers.NO_FIELD))
 
+    @patch('crewai.Crew.kickoff')
+    def test_align_and_normalize_fields_locally(self, mock_kickoff):
+        sample_extracted_data_by_source = {
+            "source1": [
+                {"fieldName": "Title", "fieldValue": "Component One", "isRequired": True, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Version", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"}
+            ],
+            "source2": [
+                {"fieldName": "Title", "fieldValue": "Component 1", "isRequired": True, "lastUpdated": "2023-10-02"},
+                {"fieldName": "Author", "fieldValue": "SourceTwo", "isRequired": False, "lastUpdated": "2023-10-02"}
+            ],
+            "source3": []
+        }
+
+        aligned_data = align_and_normalize_fields(sample_extracted_data_by_source)
+
+        mock_kickoff.assert_not_called()
+        self.assertEqual(list(aligned_data.keys()), ["Title", "Version", "Author"])
+        self.assertEqual(list(aligned_data["Author"].keys()), ["source1", "source2", "source3"])
+        self.assertEqual(
+            aligned_data["Title"]["source2"],
+            {"originalValue": "Component 1", "lastUpdated": "2023-10-02", "isRequired": True}
+        )
+        self.assertEqual(aligned_data["Title"]["source3"], str(OutputMarkers.NO_FIELD))
+        self.assertEqual(aligned_data["Version"]["source2"], str(OutputMarkers.NO_FIELD))
+        self.assertEqual(aligned_data["Author"]["source1"], str(OutputMarkers.NO_FIELD))
+
+    def test_field_name_index_clusters_spelling_variants(self):
+        for variant in ["Last Updated", "last_updated", "LastUpdated", "last-updated"]:
+            self.assertEqual(normalize_field_name(variant), "last updated")
+
+        index = FieldNameIndex(synonyms={"updated on": "last updated"})
+        cluster_ids = {index.add(name) for name in ["Last Updated", "last_updated", "LastUpdated", "Updated On"]}
+        self.assertEqual(len(cluster_ids), 1)
+        self.assertNotEqual(index.add("Title"), index.add("Subtitle"))
+        self.assertEqual(index.ambiguous_clusters, set())
+
+    @patch('crewai.Crew.kickoff')
+    def test_align_and_normalize_fields_fuzzy(self, mock_kickoff):
+        sample_extracted_data_by_source = {
+            "source1": [
+                {"fieldName": "Last Updated", "fieldValue": "2023-10-01", "isRequired": True, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Version", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"}
+            ],
+            "source2": [
+                {"fieldName": "last_updated", "fieldValue": "2023-10-02", "isRequired": True, "lastUpdated": "2023-10-02"},
+                {"fieldName": "Versions", "fieldValue": "1.0, 1.1", "isRequired": False, "lastUpdated": "2023-10-02"}
+            ]
+        }
+        mock_kickoff.return_value = """{
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": false },
+                "source2": "ENUM.NO_FIELD"
+            },
+            "Versions": {
+                "source1": "ENUM.NO_FIELD",
+                "source2": { "originalValue": "1.0, 1.1", "lastUpdated": "2023-10-02", "isRequired": false }
+            }
+        }"""
+
+        aligned_data = align_and_normalize_fields(sample_extracted_data_by_source, fuzzy=True)
+
+        # "Version"/"Versions" are similar but below the threshold, so only they go to the agent.
+        mock_kickoff.assert_called_once_with(inputs={'extracted_data_by_source': encode_extracted_fields({
+            "source1": [sample_extracted_data_by_source["source1"][1]],
+            "source2": [sample_extracted_data_by_source["source2"][1]],
+        })})
+        self.assertEqual(list(aligned_data.keys()), ["Last Updated", "Version", "Versions"])
+        self.assertEqual(aligned_data["Last Updated"]["source2"]["originalValue"], "2023-10-02")
+
+    @patch('crewai.Crew.kickoff')
+    def test_align_fields_fuzzy_merges_agent_group_into_local_field(self, mock_kickoff):
+        sample_extracted_data_by_source = {
+            "source1": [
+                {"fieldName": "Release", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Version", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"}
+            ],
+            "source2": [
+                {"fieldName": "Versions", "fieldValue": "1.1", "isRequired": False, "lastUpdated": "2023-10-02"}
+            ],
+            "source3": [
+                {"fieldName": "Release", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-03"}
+            ]
+        }
+        # The agent files both ambiguous rows under the locally aligned "Release".
+        mock_kickoff.return_value = '{"Release": [0, 1]}'
+
+        with self.assertLogs("docunify.field_aligner", level="WARNING") as logs:
+            aligned_data = align_and_normalize_fields(sample_extracted_data_by_source, fuzzy=True)
+
+        self.assertEqual(list(aligned_data.keys()), ["Release"])
+        self.assertEqual(aligned_data["Release"]["source1"]["lastUpdated"], "2023-10-01")
+        self.assertEqual(aligned_data["Release"]["source2"]["originalValue"], "1.1")
+        self.assertEqual(aligned_data["Release"]["source3"]["lastUpdated"], "2023-10-03")
+        self.assertIn("source1", logs.output[0])
+
     @patch('crewai.Crew.kickoff')
     def test_compare_and_evaluate_fields(self, mock_kickoff):
         sample_aligned_field_data = {
@@ -250,9 +638,9 @@ Last Updated: 2023-10-01"""
         """
         mock_kickoff.return_value = expected_json_output_str.strip()
         
-        evaluated_data = compare_and_evaluate_fields(sample_aligned_field_data)
+        evaluated_data = compare_and_evaluate_fields(sample_aligned_field_data, use_llm=True)
 
-        mock_kickoff.assert_called_once_with(inputs={'aligned_field_data': sample_aligned_field_data})
+        mock_kickoff.assert_called_once_with(inputs={'aligned_field_data': encode_aligned_fields(sample_aligned_field_data)})
 
         self.assertIsInstance(evaluated_data, dict)
         self.assertIn("Title", evaluated_data)
@@ -283,6 +671,457 @@ Last Updated: 2023-10-01"""
         self.assertEqual(evaluated_data["Version"]["diff"]["source3"]["originalValue"], "1.0.1")
         self.assertEqual(evaluated_data["Version"]["diff"]["source3"]["lastUpdated"], "2023-10-03")
 
+    @patch('crewai.Crew.kickoff')
+    def test_compare_and_evaluate_fields_locally(self, mock_kickoff):
+        sample_aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": "Component 1", "lastUpdated": "2023-10-02", "isRequired": True },
+                "source3": str(OutputMarkers.NO_FIELD),
+                "source4": { "originalValue": "Component 1", "lastUpdated": "2023-09-30", "isRequired": True }
+            },
+            "Lost": {
+                "source1": str(OutputMarkers.NO_FIELD),
+                "source2": str(OutputMarkers.NO_FIELD),
+                "source3": str(OutputMarkers.NO_FIELD)
+            }
+        }
+
+        evaluated_data = compare_and_evaluate_fields(sample_aligned_field_data)
+
+        mock_kickoff.assert_not_called()
+        title = evaluated_data["Title"]
+        self.assertEqual(title["truthSource"], "source2")
+        self.assertIn("most recent lastUpdated", title["explanation"])
+        self.assertEqual(title["confidenceOverall"], title["diff"]["source2"]["confidence"])
+        self.assertGreater(title["diff"]["source2"]["confidence"], title["diff"]["source1"]["confidence"])
+        self.assertEqual(title["diff"]["source2"]["originalValue"], "Component 1")
+        self.assertFalse(title["diff"]["source2"]["modified"])
+        self.assertEqual(title["diff"]["source3"]["value"], str(OutputMarkers.NO_FIELD))
+        self.assertEqual(evaluated_data["Lost"]["truthSource"], "NO_TRUTH_SOURCE_FOUND")
+
+    @patch('crewai.Crew.kickoff')
+    def test_uncorroborated_value_is_flagged_and_escalated_when_unsupported(self, mock_kickoff):
+        # Every source disagrees and the newest value wins on recency: flagged, but settled locally.
+        newest_wins = {
+            "Title Description": {
+                "source1": { "originalValue": "Stable 606", "lastUpdated": "2023-07-09", "isRequired": False },
+                "source2": { "originalValue": "Dark 640", "lastUpdated": "2023-08-01", "isRequired": False },
+                "source3": { "originalValue": "Primary 930", "lastUpdated": "2023-11-07", "isRequired": False }
+            }
+        }
+        evaluated_data, contested_fields = score_fields_locally(newest_wins)
+        self.assertEqual(contested_fields, [])
+        self.assertEqual(evaluated_data["Title Description"]["truthSource"], "source3")
+        self.assertLess(evaluated_data["Title Description"]["confidenceOverall"], 0.9)
+        with tempfile.TemporaryDirectory() as output_dir:
+            report_path = os.path.join(output_dir, "report.csv")
+            generate_csv_report(compare_and_evaluate_fields(newest_wins), report_path)
+            with open(report_path, newline='') as csvfile:
+                row = list(csv.DictReader(csvfile))[0]
+        mock_kickoff.assert_not_called()
+        self.assertEqual(row["TruthSource"], "source3")
+        self.assertEqual(row["NeedsReview"], "True")
+
+        # The pick shares its date with a rival, or another source marks the field required: escalated.
+        tied_on_date = {
+            "Owner": {
+                "source1": { "originalValue": "Platform", "lastUpdated": "2023-11-07", "isRequired": False },
+                "source2": { "originalValue": "TBD", "lastUpdated": "2023-11-07", "isRequired": False },
+                "source3": { "originalValue": "Infra", "lastUpdated": "2023-08-01", "isRequired": False }
+            }
+        }
+        required_elsewhere = {
+            "Owner": {
+                "source1": { "originalValue": "Platform", "lastUpdated": "2023-07-09", "isRequired": True },
+                "source2": { "originalValue": "Infra", "lastUpdated": "2023-11-07", "isRequired": False }
+            }
+        }
+        for aligned_field_data in (tied_on_date, required_elsewhere):
+            evaluated_data, contested_fields = score_fields_locally(aligned_field_data)
+            self.assertEqual(contested_fields, ["Owner"])
+            self.assertLess(evaluated_data["Owner"]["confidenceOverall"], 0.9)
+            matrix = FieldMatrix.from_aligned(aligned_field_data)
+            self.assertEqual(score_matrix(matrix), [0])
+
+        # When the agent fails, the local pick is kept and flagged for review.
+        mock_kickoff.side_effect = RuntimeError("LLM unavailable")
+        with self.assertLogs("docunify.field_comparer", level="WARNING") as logs:
+            evaluated_data = compare_and_evaluate_fields(required_elsewhere, shard_retries=0, component_name="ComponentA")
+        mock_kickoff.assert_called_once()
+        self.assertEqual(logs.records[0].component, "ComponentA")
+        self.assertEqual(evaluated_data["Owner"]["truthSource"], "source2")
+        self.assertLess(evaluated_data["Owner"]["confidenceOverall"], 0.9)
+
+    @patch('crewai.Crew.kickoff')
+    def test_compare_and_evaluate_fields_escalates_conflicts(self, mock_kickoff):
+        sample_aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": "Component One", "lastUpdated": "2023-10-02", "isRequired": True }
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-03", "isRequired": False },
+                "source2": { "originalValue": "1.1", "lastUpdated": "2023-10-03", "isRequired": False }
+            }
+        }
+        mock_kickoff.return_value = '{"Version": {"diff": {}, "truthSource": "source2", "explanation": "Newer release.", "confidenceOverall": 0.7}}'
+
+        evaluated_data = compare_and_evaluate_fields(sample_aligned_field_data)
+
+        # Only the field whose top sources tie with different values goes to the agent.
+        mock_kickoff.assert_called_once_with(
+            inputs={'aligned_field_data': encode_aligned_fields({"Version": sample_aligned_field_data["Version"]})}
+        )
+        self.assertEqual(list(evaluated_data.keys()), ["Title", "Version"])
+        self.assertEqual(evaluated_data["Title"]["truthSource"], "source2")
+        self.assertEqual(evaluated_data["Version"]["explanation"], "Newer release.")
+
+    @patch('crewai.Crew.kickoff')
+    def test_compare_and_evaluate_fields_sharded_with_retry(self, mock_kickoff):
+        sample_aligned_field_data = {
+            f"Field{i}": {
+                "source1": { "originalValue": f"value {i}", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": f"other {i}", "lastUpdated": "2023-10-01", "isRequired": True }
+            }
+            for i in range(4)
+        }
+        shards = shard_aligned_fields(sample_aligned_field_data, token_budget=20)
+        self.assertEqual(len(shards), 4)
+
+        attempts = {}
+        def fake_kickoff(inputs):
+            (field_name,) = inputs['aligned_field_data']['fields']
+            attempts[field_name] = attempts.get(field_name, 0) + 1
+            if field_name == "Field2" and attempts[field_name] == 1:
+                return '{"Field2": {"diff": {}, "truncated'
+            return json.dumps({field_name: {"diff": {}, "truthSource": "source2", "explanation": "LLM.", "confidenceOverall": 0.8}})
+        mock_kickoff.side_effect = fake_kickoff
+
+        evaluated_data = compare_and_evaluate_fields(
+            sample_aligned_field_data, use_llm=True, shard_token_budget=20, shard_workers=2
+        )
+
+        # Each field ran in its own shard and only the truncated shard was retried.
+        self.assertEqual(attempts, {"Field0": 1, "Field1": 1, "Field2": 2, "Field3": 1})
+        self.assertEqual(list(evaluated_data.keys()), ["Field0", "Field1", "Field2", "Field3"])
+        self.assertEqual(evaluated_data["Field2"]["truthSource"], "source2")
+
+    def test_prompt_codec_roundtrip(self):
+        extracted_data_by_source = {
+            "source1": [
+                {"fieldName": "Title", "fieldValue": "Component One", "isRequired": True, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Version", "fieldValue": "1.0", "isRequired": False, "lastUpdated": "2023-10-01"}
+            ],
+            "source2": [
+                {"fieldName": "title", "fieldValue": "Component 1", "isRequired": True, "lastUpdated": "2023-10-02"}
+            ]
+        }
+        encoded = encode_extracted_fields(extracted_data_by_source)
+        self.assertEqual(encoded["rows"], [[0, "Title", "Component One"], [0, "Version", "1.0"], [1, "title", "Component 1"]])
+
+        # Rows left out of the response keep their own field.
+        aligned_data = decode_alignment({"Title": [0, 2]}, extracted_data_by_source)
+        self.assertEqual(aligned_data, align_fields_locally({
+            "source1": extracted_data_by_source["source1"],
+            "source2": [dict(extracted_data_by_source["source2"][0], fieldName="Title")],
+        }))
+
+        encoded = encode_aligned_fields(aligned_data)
+        self.assertNotIn(str(OutputMarkers.NO_FIELD), json.dumps(encoded))
+        evaluated_data = compare_and_evaluate_fields(aligned_data)
+        self.assertEqual(
+            decode_evaluations(encode_evaluations(evaluated_data, aligned_data), aligned_data, "NO_TRUTH_SOURCE_FOUND"),
+            evaluated_data
+        )
+        with self.assertRaises(ValueError):
+            decode_evaluations({"7": {"t": 0, "c": 0.5, "e": "", "s": [0.5, 0.5]}}, aligned_data, "NO_TRUTH_SOURCE_FOUND")
+
+    def test_split_unanimous_fields(self):
+        sample_aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component  One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": "component one", "lastUpdated": "2023-10-01", "isRequired": True }
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": False },
+                "source2": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": False }
+            },
+            "Author": {
+                "source1": { "originalValue": "Team A", "lastUpdated": "2023-10-01", "isRequired": False },
+                "source2": str(OutputMarkers.NO_FIELD)
+            }
+        }
+
+        resolved, contested, counts = split_unanimous_fields(sample_aligned_field_data)
+        self.assertEqual(list(resolved.keys()), ["Version"])
+        self.assertEqual(list(contested.keys()), ["Title", "Author"])
+        self.assertEqual(counts, {"unanimous": 1, "contested": 2})
+        self.assertEqual(resolved["Version"]["truthSource"], "source1")
+        self.assertEqual(resolved["Version"]["confidenceOverall"], 1.0)
+        self.assertEqual(resolved["Version"]["diff"]["source2"]["value"], "1.0")
+
+        resolved, contested, counts = split_unanimous_fields(sample_aligned_field_data, normalize_values=True)
+        self.assertEqual(list(resolved.keys()), ["Title", "Version"])
+        self.assertEqual(counts, {"unanimous": 2, "contested": 1})
+
+    @patch('crewai.Crew.kickoff')
+    def test_kickoff_results_are_cached(self, mock_kickoff):
+        sample_aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+            }
+        }
+        mock_kickoff.return_value = '{"Title": {"diff": {}, "truthSource": "source1", "explanation": "Only source.", "confidenceOverall": 0.9}}'
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = configure_cache(os.path.join(cache_dir, "cache.sqlite3"))
+            try:
+                first = compare_and_evaluate_fields(sample_aligned_field_data, use_llm=True)
+                second = compare_and_evaluate_fields(sample_aligned_field_data, use_llm=True)
+                stats = cache.stats()
+            finally:
+                disable_cache()
+
+        self.assertEqual(first, second)
+        mock_kickoff.assert_called_once()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    @patch('crewai.Crew.kickoff')
+    def test_stage_metrics(self, mock_kickoff):
+        sample_aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+            }
+        }
+        mock_kickoff.return_value = '{"Title": {"diff": {}, "truthSource": "source1", "explanation": "Only source.", "confidenceOverall": 0.9}}'
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            jsonl_path = os.path.join(output_dir, "metrics.jsonl")
+            prom_path = os.path.join(output_dir, "metrics.prom")
+            recorder = MetricsRecorder([JsonLinesSink(jsonl_path), PrometheusTextSink(prom_path)])
+            configure_cache(os.path.join(output_dir, "cache.sqlite3"))
+            try:
+                with StageTracker(recorder, "component1") as stages:
+                    stages.begin(1)
+                    worker = threading.Thread(target=propagate(count), args=("retries",))
+                    worker.start()
+                    worker.join()
+                    stages.begin(4)
+                    compare_and_evaluate_fields(sample_aligned_field_data, use_llm=True)
+                    compare_and_evaluate_fields(sample_aligned_field_data, use_llm=True)
+                count("llmCalls") # Outside a stage: ignored.
+            finally:
+                disable_cache()
+                recorder.close()
+
+            with open(jsonl_path) as f:
+                records = [json.loads(line) for line in f]
+            with open(prom_path) as f:
+                prom_text = f.read()
+
+        self.assertEqual([(r["component"], r["stageName"]) for r in records], [("component1", "read"), ("component1", "compare")])
+        self.assertEqual(records[0]["retries"], 1)
+        self.assertEqual(records[0]["llmCalls"], 0)
+        self.assertEqual(records[1]["llmCalls"], 1)
+        self.assertEqual(records[1]["cacheHits"], 1)
+        self.assertEqual(records[1]["cacheMisses"], 1)
+        self.assertGreater(records[1]["promptTokens"], 0)
+        self.assertGreater(records[1]["completionTokens"], 0)
+        self.assertGreaterEqual(records[1]["wallSeconds"], 0)
+        self.assertEqual(recorder.totals_by_stage()[4]["llmCalls"], 1)
+        self.assertIn('docunify_stage_llm_calls_total{component="component1",stage="compare"} 1', prom_text)
+
+    def test_stage_profiling(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler = Profiler(profile_dir, memory=True)
+            try:
+                with StageTracker(None, "component1", profiler) as stages:
+                    stages.begin(3)
+                    align_fields_locally({"source1": [{"fieldName": "Title", "fieldValue": "A"}]})
+            finally:
+                profiler.close()
+
+            component_dir = os.path.join(profile_dir, "component1")
+            self.assertEqual(sorted(os.listdir(component_dir)),
+                             ["stage3-align.alloc.txt", "stage3-align.pstats", "stage3-align.txt"])
+            with open(os.path.join(component_dir, "stage3-align.txt")) as f:
+                self.assertIn("align_fields_locally", f.read())
+
+    def test_structured_logging_and_dumps(self):
+        stream = io.StringIO()
+        configure_logging("INFO", "json", stream)
+        logger = get_logger("test")
+        try:
+            logger.info("Stage %d done", 2, extra={"component": "component1"})
+            # Neither dumps nor DEBUG logging are enabled, so nothing is serialized.
+            dump_intermediate(logger, "component1", "stage2-extracted", {"not serializable": object()})
+
+            with tempfile.TemporaryDirectory() as dump_dir:
+                configure_dumps(dump_dir)
+                dump_intermediate(logger, "component1", "stage2-extracted", {"source1": []})
+                with open(os.path.join(dump_dir, "component1", "stage2-extracted.json")) as f:
+                    self.assertEqual(json.load(f), {"source1": []})
+        finally:
+            configure_dumps(None)
+            configure_logging("WARNING")
+
+        entry = json.loads(stream.getvalue().splitlines()[0])
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "docunify.test")
+        self.assertEqual(entry["message"], "Stage 2 done")
+        self.assertEqual(entry["component"], "component1")
+
+    def test_llm_cache_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = LLMCache(os.path.join(cache_dir, "cache.sqlite3"), max_bytes=10)
+            cache.put("a", "aaaa")
+            cache.put("b", "bbbb")
+            self.assertEqual(cache.get("a"), "aaaa") # 'a' is now the most recently used entry
+            cache.put("c", "cccc")
+
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), "aaaa")
+            self.assertEqual(cache.get("c"), "cccc")
+            self.assertEqual(cache.stats()["evictions"], 1)
+            cache.close()
+
+    def test_main_import_does_not_import_crewai(self):
+        result = subprocess.run(
+            [sys.executable, "-c", "import src.main, sys; print('crewai' in sys.modules)"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_checkpointed_stage_reuse(self):
+        aligned_fields = {"Title": {"source1": str(OutputMarkers.NO_FIELD)}}
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            store = CheckpointStore("component1", checkpoint_dir)
+            input_fingerprint = fingerprint(aligned_fields, llm_compare=False)
+
+            data, from_checkpoint = run_checkpointed_stage(store, 4, input_fingerprint, True, lambda: {"Title": "computed"})
+            self.assertEqual((data, from_checkpoint), ({"Title": "computed"}, False))
+
+            data, from_checkpoint = run_checkpointed_stage(store, 4, input_fingerprint, True, lambda: {"Title": "recomputed"})
+            self.assertEqual((data, from_checkpoint), ({"Title": "computed"}, True))
+
+            # Changed options or reuse disabled both recompute.
+            changed_fingerprint = fingerprint(aligned_fields, llm_compare=True)
+            self.assertNotEqual(changed_fingerprint, input_fingerprint)
+            self.assertIsNone(store.load(4, changed_fingerprint))
+            data, from_checkpoint = run_checkpointed_stage(store, 4, input_fingerprint, False, lambda: {"Title": "forced"})
+            self.assertEqual((data, from_checkpoint), ({"Title": "forced"}, False))
+            self.assertEqual(store.load(4, input_fingerprint), {"Title": "forced"})
+
+    def test_incremental_reprocessing_helpers(self):
+        previous_extracted = {
+            "source1": [{"fieldName": "Title", "fieldValue": "One", "isRequired": True, "lastUpdated": "2023-10-01"}],
+            "source2": [
+                {"fieldName": "Title", "fieldValue": "One", "isRequired": True, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Author", "fieldValue": "Team", "isRequired": False, "lastUpdated": "2023-10-01"}
+            ]
+        }
+        extracted = {
+            "source1": previous_extracted["source1"],
+            "source2": [
+                {"fieldName": "Title", "fieldValue": "One", "isRequired": True, "lastUpdated": "2023-10-01"},
+                {"fieldName": "Version", "fieldValue": "2.0", "isRequired": False, "lastUpdated": "2023-11-01"}
+            ]
+        }
+        self.assertEqual(changed_sources({"source1": "a", "source2": "b"}, {"source1": "a", "source2": "c"}), {"source2"})
+        self.assertEqual(changed_sources({"source1": "a"}, {"source1": "a", "source3": "d"}), {"source3"})
+
+        fields = touched_fields(previous_extracted, extracted, {"source2"})
+        self.assertEqual(fields, {"Title", "Author", "Version"})
+
+        previous_aligned = align_fields_locally(previous_extracted)
+        aligned = realign_fields(previous_aligned, extracted, fields, align_fields_locally)
+        self.assertEqual(aligned, align_fields_locally(extracted))
+
+        previous_evaluated = {"Title": {"truthSource": "source1"}, "Author": {"truthSource": "source2"}}
+        self.assertEqual(changed_rows(previous_aligned, aligned, previous_evaluated), ["Version"])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            manifest_path = os.path.join(output_dir, "manifest.json")
+            Manifest(manifest_path).update("component1", {"source1": "a"}, "options")
+            self.assertEqual(Manifest(manifest_path).get("component1"), {"sources": {"source1": "a"}, "options": "options"})
+
+    def test_incremental_run_after_partial_extraction(self):
+        documents = {
+            "source1": "Field: Title\nValue: One\nRequired: Yes\nLast Updated: 2023-10-01\n\n"
+                       "Field: Version\nValue: 1.0\nRequired: No\nLast Updated: 2023-10-01\n",
+            "source2": "Field: Title\nValue: One\nRequired: Yes\nLast Updated: 2023-10-01\n\n"
+                       "Field: Owner\nValue: Platform\nRequired: No\nLast Updated: 2023-10-01\n",
+        }
+        previous_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as work_dir:
+            for source_name, content in documents.items():
+                os.makedirs(os.path.join(work_dir, "data", source_name))
+                with open(os.path.join(work_dir, "data", source_name, "component1.txt"), "w") as f:
+                    f.write(content)
+            os.chdir(work_dir)
+            try:
+                def run(**options) -> str:
+                    run_workflow("component1", doc_index=DocIndex(os.path.join(work_dir, "data")),
+                                 checkpoint_dir=os.path.join("output", "checkpoints"),
+                                 manifest=Manifest(os.path.join("output", "manifest.json")), **options)
+                    with open(os.path.join("output", "component1_report.csv")) as f:
+                        return f.read()
+
+                run(incremental=True)
+                # A plain run in which source2 fails to extract checkpoints Stages 3-4 from
+                # source1 alone, but neither Stage 2 nor the manifest.
+                real_extract = extract_fields_from_content
+                def flaky_extract(content):
+                    if "Owner" in content:
+                        raise RuntimeError("LLM unavailable")
+                    return real_extract(content)
+                with patch("src.main.extract_fields_from_content", side_effect=flaky_extract):
+                    self.assertNotIn("Owner", run())
+
+                with open(os.path.join("data", "source1", "component1.txt"), "a") as f:
+                    f.write("\nField: Author\nValue: Team\nRequired: No\nLast Updated: 2023-10-02\n")
+                incremental_report = run(incremental=True)
+                full_report = run()
+            finally:
+                os.chdir(previous_cwd)
+
+        self.assertIn("Owner", incremental_report)
+        self.assertEqual(incremental_report, full_report)
+
+    def test_incremental_batch_reports_unchanged_components(self):
+        document = "Field: Title\nValue: One\nRequired: Yes\nLast Updated: 2023-10-01\n"
+        previous_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.makedirs(os.path.join(work_dir, "data", "source1"))
+            for component_name in ("component1", "component2"):
+                with open(os.path.join(work_dir, "data", "source1", f"{component_name}.txt"), "w") as f:
+                    f.write(document)
+            os.chdir(work_dir)
+            try:
+                def run() -> list[dict]:
+                    return run_batch(["component1", "component2"], workers=2, options={
+                        "doc_index": DocIndex(os.path.join(work_dir, "data")), "incremental": True,
+                        "checkpoint_dir": os.path.join("output", "checkpoints"),
+                        "manifest": Manifest(os.path.join("output", "manifest.json")),
+                    })
+
+                self.assertEqual([result["status"] for result in run()], ["ok", "ok"])
+                with open(os.path.join("data", "source1", "component2.txt"), "a") as f:
+                    f.write("\nField: Owner\nValue: Platform\nRequired: No\nLast Updated: 2023-10-02\n")
+                results = run()
+            finally:
+                os.chdir(previous_cwd)
+
+        self.assertEqual([(result["status"], result["detail"]) for result in results],
+                         [("skipped", "unchanged since last run"), ("ok", "")])
+        summary = io.StringIO()
+        with redirect_stdout(summary):
+            print_batch_summary(results)
+        self.assertIn("2 components: 1 ok, 1 skipped, 0 failed", summary.getvalue())
+
     def test_generate_csv_report(self):
         sample_evaluated_data = {
             "Title": {
@@ -425,6 +1264,162 @@ Last Updated: 2023-10-01"""
         self.assertEqual(manual_entry["confidence"], 1.0)
         self.assertTrue(manual_entry["modified"])
 
+    def test_models_accept_dict_schema(self):
+        aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": "Component 1", "lastUpdated": "2023-10-02", "isRequired": True },
+                "source3": str(OutputMarkers.NO_FIELD)
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": False },
+                "source2": str(OutputMarkers.NO_FIELD),
+                "source3": str(OutputMarkers.NO_FIELD)
+            }
+        }
+        aligned_records = aligned_from_dict(json.loads(json.dumps(aligned_field_data)))
+        self.assertIsInstance(aligned_records["Title"]["source1"], AlignedField)
+        self.assertEqual(aligned_to_dict(aligned_records), aligned_field_data)
+
+        evaluated_data = compare_and_evaluate_fields(aligned_field_data)
+        records = evaluations_from_dict(json.loads(json.dumps(evaluated_data)))
+        self.assertEqual(records, evaluated_data)
+        self.assertNotIn("originalValue", records["Title"]["diff"]["source3"])
+        self.assertIs(records["Title"]["diff"]["source1"]["lastUpdated"], records["Version"]["diff"]["source1"]["lastUpdated"])
+        with self.assertRaises(KeyError):
+            records["Title"]["unknown"] = 1
+
+        # Stages 5-7 give the same results for records and dicts.
+        with tempfile.TemporaryDirectory() as output_dir:
+            outputs = []
+            for data in (evaluated_data, records):
+                decisions = {"Version": {"chosenSource": "MANUAL_INPUT", "manualValue": "2.0", "manualIsRequired": True,
+                                         "manualLastUpdated": "2024-01-01"},
+                             "Title": {"chosenSource": "source1"}}
+                final_data = apply_human_decisions(data, decisions)
+                generate_csv_report(final_data, os.path.join(output_dir, "report.csv"))
+                generate_unified_document(final_data, os.path.join(output_dir, "unified.txt"))
+                outputs.append([open(os.path.join(output_dir, name)).read() for name in ("report.csv", "unified.txt")])
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIsInstance(records["Version"]["diff"]["MANUAL_INPUT"], SourceEvaluation)
+        self.assertEqual(evaluations_to_dict(records), evaluated_data)
+
+    def test_field_matrix(self):
+        aligned_field_data = {
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": { "originalValue": "Component 1", "lastUpdated": "2023-10-02", "isRequired": True },
+                "source3": str(OutputMarkers.NO_FIELD)
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": "N/A" },
+                "source2": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": "N/A" }
+            },
+            "Lost": {
+                "source3": str(OutputMarkers.NO_FIELD)
+            }
+        }
+        matrix = FieldMatrix.from_aligned(aligned_field_data)
+        self.assertEqual(matrix.source_names, ["source1", "source2", "source3"])
+        self.assertEqual(matrix.values, ["Component One", "Component 1", "1.0"])
+        self.assertEqual(list(matrix.value_ids[:3]), [0, 1, -1])
+        self.assertEqual(matrix.to_aligned_dict(), aligned_field_data)
+        self.assertEqual(unanimous_field_ids(matrix), [1])
+
+        evaluated_data, _ = score_fields_locally(aligned_field_data)
+        score_matrix(matrix)
+        self.assertEqual(matrix.to_evaluated_dict("NO_TRUTH_SOURCE_FOUND"), evaluated_data)
+        with tempfile.TemporaryDirectory() as output_dir:
+            reports = []
+            for data in (evaluated_data, matrix):
+                generate_csv_report(data, os.path.join(output_dir, "report.csv"))
+                reports.append(open(os.path.join(output_dir, "report.csv")).read())
+        self.assertEqual(reports[0], reports[1])
+
+    def test_consolidated_report(self):
+        evaluated_data, _ = score_fields_locally({
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": str(OutputMarkers.NO_FIELD)
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": False },
+                "source2": { "originalValue": "1.1", "lastUpdated": "2023-10-02", "isRequired": False }
+            }
+        })
+        consumed = []
+
+        def records(component_names):
+            for component_name in component_names:
+                consumed.append(component_name)
+                yield from evaluation_records(component_name, evaluated_data)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            component_path = os.path.join(output_dir, "component_report.csv")
+            generate_csv_report(evaluated_data, component_path)
+            with open(component_path, newline='') as csvfile:
+                component_rows = list(csv.reader(csvfile))
+
+            path = os.path.join(output_dir, "fleet.csv")
+            self.assertEqual(write_consolidated_report(records(["a", "b"]), path), 4)
+            with open(path, newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+            self.assertEqual(rows[0], ["Component"] + component_rows[0])
+            self.assertEqual(rows[1:], [[name] + row for name in ("a", "b") for row in component_rows[1:]])
+            self.assertEqual(consumed, ["a", "b"])
+
+            with ConsolidatedReport(path, details="compressed") as report:
+                self.assertEqual(report.write(records(["a"])), 2)
+            with open(path, newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+            self.assertEqual(rows[0][-1], "AllSourcesDetailsJSONZlib")
+            self.assertEqual(decode_details(rows[1][-1], compressed=True), json.loads(component_rows[1][-1]))
+
+            write_consolidated_report(records(["a"]), path, details="omit")
+            with open(path, newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+            self.assertEqual(rows, [["Component"] + row[:-1] for row in component_rows[:1]] +
+                             [["a"] + row[:-1] for row in component_rows[1:]])
+            with self.assertRaises(ValueError):
+                ConsolidatedReport(path, details="gzip")
+
+    @unittest.skipUnless(pyarrow_available(), "pyarrow is not installed")
+    def test_parquet_report(self):
+        evaluated_data, _ = score_fields_locally({
+            "Title": {
+                "source1": { "originalValue": "Component One", "lastUpdated": "2023-10-01", "isRequired": True },
+                "source2": str(OutputMarkers.NO_FIELD)
+            },
+            "Version": {
+                "source1": { "originalValue": "1.0", "lastUpdated": "2023-10-01", "isRequired": False },
+                "source2": { "originalValue": "1.1", "lastUpdated": "not a date", "isRequired": "N/A" }
+            }
+        })
+        with tempfile.TemporaryDirectory() as output_dir:
+            for component_name in ("component1", "42"):
+                export_parquet_report(component_name, evaluated_data, output_dir)
+            table = read_parquet_report(output_dir)
+            self.assertEqual(table.num_rows, 4)
+            rows = {(row["component"], row["field_name"]): row for row in table.to_pylist()}
+            title = rows[("42", "Title")]
+            self.assertEqual(title["truth_source"], "source1")
+            self.assertEqual(title["truth_value"], "Component One")
+            self.assertIs(title["truth_is_required"], True)
+            self.assertEqual(str(title["truth_last_updated"]), "2023-10-01")
+            self.assertEqual(title["overall_confidence"], evaluated_data["Title"]["confidenceOverall"])
+            self.assertIs(title["needs_review"], evaluated_data["Title"]["confidenceOverall"] < 0.9)
+            self.assertEqual(title["sources"][1], {
+                "source": "source2", "present": False, "modified": False, "value": str(OutputMarkers.NO_FIELD),
+                "original_value": None, "is_required": None, "last_updated": None, "confidence": 0.5,
+            })
+            version_source2 = rows[("component1", "Version")]["sources"][1]
+            self.assertIsNone(version_source2["is_required"])
+            self.assertIsNone(version_source2["last_updated"])
+
+            selected = read_parquet_report(output_dir, columns=["field_name", "overall_confidence"], components=["42"])
+            self.assertEqual(selected.column_names, ["field_name", "overall_confidence"])
+            self.assertEqual(selected.column("field_name").to_pylist(), ["Title", "Version"])
+
     def test_generate_unified_document(self):
         sample_final_data = {
             "Title": { # Standard field, source2 is truth